@@ -1,6 +1,7 @@
 
 import sys
 import os
+import time
 import traceback
 
 print("🔍 DEBUG: Starting boot diagnosis...", file=sys.stderr)
@@ -10,8 +11,9 @@ print(f"🔍 DEBUG: SYS.PATH: {sys.path}", file=sys.stderr)
 
 try:
     print("🔍 DEBUG: Attempting 'import src.web_app'...", file=sys.stderr)
+    start = time.perf_counter()
     import src.web_app
-    print("✅ DEBUG: Import successful!", file=sys.stderr)
+    print(f"✅ DEBUG: Import successful! ({time.perf_counter() - start:.2f}s)", file=sys.stderr)
 except Exception:
     print("❌ DEBUG: Import FAILED!", file=sys.stderr)
     traceback.print_exc()
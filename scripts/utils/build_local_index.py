@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+
+# Add root to sys.path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BASE_DIR)
+
+from src.config import DB_PATH, LOCAL_INDEX_DIR, LOCAL_INDEX_KIND
+from src.local_store import save_sharded_store
+from src.vector_index import KINDS
+
+
+def build():
+    """
+    Converts an existing FAISS index (db/faiss_index) into the compact local
+    store for VECTOR_BACKEND=local (one shard per doc_type), reusing its
+    stored vectors (no re-embedding).
+    """
+    parser = argparse.ArgumentParser(description="Build the local compact index from the FAISS index.")
+    parser.add_argument("--db", default=DB_PATH, help="FAISS index folder")
+    parser.add_argument("--out", default=LOCAL_INDEX_DIR)
+    parser.add_argument("--kind", default=LOCAL_INDEX_KIND, choices=KINDS)
+    args = parser.parse_args()
+
+    from langchain_community.vectorstores import FAISS
+
+    print(f"⏳ Loading {args.db}...")
+    faiss_db = FAISS.load_local(args.db, None, allow_dangerous_deserialization=True)
+    vectors = faiss_db.index.reconstruct_n(0, faiss_db.index.ntotal)
+    docs = [faiss_db.docstore.search(faiss_db.index_to_docstore_id[i]) for i in range(len(vectors))]
+
+    print(f"⚗️ Building {args.kind} index over {len(docs)} chunks...")
+    shards = save_sharded_store(args.out, [d.page_content for d in docs], [d.metadata for d in docs],
+                                vectors, args.kind)
+    size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(args.out) for f in files)
+    print(f"✅ Local index saved to {args.out} ({size / 1e6:.2f} MB): "
+          + ", ".join(f"{name} ({n})" for name, n in shards.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(build())
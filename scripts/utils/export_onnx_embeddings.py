@@ -0,0 +1,45 @@
+import os
+import sys
+import shutil
+
+# Add root to sys.path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BASE_DIR)
+
+from huggingface_hub import hf_hub_download
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+from src.config import EMBED_MODEL_NAME, EMBED_ONNX_DIR, EMBED_ONNX_FILE
+
+
+def export():
+    """
+    Builds models/bge-small-en-v1.5-onnx/ for EMBEDDING_PROVIDER=onnx:
+    downloads the fp32 ONNX graph + tokenizer and quantizes weights to int8.
+    """
+    print(f"🚀 Exporting {EMBED_MODEL_NAME} -> {EMBED_ONNX_DIR}")
+    os.makedirs(EMBED_ONNX_DIR, exist_ok=True)
+
+    print("⏳ Downloading ONNX graph and tokenizer...")
+    fp32_path = hf_hub_download(EMBED_MODEL_NAME, "onnx/model.onnx")
+    tokenizer_path = hf_hub_download(EMBED_MODEL_NAME, "tokenizer.json")
+    shutil.copy(tokenizer_path, os.path.join(EMBED_ONNX_DIR, "tokenizer.json"))
+    shutil.copy(fp32_path, os.path.join(EMBED_ONNX_DIR, "model.onnx"))
+
+    print("⚗️ Quantizing weights to int8 (dynamic quantization)...")
+    int8_path = os.path.join(EMBED_ONNX_DIR, EMBED_ONNX_FILE)
+    quantize_dynamic(
+        model_input=fp32_path,
+        model_output=int8_path,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+    fp32_mb = os.path.getsize(fp32_path) / 1e6
+    int8_mb = os.path.getsize(int8_path) / 1e6
+    print(f"✅ Done: model.onnx {fp32_mb:.1f} MB -> {EMBED_ONNX_FILE} {int8_mb:.1f} MB")
+    print("💡 Set EMBEDDING_PROVIDER=onnx and check parity: python tests/verify_onnx_embeddings.py")
+
+
+if __name__ == "__main__":
+    export()
@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Add root to sys.path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BASE_DIR)
+
+from src.config import USER_DB_PATH, USER_CACHE_SIZE
+from src.student_store import StudentStore, import_json_tree
+
+
+def main():
+    """
+    (Re)imports data/users/<id>/*.json into the SQLite student store.
+    Safe to re-run: documents are upserted by (student_id, kind).
+    """
+    users_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, "data", "users")
+    print(f"🚀 Importing {users_dir} -> {USER_DB_PATH}")
+    store = StudentStore(USER_DB_PATH, cache_size=USER_CACHE_SIZE)
+    count = import_json_tree(store, users_dir)
+    print(f"✅ {count} document(s) imported. Store now holds {store.count()} document(s).")
+
+
+if __name__ == "__main__":
+    main()
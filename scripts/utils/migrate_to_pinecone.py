@@ -1,7 +1,12 @@
-
 import os
 import sys
+import json
 import time
+import random
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add root to sys.path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,79 +15,253 @@ sys.path.append(BASE_DIR)
 from dotenv import load_dotenv
 load_dotenv(os.path.join(BASE_DIR, ".env"))
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone, ServerlessSpec
-
 from src.config import (
-    DB_PATH, EMBED_MODEL_NAME, PINECONE_API_KEY, PINECONE_INDEX_NAME
+    DB_PATH, PINECONE_API_KEY, PINECONE_INDEX_NAME, PINECONE_NAMESPACE,
+    PINECONE_BATCH_SIZE, PINECONE_UPSERT_WORKERS, PINECONE_MAX_RETRIES,
+    PINECONE_RETRY_BACKOFF, PINECONE_SYNC_MANIFEST
 )
+from src.chunk_store import chunk_id  # same IDs as the local chunk store
 
-def migrate():
-    print("🚀 Starting Migration: FAISS -> Pinecone")
-    
-    if not PINECONE_API_KEY:
-        print("❌ Error: PINECONE_API_KEY not found in env.")
-        return
-
-    # 1. Load Embeddings (CPU)
-    print(f"⏳ Loading Embeddings Model ({EMBED_MODEL_NAME})...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBED_MODEL_NAME,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
-
-    # 2. Load FAISS (Source)
-    if not os.path.exists(DB_PATH):
-        print(f"❌ Error: FAISS index not found at {DB_PATH}")
-        return
-        
-    print(f"⏳ Loading Source FAISS Index from {DB_PATH}...")
-    try:
-        faiss_db = FAISS.load_local(DB_PATH, embeddings, allow_dangerous_deserialization=True)
-        # Extract docs - FAISS doesn't have a direct 'get_all_docs' easily, 
-        # but we can rely on the docstore if it's in memory.
-        # Hack: Access the docstore directly
-        docs = list(faiss_db.docstore._dict.values())
-        print(f"✅ Loaded {len(docs)} documents from FAISS.")
-    except Exception as e:
-        print(f"❌ Fail to load FAISS: {e}")
-        return
-
-    # 3. Init Pinecone (Destination)
-    print(f"⏳ Connecting to Pinecone Index '{PINECONE_INDEX_NAME}'...")
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    
-    # Check if index exists, create if not (Serverless)
-    existing_indexes = [i.name for i in pc.list_indexes()]
-    if PINECONE_INDEX_NAME not in existing_indexes:
-        print(f"⚠️ Index '{PINECONE_INDEX_NAME}' not found. Creating it...")
+TEXT_KEY = "text"  # langchain_pinecone reads page_content from this metadata field
+DELETE_BATCH_SIZE = 1000
+
+
+# --- SOURCE (FAISS) ---
+def _clean_metadata(metadata: dict) -> dict:
+    """Pinecone metadata values must be strings, numbers, booleans or lists of strings."""
+    out = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, (str, bool, int, float)):
+            out[key] = value
+        elif isinstance(value, (list, tuple)):
+            out[key] = [str(v) for v in value]
+        else:
+            out[key] = str(value)
+    return out
+
+
+def make_record(text: str, metadata: dict, values) -> dict:
+    """One Pinecone vector; "hash" covers text, metadata and the vector so any change is re-sent."""
+    metadata = _clean_metadata(dict(metadata, **{TEXT_KEY: text}))
+    values = [float(v) for v in values]
+    digest = hashlib.sha1(json.dumps([metadata, values], sort_keys=True).encode("utf-8")).hexdigest()
+    return {"id": chunk_id(text, metadata), "values": values, "metadata": metadata, "hash": digest}
+
+
+def load_faiss_records(db_path: str = DB_PATH) -> list:
+    """Reads chunks and their stored vectors from the FAISS index (no re-embedding)."""
+    from langchain_community.vectorstores import FAISS
+
+    # Embeddings are only needed to embed queries, not to read stored vectors
+    faiss_db = FAISS.load_local(db_path, None, allow_dangerous_deserialization=True)
+    vectors = faiss_db.index.reconstruct_n(0, faiss_db.index.ntotal)
+    records = {}
+    for position, doc_id in faiss_db.index_to_docstore_id.items():
+        doc = faiss_db.docstore.search(doc_id)
+        record = make_record(doc.page_content, doc.metadata, vectors[position])
+        records[record["id"]] = record
+    return list(records.values())
+
+
+# --- CHECKPOINT ---
+class Manifest:
+    """
+    What the destination index holds: {vector id: content hash}. Saved
+    (atomically) after every acknowledged batch, so an interrupted sync
+    resumes where it stopped and a later sync only sends what changed.
+    `reconciled` is set once a sync has completed: only then does the
+    manifest account for everything in the index (e.g. the random-UUID
+    vectors an earlier from_documents upload left behind).
+    """
+
+    def __init__(self, path: str, index_name: str, namespace: str):
+        self.path = path
+        self.key = {"index": index_name, "namespace": namespace}
+        self.vectors = {}
+        self.reconciled = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if {k: data.get(k) for k in self.key} == self.key:
+                self.vectors = data.get("vectors", {})
+                self.reconciled = data.get("reconciled", False)
+            else:
+                print(f"⚠️ Manifest {path} is for another index/namespace, starting fresh")
+
+    def update(self, sent: dict = None, deleted: list = None) -> None:
+        with self._lock:
+            self.vectors.update(sent or {})
+            for vid in deleted or ():
+                self.vectors.pop(vid, None)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dict(self.key, reconciled=self.reconciled, vectors=self.vectors), f)
+            os.replace(tmp, self.path)
+
+
+# --- SYNC ---
+def plan(records: list, known: dict) -> tuple:
+    """(records to upsert, ids to delete) against what the index is known to hold."""
+    current = {r["id"] for r in records}
+    upserts = [r for r in records if known.get(r["id"]) != r["hash"]]
+    deletes = [vid for vid in known if vid not in current]
+    return upserts, deletes
+
+
+def _with_retry(fn, what: str, retries: int, backoff: float):
+    for attempt in range(retries + 1):
         try:
-            pc.create_index(
-                name=PINECONE_INDEX_NAME,
-                dimension=384, # BGE-Small dimension
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
-            print("✅ Index created. Waiting for initialization...")
-            time.sleep(10)
+            return fn()
         except Exception as e:
-            print(f"❌ Failed to create index: {e}")
-            return
-
-    # 4. Upsert
-    print("⏳ Upserting documents to Pinecone (this may take a while)...")
-    try:
-        PineconeVectorStore.from_documents(
-            docs, 
-            embeddings, 
-            index_name=PINECONE_INDEX_NAME
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())  # jitter: workers don't retry in lockstep
+            print(f"⚠️ {what} failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def sync(index, records: list, manifest: Manifest, namespace: str = PINECONE_NAMESPACE,
+         batch_size: int = PINECONE_BATCH_SIZE, workers: int = PINECONE_UPSERT_WORKERS,
+         retries: int = PINECONE_MAX_RETRIES, backoff: float = PINECONE_RETRY_BACKOFF,
+         known: dict = None, dry_run: bool = False) -> dict:
+    """
+    Upserts new/changed vectors in parallel batches, then deletes vectors
+    whose chunk no longer exists. `index` is a pinecone Index (or anything
+    with the same upsert/delete/list methods). `known` overrides the manifest
+    as the picture of what the index holds (--full). Until the manifest is
+    reconciled (first run, lost manifest, interrupted first run) the picture
+    is the remote ID list, so vectors the manifest doesn't know get deleted.
+    """
+    if known is None and not manifest.reconciled:
+        if index is None:
+            print("⚠️ Manifest doesn't cover this index yet and there is no connection: deletes not planned")
+        else:
+            print("🧭 Manifest doesn't cover this index yet: reconciling with the remote ID list")
+            known = {vid: manifest.vectors.get(vid) for vid in list_remote_ids(index, namespace)}
+            manifest.vectors = {vid: h for vid, h in known.items() if h is not None}
+    upserts, deletes = plan(records, manifest.vectors if known is None else known)
+    stats = {"total": len(records), "upserted": 0, "deleted": 0, "unchanged": len(records) - len(upserts),
+             "failed_batches": 0}
+    print(f"📋 {len(records)} chunks: {len(upserts)} to upsert, {len(deletes)} to delete, "
+          f"{stats['unchanged']} unchanged")
+    if dry_run:
+        return stats
+
+    batches = [upserts[i:i + batch_size] for i in range(0, len(upserts), batch_size)]
+    start = time.time()
+
+    def send(batch):
+        vectors = [{"id": r["id"], "values": r["values"], "metadata": r["metadata"]} for r in batch]
+        _with_retry(lambda: index.upsert(vectors=vectors, namespace=namespace),
+                    f"Upsert of {len(batch)} vectors", retries, backoff)
+        manifest.update(sent={r["id"]: r["hash"] for r in batch})
+        return len(batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(send, b) for b in batches]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            try:
+                stats["upserted"] += future.result()
+            except Exception as e:
+                stats["failed_batches"] += 1
+                print(f"❌ Batch failed after {retries} retries: {e}")
+                # Likely an outage: stop queueing batches, the next run resumes from the manifest
+                for pending in futures:
+                    pending.cancel()
+                continue
+            done = stats["upserted"]
+            if done % (batch_size * 10) == 0:
+                print(f"  ⏳ {done}/{len(upserts)} vectors ({done / (time.time() - start):.0f}/s)")
+
+    # Stale vectors only go once everything new is in, so search never loses a chunk mid-sync
+    if stats["failed_batches"] == 0:
+        for i in range(0, len(deletes), DELETE_BATCH_SIZE):
+            ids = deletes[i:i + DELETE_BATCH_SIZE]
+            _with_retry(lambda: index.delete(ids=ids, namespace=namespace),
+                        f"Delete of {len(ids)} vectors", retries, backoff)
+            manifest.update(deleted=ids)
+            stats["deleted"] += len(ids)
+        manifest.reconciled = True
+        manifest.update()
+
+    stats["seconds"] = round(time.time() - start, 2)
+    return stats
+
+
+def list_remote_ids(index, namespace: str) -> set:
+    """All vector IDs in the namespace (serverless indexes support list())."""
+    ids = set()
+    for page in index.list(namespace=namespace):
+        ids.update(page)
+    return ids
+
+
+def connect(index_name: str, dimension: int):
+    from pinecone import Pinecone, ServerlessSpec
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    existing_indexes = [i.name for i in pc.list_indexes()]
+    if index_name not in existing_indexes:
+        print(f"⚠️ Index '{index_name}' not found. Creating it...")
+        pc.create_index(
+            name=index_name,
+            dimension=dimension,  # 384 for bge-small
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
-        print("✅ Migration Complete! Documents are now in the cloud. ☁️")
-    except Exception as e:
-        print(f"❌ Upload Failed: {e}")
+        while not pc.describe_index(index_name).status["ready"]:
+            time.sleep(1)
+        print("✅ Index created.")
+    return pc.Index(index_name)
+
+
+def migrate():
+    parser = argparse.ArgumentParser(description="Sync the FAISS index into Pinecone (resumable, only changed vectors).")
+    parser.add_argument("--db", default=DB_PATH, help="FAISS index folder")
+    parser.add_argument("--index", default=PINECONE_INDEX_NAME)
+    parser.add_argument("--namespace", default=PINECONE_NAMESPACE)
+    parser.add_argument("--manifest", default=PINECONE_SYNC_MANIFEST)
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest: resend everything and delete remote IDs not in FAISS")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be sent")
+    args = parser.parse_args()
+
+    print("🚀 Starting Sync: FAISS -> Pinecone")
+    if not PINECONE_API_KEY and not args.dry_run:
+        print("❌ Error: PINECONE_API_KEY not found in env.")
+        return 1
+    if not os.path.exists(args.db):
+        print(f"❌ Error: FAISS index not found at {args.db}")
+        return 1
+
+    print(f"⏳ Loading vectors from {args.db}...")
+    records = load_faiss_records(args.db)
+    if not records:
+        print("⚠️ FAISS index is empty, nothing to sync.")
+        return 0
+    print(f"✅ Loaded {len(records)} chunks ({len(records[0]['values'])}-dim vectors, no re-embedding)")
+
+    manifest = Manifest(args.manifest, args.index, args.namespace)
+    index, known = None, None
+    if not args.dry_run:
+        print(f"⏳ Connecting to Pinecone Index '{args.index}'...")
+        index = connect(args.index, len(records[0]["values"]))
+    if args.full:
+        manifest.vectors = {}  # rebuilt from what this run sends
+        known = {vid: None for vid in list_remote_ids(index, args.namespace)} if index else {}
+
+    stats = sync(index, records, manifest, namespace=args.namespace, known=known, dry_run=args.dry_run)
+    if stats["failed_batches"]:
+        print(f"❌ {stats['failed_batches']} batch(es) failed. Progress is saved; re-run to resume.")
+        return 1
+    print(f"✅ Sync complete: {stats}")
+    return 0
+
 
 if __name__ == "__main__":
-    migrate()
+    sys.exit(migrate())
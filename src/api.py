@@ -9,6 +9,7 @@ from fastapi.responses import StreamingResponse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from rag_pipeline import answer_question_stream
+from query_log import record as record_query
 
 app = FastAPI(title="LPU Bot Backend (MCP Architecture)")
 
@@ -35,6 +36,7 @@ def health_check():
 
 @app.post("/chat")
 async def chat_endpoint(req: ChatRequest):
+    record_query("/chat", req.query, req.student_id)
     return StreamingResponse(
         answer_question_stream(req.query, req.student_id), 
         media_type="text/plain"
@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Chunk texts and metadata on disk, read in place (no pickle, no per-chunk objects at load):
+#   chunks.json               header: count + column types and string dictionaries
+#   texts.bin, offsets.npy    UTF-8 texts back to back, (n + 1,) int64 byte offsets
+#   col.<name>.npy            one int32 array per metadata column (strings dictionary-coded)
+#   extra.bin, extra_offsets.npy   any other metadata (e.g. "sources"), one JSON object per chunk
+#   ids.npy                   stable chunk ID of each row
+#   ids_sorted.npy, id_rows.npy   the IDs sorted, and their rows (binary search by ID)
+# Everything but the header is memory-mapped; a chunk is decoded only when it is read.
+STR_COLUMNS = ("source", "doc_type", "section")
+INT_COLUMNS = ("page", "chunk_index", "tokens")
+MISSING = -1
+FORMAT_VERSION = 1
+
+
+def chunk_id(text: str, metadata: dict) -> str:
+    """
+    Stable chunk ID: the chunk's position (source, page, chunk_index) when the
+    chunker recorded it, so an edited chunk keeps its ID; otherwise the text
+    itself (indexes built before chunk metadata).
+    """
+    if "chunk_index" in metadata:
+        key = f"{metadata.get('source')}\x00{metadata.get('page', '')}\x00{metadata['chunk_index']}"
+    else:
+        key = f"{metadata.get('source')}\x00{text}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class Chunk:
+    """A chunk read from the store (same fields as a langchain Document)."""
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str, metadata: Dict[str, Any]):
+        self.page_content = page_content
+        self.metadata = metadata
+
+    def __repr__(self):
+        return f"Chunk({self.metadata.get('source')!r}, {self.page_content[:40]!r})"
+
+
+def _write_blob(path: str, name: str, offsets_name: str, parts: List[bytes]) -> None:
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in parts])
+    with open(os.path.join(path, name), "wb") as f:
+        f.write(b"".join(parts))
+    np.save(os.path.join(path, offsets_name), offsets)
+
+
+def write_chunk_store(path: str, texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+    """Writes the store into `path` (an existing directory; other files in it are left alone)."""
+    if len(texts) != len(metadatas):
+        raise ValueError(f"{len(texts)} texts but {len(metadatas)} metadata")
+    os.makedirs(path, exist_ok=True)
+    header = {"version": FORMAT_VERSION, "count": len(texts), "columns": {}}
+    extras = [dict(meta) for meta in metadatas]
+
+    for name in STR_COLUMNS:
+        values: Dict[str, int] = {}
+        codes = np.full(len(texts), MISSING, dtype=np.int32)
+        for i, extra in enumerate(extras):
+            if isinstance(extra.get(name), str):
+                codes[i] = values.setdefault(extra.pop(name), len(values))
+        np.save(os.path.join(path, f"col.{name}.npy"), codes)
+        header["columns"][name] = {"type": "str", "values": list(values)}
+
+    for name in INT_COLUMNS:
+        col = np.full(len(texts), MISSING, dtype=np.int32)
+        for i, extra in enumerate(extras):
+            value = extra.get(name)
+            # bools, floats, negatives and strings stay in the JSON extras so they round-trip exactly
+            if type(value) is int and 0 <= value < 2 ** 31:
+                col[i] = extra.pop(name)
+        np.save(os.path.join(path, f"col.{name}.npy"), col)
+        header["columns"][name] = {"type": "int"}
+
+    _write_blob(path, "texts.bin", "offsets.npy", [t.encode("utf-8") for t in texts])
+    _write_blob(path, "extra.bin", "extra_offsets.npy",
+                [json.dumps(e, ensure_ascii=False).encode("utf-8") if e else b"" for e in extras])
+
+    ids = np.array([chunk_id(t, m) for t, m in zip(texts, metadatas)], dtype="S40")
+    order = np.argsort(ids, kind="stable")
+    np.save(os.path.join(path, "ids.npy"), ids)
+    np.save(os.path.join(path, "ids_sorted.npy"), ids[order])
+    np.save(os.path.join(path, "id_rows.npy"), order.astype(np.int64))
+    with open(os.path.join(path, "chunks.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False)
+
+
+def _map(path: str, name: str) -> np.ndarray:
+    return np.load(os.path.join(path, name), mmap_mode="r")
+
+
+def _map_bytes(path: str, name: str) -> np.ndarray:
+    full = os.path.join(path, name)
+    # np.memmap cannot map an empty file
+    return np.memmap(full, dtype=np.uint8, mode="r") if os.path.getsize(full) else np.zeros(0, np.uint8)
+
+
+class ChunkStore:
+    """Read-only view of a chunk store directory; rows are chunk positions (= vector ids)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "chunks.json"), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported chunk store version {header.get('version')} in {path}")
+        self.count = header["count"]
+        self.types = {name: col["type"] for name, col in header["columns"].items()}
+        self.values = {name: col["values"] for name, col in header["columns"].items() if col["type"] == "str"}
+        self.codes = {name: {v: i for i, v in enumerate(vals)} for name, vals in self.values.items()}
+        self.columns = {name: _map(path, f"col.{name}.npy") for name in self.types}
+        self.offsets = _map(path, "offsets.npy")
+        self.texts = _map_bytes(path, "texts.bin")
+        self.extra_offsets = _map(path, "extra_offsets.npy")
+        self.extras = _map_bytes(path, "extra.bin")
+        self.ids = _map(path, "ids.npy")
+        self.ids_sorted = _map(path, "ids_sorted.npy")
+        self.id_rows = _map(path, "id_rows.npy")
+
+    def __len__(self):
+        return self.count
+
+    def text(self, row: int) -> str:
+        return bytes(self.texts[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        meta = {}
+        for name, col in self.columns.items():
+            code = int(col[row])
+            if code != MISSING:
+                meta[name] = self.values[name][code] if name in self.values else code
+        raw = bytes(self.extras[self.extra_offsets[row]:self.extra_offsets[row + 1]])
+        if raw:
+            meta.update(json.loads(raw))
+        return meta
+
+    def get(self, row: int) -> Chunk:
+        return Chunk(self.text(row), self.metadata(row))
+
+    def chunk_id(self, row: int) -> str:
+        return self.ids[row].decode("ascii")
+
+    def row(self, chunk_id: str) -> int:
+        """Row of a chunk ID (binary search over the mapped IDs), or -1."""
+        key = chunk_id.encode("ascii")
+        pos = int(np.searchsorted(self.ids_sorted, key))
+        if pos < self.count and self.ids_sorted[pos] == key:
+            return int(self.id_rows[pos])
+        return -1
+
+    def get_by_id(self, chunk_id: str):
+        row = self.row(chunk_id)
+        return self.get(row) if row >= 0 else None
+
+    def where(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata equals every key/value in `filter` (columns are compared vectorized)."""
+        mask = np.ones(self.count, dtype=bool)
+        for key, value in filter.items():
+            if key in self.values:
+                code = self.codes[key].get(value)
+                if code is None:
+                    return np.empty(0, dtype=np.int64)
+                mask &= self.columns[key] == code
+            elif key in self.columns and type(value) is int:
+                mask &= self.columns[key] == value
+            else:
+                mask &= np.array([self.metadata(i).get(key) == value for i in range(self.count)], dtype=bool)
+        return np.flatnonzero(mask)
+
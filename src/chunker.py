@@ -0,0 +1,262 @@
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from src.config import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, EMBED_ONNX_DIR
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# bge-small uses the bert-base-uncased WordPiece vocab, so the bundled
+# MiniLM reranker tokenizer gives identical counts when the ONNX export is absent
+_TOKENIZER_CANDIDATES = [
+    os.path.join(EMBED_ONNX_DIR, "tokenizer.json"),
+    os.path.join(BASE_DIR, "models", "ms-marco-MiniLM-L-12-v2", "tokenizer.json"),
+]
+
+_HEADING_RE = re.compile(
+    r"^(#{1,6}\s+.+"                                          # markdown
+    r"|\d+(?:\.\d+)+\.?\s+[A-Z][^.;]{0,60}"                    # 2.1 Numbered subsection
+    r"|\d+\.\s+[A-Z][\w&/,'’()-]*(?:\s+[\w&/,'’()-]+){0,6}"  # 2. Short Section Title
+    r"|(?:chapter|section|annexure|part)\s+[\dIVX]+\b.{0,60}"  # Chapter 3 ...
+    r")$",
+    re.IGNORECASE
+)
+_LIST_RE = re.compile(r"^\s*(?:[-•*▪●◦➢✓]|\(?(?:[a-z]|[ivx]{1,4}|\d{1,2})[.)]|\d+(?:\.\d+)+|Q\.?\s*\d+[.:)])\s+", re.IGNORECASE)
+_CELL_SPLIT_RE = re.compile(r"\s{2,}|\t|\s*\|\s*")
+_NUMBER_RE = re.compile(r"\b\d[\d\-/.,:]*\d\b|\b\d\b")
+_FILL_RE = re.compile(r"([._…_\-])\1{3,}|(?:…\.*){2,}")  # form blanks: "......", "____"
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+# --- TOKEN COUNTING ---
+class TokenCounter:
+    """Counts embedding-model tokens; falls back to ~4 chars/token without a tokenizer."""
+
+    def __init__(self, tokenizer_path: Optional[str] = None):
+        self.tokenizer = None
+        self.source = "heuristic"
+        for path in [tokenizer_path] if tokenizer_path else _TOKENIZER_CANDIDATES:
+            if path and os.path.exists(path):
+                try:
+                    from tokenizers import Tokenizer
+                    self.tokenizer = Tokenizer.from_file(path)
+                    self.tokenizer.no_truncation()
+                    self.tokenizer.no_padding()
+                    self.source = path
+                    break
+                except Exception as e:
+                    print(f"⚠️ Chunker: Could not load tokenizer {path}: {e}", file=sys.stderr)
+        # Blocks repeat a lot (headers, footers, table labels): count each once
+        self.count = lru_cache(maxsize=65536)(self._count)
+
+    def _count(self, text: str) -> int:
+        if self.tokenizer is None:
+            return max(1, len(text) // 4)
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+_COUNTER = None
+
+def get_token_counter() -> TokenCounter:
+    global _COUNTER
+    if _COUNTER is None:
+        _COUNTER = TokenCounter()
+    return _COUNTER
+
+
+# --- STRUCTURE ---
+def _line_kind(line: str) -> str:
+    stripped = line.strip()
+    words = stripped.split()
+    if len(stripped) <= 80 and (
+        _HEADING_RE.match(stripped)
+        or (stripped.isupper() and len(words) <= 10 and re.search(r"[A-Z]{3}", stripped)
+            and not _NUMBER_RE.search(stripped))
+        or (stripped.endswith(":") and stripped[0].isupper() and len(words) <= 8)
+    ):
+        return "heading"
+    if _LIST_RE.match(line):
+        return "list"
+    cells = [c for c in _CELL_SPLIT_RE.split(stripped) if c]
+    if (len(cells) >= 3 or (len(cells) == 2 and max(map(len, cells)) <= 40)
+            or (len(_NUMBER_RE.findall(stripped)) >= 2 and len(words) <= 8)
+            or (len(words) <= 4 and not stripped.endswith((".", ",")))):
+        return "row"  # table row, or one cell of a table extracted cell-per-line
+    return "text"
+
+
+def _continues(line: str, current: Dict[str, str]) -> bool:
+    """Wrapped line of the current paragraph / list item (PDF text breaks mid-sentence)."""
+    if current["kind"] in ("text", "list"):
+        return _line_kind(line) == "text" or line.lstrip()[:1].islower()
+    return current["kind"] == "row" and line.lstrip()[:1].islower() and not current["text"].endswith((".", ":"))
+
+
+def split_blocks(text: str) -> List[Dict[str, str]]:
+    """
+    Splits extracted text into structural blocks: headings, table rows, list
+    items (with their wrapped lines) and paragraphs. Chunk boundaries only fall
+    between blocks, so rows and list items are never cut in half.
+    """
+    blocks: List[Dict[str, str]] = []
+    current = None
+
+    def flush():
+        nonlocal current
+        if current and current["text"].strip():
+            blocks.append(current)
+        current = None
+
+    for raw in text.splitlines():
+        line = _FILL_RE.sub("___", raw).rstrip()
+        if not line.strip():
+            flush()
+            continue
+        if current and _continues(line, current):
+            current["text"] += " " + line.strip()
+            if current["kind"] == "row":
+                current["kind"] = "text"  # a wrapped sentence, not a table row
+            continue
+        flush()
+        current = {"kind": _line_kind(line), "text": line.strip()}
+    flush()
+    return blocks
+
+
+def _split_long(text: str, max_tokens: int, overlap_tokens: int, counter: TokenCounter) -> List[str]:
+    """Splits one oversized block by sentences (then words), with a small overlap."""
+    units = []
+    for sentence in _SENTENCE_RE.split(text):
+        # A run-on "sentence" (tables flattened into one line) falls back to words
+        units.extend(sentence.split() if counter.count(sentence) > max_tokens else [sentence])
+    pieces, current, tokens = [], [], 0
+    for unit in units:
+        unit_tokens = counter.count(unit)
+        if current and tokens + unit_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            # Carry trailing units as overlap for the next piece
+            carry, carry_tokens = [], 0
+            for prev in reversed(current):
+                prev_tokens = counter.count(prev)
+                if carry_tokens + prev_tokens > overlap_tokens:
+                    break
+                carry.insert(0, prev)
+                carry_tokens += prev_tokens
+            current, tokens = carry, carry_tokens
+        current.append(unit)
+        tokens += unit_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+# --- PACKING ---
+def chunk_text(text: str, max_tokens: int = CHUNK_MAX_TOKENS, min_tokens: int = CHUNK_MIN_TOKENS,
+               overlap_tokens: int = CHUNK_OVERLAP_TOKENS, counter: TokenCounter = None,
+               section: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Packs structural blocks into chunks of at most `max_tokens` model tokens.
+    - A heading starts a new chunk (once the current one has `min_tokens`).
+    - Chunks continuing a section repeat its heading; chunks continuing a
+      table also repeat the table's first row, so every row keeps its labels.
+    - Only blocks longer than `max_tokens` are split internally (with overlap).
+    `section` is the heading in force where the text starts (previous page).
+    Returns [{"text", "tokens", "section"}].
+    """
+    counter = counter or get_token_counter()
+    chunks: List[Dict[str, Any]] = []
+    parts: List[str] = [section] if section else []
+    tokens = counter.count(section) if section else 0
+    table_header = None
+    prev_kind, prev_body = None, ""
+
+    def flush():
+        nonlocal parts, tokens
+        body = "\n".join(parts).strip()
+        if body:
+            chunks.append({"text": body, "tokens": counter.count(body), "section": section})
+        parts, tokens = [], 0
+
+    def context_prefix() -> List[str]:
+        prefix = [section] if section else []
+        if table_header:  # only set while inside a run of rows
+            prefix.append(table_header)
+        return prefix
+
+    for block in split_blocks(text):
+        kind, body = block["kind"], block["text"]
+        body_tokens = counter.count(body)
+
+        if kind == "heading":
+            if tokens >= min_tokens:
+                flush()
+            section = body
+            table_header = None
+            parts.append(body)
+            tokens += body_tokens
+            prev_kind, prev_body = kind, body
+            continue
+
+        if kind == "row" and prev_kind != "row":
+            # Header: a first row of labels, else a short caption line right above the rows
+            if len(body.split()) >= 2 and not _NUMBER_RE.search(body):
+                table_header = body
+            elif prev_kind == "text" and len(prev_body.split()) <= 16 and not prev_body.endswith("."):
+                table_header = prev_body
+            else:
+                table_header = None
+        elif kind != "row":
+            table_header = None
+
+        if body_tokens > max_tokens:
+            if parts != [section]:
+                flush()
+            for piece in _split_long(body, max_tokens - counter.count(section or ""), overlap_tokens, counter):
+                parts = ([section] if section else []) + [piece]
+                tokens = max_tokens
+                flush()
+            prev_kind, prev_body = kind, body
+            continue
+
+        if tokens + body_tokens > max_tokens:
+            flush()
+            parts = context_prefix() if body != table_header else ([section] if section else [])
+            tokens = sum(counter.count(p) for p in parts)
+            if tokens + body_tokens > max_tokens:
+                parts, tokens = [], 0  # the block alone fits, its context does not
+        parts.append(body)
+        tokens += body_tokens
+        prev_kind, prev_body = kind, body
+
+    # A trailing heading alone is not worth a chunk; it carries to the next page instead
+    if parts != [section] or (not chunks and text.strip() == section):
+        flush()
+    return chunks
+
+
+def chunk_documents(docs: List[Any], max_tokens: int = CHUNK_MAX_TOKENS,
+                    min_tokens: int = CHUNK_MIN_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[Any]:
+    """
+    Splits LangChain-style documents (page_content + metadata) with chunk_text.
+    Each chunk keeps its document's metadata plus "tokens", "section" and "chunk_index".
+    Loaders return one document per PDF page, so the section heading carries
+    over to the next page of the same source.
+    """
+    counter = get_token_counter()
+    out = []
+    prev_source, section = None, None
+    for doc in docs:
+        source = doc.metadata.get("source")
+        if source != prev_source:
+            prev_source, section = source, None
+        chunks = chunk_text(doc.page_content, max_tokens, min_tokens, overlap_tokens, counter, section)
+        if chunks:
+            section = chunks[-1]["section"]
+        for i, chunk in enumerate(chunks):
+            metadata = dict(doc.metadata, tokens=chunk["tokens"], chunk_index=i)
+            if chunk["section"]:
+                metadata["section"] = chunk["section"]
+            out.append(type(doc)(page_content=chunk["text"], metadata=metadata))
+    return out
@@ -10,9 +10,43 @@ DB_DIR = os.path.join(BASE_DIR, "db")
 DB_PATH = os.path.join(DB_DIR, "faiss_index")
 CACHE_DIR = os.path.join(BASE_DIR, "models")
 
+# Student data (profiles, timetables, academic records)
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "sqlite").lower()  # sqlite | json
+USER_DB_PATH = os.getenv("USER_DB_PATH", os.path.join(BASE_DIR, "data", "users.db"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))  # cached documents per process
+
 # --- MODELS ---
 # Local Embedding (CPU)
 EMBED_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+EMBED_MAX_TOKENS = 512
+
+# Quantized ONNX build of the same model (EMBEDDING_PROVIDER=onnx)
+# Created by scripts/utils/export_onnx_embeddings.py
+EMBED_ONNX_DIR = os.path.join(CACHE_DIR, "bge-small-en-v1.5-onnx")
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "model_int8.onnx")
+EMBED_ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "1"))
+EMBED_ONNX_BATCH_SIZE = int(os.getenv("EMBED_ONNX_BATCH_SIZE", "32"))
+
+# Structure-aware chunking (src/chunker.py), sizes in embedding-model tokens
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "160"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "32"))  # smaller sections merge into the next
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))  # only when one block is oversized
+
+# Near-duplicate chunk removal at ingest (src/dedup.py, MinHash + LSH)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))  # estimated Jaccard of word 3-grams
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))  # 32 bands x 4 rows: pairs above ~0.5 become candidates
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "8"))  # shorter lines (headings, rows) are never removed
+
+# Local vector store (src/local_store.py, src/vector_index.py), built by ingest next to the FAISS index
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()  # pinecone | local
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(DB_DIR, "local_index"))
+LOCAL_INDEX_KIND = os.getenv("LOCAL_INDEX_KIND", "int8").lower()  # flat | int8 | ivfpq
+LOCAL_INDEX_NLIST = int(os.getenv("LOCAL_INDEX_NLIST", "0"))  # ivfpq cells; 0 = 4 * sqrt(vectors)
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))  # ivfpq cells scanned per query
+LOCAL_INDEX_PQ_M = int(os.getenv("LOCAL_INDEX_PQ_M", "48"))  # ivfpq bytes per vector (must divide the dim)
+LOCAL_INDEX_RESCORE = int(os.getenv("LOCAL_INDEX_RESCORE", "8"))  # shortlist = k * this, re-scored in float
+LOCAL_SHARD_WORKERS = int(os.getenv("LOCAL_SHARD_WORKERS", "0"))  # threads for unfiltered fan-out; 0 = one per shard, up to the CPU count
 
 # Reranker
 RERANK_MODEL_NAME = "ms-marco-MiniLM-L-12-v2"
@@ -20,12 +54,24 @@ RERANK_MODEL_NAME = "ms-marco-MiniLM-L-12-v2"
 # LLMs
 LOCAL_LLM_MODEL = "llama3.1:8b"  # Q4 quantized, optimized for T4 GPU
 CLOUD_LLM_MODEL = "llama-3.1-8b-instant" # Groq
+# Ollama servers: OLLAMA_BASE_URLS="http://a:11434,http://b:11434" spreads sessions over several,
+# each session (student) pinned to one so its prompt prefix stays in that server's KV cache
+OLLAMA_BASE_URLS = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS", os.getenv("OLLAMA_BASE_URL", "")).split(",") if u.strip()]
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))  # agent prompt + history must fit, or Ollama truncates the prefix
 
 # --- API KEYS ---
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "uni-bot-index")
 
+# FAISS -> Pinecone sync (scripts/utils/migrate_to_pinecone.py)
+PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE", "")  # "" = default namespace (what the app queries)
+PINECONE_BATCH_SIZE = int(os.getenv("PINECONE_BATCH_SIZE", "100"))  # vectors per upsert request
+PINECONE_UPSERT_WORKERS = int(os.getenv("PINECONE_UPSERT_WORKERS", "4"))  # parallel upsert requests
+PINECONE_MAX_RETRIES = int(os.getenv("PINECONE_MAX_RETRIES", "5"))
+PINECONE_RETRY_BACKOFF = float(os.getenv("PINECONE_RETRY_BACKOFF", "1"))  # seconds, doubled per retry (+ jitter)
+PINECONE_SYNC_MANIFEST = os.getenv("PINECONE_SYNC_MANIFEST", os.path.join(DB_DIR, "pinecone_sync.json"))
+
 # Embedding configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface")
@@ -33,10 +79,63 @@ EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface")
 # Memory optimization for Render free tier (512MB limit)
 SKIP_RERANKER = os.getenv("SKIP_RERANKER", "false").lower() == "true"
 USE_MCP = os.getenv("USE_MCP", "true").lower() == "true"
+# With USE_MCP, answer single-tool questions directly and only send multi-step ones to the agent.
+# Document questions search through the shared MCP server (MCP_CLIENT_TRANSPORT=http/sse); with
+# stdio they retrieve in this worker, which then also loads the embedding/reranker models.
+QUERY_ROUTER = os.getenv("QUERY_ROUTER", "true").lower() == "true"
 
 
 
 # --- SETTINGS ---
 MAX_CONTEXT_CHARS = 1200
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "320"))  # packing budget for token-counted chunks
 RETRIEVAL_K = 3
 RERANK_THRESHOLD = 0.25
+
+# --- STREAMING (SSE) ---
+# Tokens are coalesced into one frame until either budget is hit
+SSE_FLUSH_INTERVAL = float(os.getenv("SSE_FLUSH_INTERVAL", "0.05"))  # seconds
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", "256"))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))  # seconds
+
+# --- QUERY LOG ---
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "")  # JSON lines of incoming questions, replayed by tests/load_replay.py
+
+# --- WARMUP ---
+# "background": load models in a thread shortly after startup; "lazy": load on first request
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background").lower()
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "1"))  # seconds after startup
+WARMUP_WAIT_TIMEOUT = float(os.getenv("WARMUP_WAIT_TIMEOUT", "20"))  # max seconds a request queues behind warmup
+
+# --- TIMETABLE ---
+TIMETABLE_TZ = os.getenv("TIMETABLE_TZ", "Asia/Kolkata")  # "today" / "next class" are campus-local
+TIMETABLE_DAY_START = 9 * 60   # minutes since midnight, for free-slot answers
+TIMETABLE_DAY_END = 18 * 60
+
+# --- TIMETABLE UPLOAD JOBS ---
+TIMETABLE_JOB_WORKERS = int(os.getenv("TIMETABLE_JOB_WORKERS", "2"))        # concurrent extractions
+TIMETABLE_JOB_QUEUE_SIZE = int(os.getenv("TIMETABLE_JOB_QUEUE_SIZE", "32"))  # backlog before 429
+TIMETABLE_JOB_RETRIES = int(os.getenv("TIMETABLE_JOB_RETRIES", "2"))         # retries after the first attempt
+TIMETABLE_JOB_BACKOFF = float(os.getenv("TIMETABLE_JOB_BACKOFF", "2"))       # seconds, doubled per retry
+TIMETABLE_UPLOAD_MAX_BYTES = int(os.getenv("TIMETABLE_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # larger -> 413
+TIMETABLE_CACHE_DIR = os.getenv("TIMETABLE_CACHE_DIR", "./data/timetable_cache")  # extractions by PDF hash
+TIMETABLE_LOCAL_PARSER = os.getenv("TIMETABLE_LOCAL_PARSER", "true").lower() == "true"  # pypdf grid parser before Gemini
+TIMETABLE_PARSE_MIN_CONFIDENCE = float(os.getenv("TIMETABLE_PARSE_MIN_CONFIDENCE", "0.9"))  # below this, ask Gemini
+
+# --- MCP ---
+MCP_BATCH_MAX_CALLS = int(os.getenv("MCP_BATCH_MAX_CALLS", "8"))  # calls per batch_tools request
+MCP_MAX_INFLIGHT = int(os.getenv("MCP_MAX_INFLIGHT", "8"))        # pipelined call_tool requests per session
+# Server: "stdio" (child of each client) or "streamable-http" / "sse" (one shared service per host)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio").lower()
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8765"))
+# Client: "stdio" spawns mcp_server.py per connection; "http" / "sse" connect to MCP_SERVER_URL
+MCP_CLIENT_TRANSPORT = os.getenv("MCP_CLIENT_TRANSPORT", "stdio").lower()
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", f"http://127.0.0.1:{MCP_PORT}/mcp")
+MCP_TOOL_CACHE_SIZE = int(os.getenv("MCP_TOOL_CACHE_SIZE", "4096"))     # cached tool results (LRU)
+MCP_SEARCH_CACHE_TTL = float(os.getenv("MCP_SEARCH_CACHE_TTL", "600"))  # seconds; docs change only on ingest
+
+# --- AGENT ---
+# Start search_documents(user question) while the LLM is still planning its first action
+AGENT_SPECULATIVE_SEARCH = os.getenv("AGENT_SPECULATIVE_SEARCH", "true").lower() == "true"
+AGENT_SPECULATIVE_MATCH = float(os.getenv("AGENT_SPECULATIVE_MATCH", "0.5"))  # min word overlap to reuse the result
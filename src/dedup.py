@@ -0,0 +1,180 @@
+import re
+import zlib
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.chunker import get_token_counter
+from src.config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_MIN_WORDS
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-grams of the normalised text (whitespace / case / punctuation insensitive)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with LSH banding to find near-duplicate candidates."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(text)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # crc32 is stable across processes (str hash() is salted)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE & _MAX_HASH
+        return permuted.min(axis=1)
+
+    def band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [bytes([band]) + sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def candidate_pairs(self, signatures: List[np.ndarray]) -> set:
+        pairs = set()
+        for band in range(self.bands):
+            buckets: Dict[bytes, List[int]] = {}
+            lo = band * self.rows
+            for i, sig in enumerate(signatures):
+                buckets.setdefault(sig[lo:lo + self.rows].tobytes(), []).append(i)
+            for members in buckets.values():
+                for j in range(1, len(members)):
+                    for i in members[:j]:
+                        pairs.add((i, members[j]))
+        return pairs
+
+
+def _similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def find_clusters(texts: List[str], threshold: float = DEDUP_THRESHOLD,
+                  hasher: MinHasher = None) -> List[List[int]]:
+    """Groups of indexes whose estimated Jaccard similarity is >= threshold (size >= 2)."""
+    hasher = hasher or MinHasher()
+    signatures = [hasher.signature(t) for t in texts]
+    parent = list(range(len(texts)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in hasher.candidate_pairs(signatures):
+        if _similarity(signatures[i], signatures[j]) >= threshold:
+            parent[root(j)] = root(i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(root(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def _add_source(meta: Dict[str, Any], source: str) -> None:
+    sources = set(meta.get("sources") or [meta.get("source", "")]) | {source}
+    meta["sources"] = sorted(sources - {""})
+
+
+def dedup_passages(chunks: List[Any], threshold: float = DEDUP_THRESHOLD, min_words: int = DEDUP_MIN_WORDS,
+                   hasher: MinHasher = None) -> Tuple[List[Any], int]:
+    """
+    Removes passages (chunk lines: paragraphs, list items, rows) that already
+    appear in an earlier chunk from another source. Catches revised copies of a
+    document, whose chunks differ because the surrounding text changed.
+    The earlier chunk is credited with the later source; chunks left with no
+    passage of their own are dropped. Returns (chunks, passages removed).
+    """
+    hasher = hasher or MinHasher()
+    counter = get_token_counter()
+    buckets: Dict[bytes, List[Tuple[int, str, np.ndarray]]] = {}
+    kept, removed = [], 0
+
+    for chunk in chunks:
+        source = str(chunk.metadata.get("source", ""))
+        lines = chunk.page_content.split("\n")
+        keep, own, duplicate_of = [], 0, []
+        for line in lines:
+            if len(line.split()) < min_words:
+                keep.append(line)  # headings, short rows and labels give context, not content
+                continue
+            sig = hasher.signature(line)
+            keys = hasher.band_keys(sig)
+            match = None
+            for key in keys:
+                for owner, owner_source, other in buckets.get(key, ()):
+                    if owner_source != source and _similarity(sig, other) >= threshold:
+                        match = owner
+                        break
+                if match is not None:
+                    break
+            if match is not None:
+                duplicate_of.append(match)
+                removed += 1
+                continue
+            keep.append(line)
+            own += 1
+            for key in keys:
+                buckets.setdefault(key, []).append((len(kept), source, sig))
+
+        for owner in duplicate_of:
+            _add_source(kept[owner].metadata, source)
+        if not duplicate_of:
+            kept.append(chunk)
+        elif own:
+            chunk.page_content = "\n".join(keep)
+            if "tokens" in chunk.metadata:
+                chunk.metadata["tokens"] = counter.count(chunk.page_content)
+            kept.append(chunk)
+    return kept, removed
+
+
+def dedup_chunks(chunks: List[Any], threshold: float = DEDUP_THRESHOLD) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Drops near-duplicate chunks (same passage in several files / copies of a file),
+    then near-duplicate passages inside the remaining chunks (dedup_passages).
+    The canonical chunk of each group is the longest one; it keeps its own
+    "source" and gets "sources" (every file the passage appears in) and
+    "duplicates" (how many copies were dropped), so citations stay complete.
+    Returns (chunks, stats); the input documents are not modified.
+    """
+    chunks = [type(c)(page_content=c.page_content, metadata=dict(c.metadata)) for c in chunks]
+    size_in = sum(len(c.page_content.encode("utf-8")) for c in chunks)
+    clusters = find_clusters([c.page_content for c in chunks], threshold)
+    dropped = set()
+    for group in clusters:
+        def rank(i):
+            meta = chunks[i].metadata
+            return (-meta.get("tokens", len(chunks[i].page_content)), str(meta.get("source", "")), i)
+        canonical, *rest = sorted(group, key=rank)
+        for i in group:
+            _add_source(chunks[canonical].metadata, str(chunks[i].metadata.get("source", "")))
+        chunks[canonical].metadata["duplicates"] = len(rest)
+        dropped.update(rest)
+
+    kept = [c for i, c in enumerate(chunks) if i not in dropped]
+    kept, passages = dedup_passages(kept, threshold)
+    stats = {
+        "chunks_in": len(chunks),
+        "chunks_out": len(kept),
+        "clusters": len(clusters),
+        "dropped": len(chunks) - len(kept),
+        "passages": passages,
+        "bytes_saved": size_in - sum(len(c.page_content.encode("utf-8")) for c in kept),
+    }
+    return kept, stats
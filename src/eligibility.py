@@ -0,0 +1,90 @@
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src import user_storage
+
+CONTEXTS = {
+    "exam": "exam", "exams": "exam",
+    "fee": "fee", "fees": "fee", "dues": "fee",
+    "attendance": "attendance",
+}
+
+
+def evaluate(record: Dict[str, Any]) -> Dict[str, str]:
+    """Applies the eligibility rules to one academic record (answer per context)."""
+    att = record.get("attendance", {})
+    fees = record.get("fees", {})
+
+    # Rule: Attendance >= 75%, then no fee dues
+    percentage = att.get("average_percentage", 0)
+    if percentage < 75.0:
+        exam = f"NOT ELIGIBLE. Attendance is {percentage}% (Requires 75%)."
+    elif fees.get("status") != "Paid":
+        exam = f"NOT ELIGIBLE. Fee status is '{fees.get('status')}'. Please clear dues."
+    else:
+        exam = "ELIGIBLE. Attendance and Fee requirements met."
+
+    return {
+        "exam": exam,
+        "fee": f"Fee Status: {fees.get('status')}. Amount Due: {fees.get('amount_due', 0)}",
+        "attendance": f"Average Attendance: {att.get('average_percentage')}%",
+    }
+
+
+class EligibilityTable:
+    """
+    Precomputed eligibility answers per student, so checks during exam
+    registration peaks are dict lookups. Each row remembers the record version
+    it was built from (user_storage.record_version) and is rebuilt on the next
+    lookup after that student's documents change.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def build(self) -> int:
+        """Bulk-precomputes every student with an academic record."""
+        start = time.time()
+        rows = {}
+        # Each record comes with the version it was read at, so a write landing during
+        # the build leaves a stale version on the row and it is rebuilt on lookup
+        for student_id, version, record in user_storage.iter_academic_records():
+            rows[student_id] = (version, evaluate(record))
+        with self._lock:
+            self._rows.update(rows)
+        print(f"✅ Eligibility: Precomputed {len(rows)} student(s) ({time.time() - start:.2f}s)", file=sys.stderr)
+        return len(rows)
+
+    def lookup(self, student_id: str) -> Optional[Dict[str, str]]:
+        """Answers for every context, or None if the student has no record."""
+        version = user_storage.record_version(student_id)
+        row = self._rows.get(student_id)
+        if row and row[0] == version:
+            self.hits += 1
+            return row[1]
+
+        # Version was read before the record: a write racing this rebuild bumps it, so the row is redone
+        record = user_storage.get_academic_record(student_id)
+        answers = evaluate(record) if record else None
+        with self._lock:
+            self.rebuilds += 1
+            self._rows[student_id] = (version, answers)  # misses cached too
+        return answers
+
+    def check(self, student_id: str, context: str) -> str:
+        answers = self.lookup(student_id)
+        if not answers:
+            return "Error: Student record not found."
+        key = CONTEXTS.get(context.lower())
+        if key is None:
+            return f"Error: Unknown context '{context}'. Supported: exam, fee, attendance."
+        return answers[key]
+
+    def status(self) -> Dict[str, int]:
+        students = sum(1 for _, answers in self._rows.values() if answers)
+        return {"students": students, "hits": self.hits, "rebuilds": self.rebuilds}
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load from project root (same as config.py pattern)
@@ -10,11 +11,20 @@ def get_embeddings(provider="huggingface"):
     Returns embeddings model based on provider.
     
     Args:
-        provider: "huggingface" (BGE) or "gemini"
+        provider: "huggingface" (BGE, PyTorch), "onnx" (BGE, int8 ONNX Runtime) or "gemini"
     
     Returns:
         Embeddings instance
     """
+    if provider == "onnx":
+        try:
+            from src.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings()
+        except Exception as e:
+            # Same vectors either way, so fall back to the PyTorch model
+            print(f"⚠️ ONNX embeddings unavailable ({e}). Falling back to HuggingFace.", file=sys.stderr)
+            provider = "huggingface"
+    
     if provider == "gemini":
         from langchain_google_genai import GoogleGenerativeAIEmbeddings
         api_key = os.getenv("GEMINI_API_KEY")
@@ -1,4 +1,5 @@
 import os
+import sys
 import glob
 import time
 import uuid
@@ -11,11 +12,17 @@ warnings.filterwarnings("ignore")
 
 # LangChain Imports
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader, JSONLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 # from langchain_ollama import OllamaEmbeddings # Switched to HF
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 
+# Ensure src is in path (run as python src/ingest.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.chunker import chunk_documents
+from src.dedup import dedup_chunks
+from src.config import CHUNK_MAX_TOKENS, LOCAL_INDEX_DIR, LOCAL_INDEX_KIND
+from src.local_store import save_sharded_store
+
 # Load environment variables
 load_dotenv()
 
@@ -49,7 +56,7 @@ def get_doc_type(file_path):
 
 def ingest_docs():
     """
-    Loads docs, splits with Universal Strategy (400/60), and stores in FAISS.
+    Loads docs, splits them at headings / table rows / list items (src/chunker.py), and stores in FAISS.
     """
     print("🚀 Starting Optimized Ingestion (FAISS + bge-small)...")
     
@@ -97,16 +104,17 @@ def ingest_docs():
         except Exception as e:
             print(f"  - Error loading {file_path}: {e}")
 
-    # 2. Split Documents (Universal Strategy)
-    print("✂️ Splitting documents (Chunk: 400, Overlap: 60)...")
-    
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=400, 
-        chunk_overlap=60
-    )
+    # 2. Split Documents (structure-aware, sized in model tokens)
+    print(f"✂️ Splitting documents (max {CHUNK_MAX_TOKENS} tokens per chunk)...")
     
-    all_chunks = splitter.split_documents(loaded_docs)
-    print(f"🧩 Total chunks created: {len(all_chunks)}")
+    all_chunks = chunk_documents(loaded_docs)
+    total_tokens = sum(c.metadata['tokens'] for c in all_chunks)
+    print(f"🧩 Total chunks created: {len(all_chunks)} ({total_tokens} tokens)")
+
+    # Same passage in several files (copies, re-exports): keep one, remember every source
+    all_chunks, dedup_stats = dedup_chunks(all_chunks)
+    print(f"🧹 Removed {dedup_stats['dropped']} near-duplicate chunk(s) and {dedup_stats['passages']} repeated "
+          f"passage(s) ({dedup_stats['bytes_saved'] / 1024:.1f} KB of text)")
 
     # 3. Create Embeddings & Store in FAISS
     print("⚗️ Generating embeddings with bge-small-en-v1.5 (HuggingFace)...")
@@ -137,6 +145,17 @@ def ingest_docs():
         print(f"✅ Ingestion complete! FAISS index saved to {DB_PATH}")
     except Exception as e:
         print(f"❌ Error creating FAISS index: {e}")
+        return
+
+    # 4. Compact local index (VECTOR_BACKEND=local), one shard per doc_type, from the same vectors
+    try:
+        vectors = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+        shards = save_sharded_store(LOCAL_INDEX_DIR, [c.page_content for c in all_chunks],
+                                    [c.metadata for c in all_chunks], vectors, LOCAL_INDEX_KIND)
+        print(f"✅ Local {LOCAL_INDEX_KIND} index saved to {LOCAL_INDEX_DIR}: "
+              + ", ".join(f"{name} ({n})" for name, n in shards.items()))
+    except Exception as e:
+        print(f"❌ Error creating local index: {e}")
 
 if __name__ == "__main__":
     ingest_docs()
@@ -0,0 +1,55 @@
+import sys
+import time
+import importlib
+import threading
+
+# module name -> LazyModule (shared, so every importer sees the same warm state)
+_REGISTRY = {}
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy SDK module. The real import (plus an optional
+    `on_load(module)` hook, e.g. `genai.configure`) runs on first attribute access.
+    """
+
+    def __init__(self, name: str, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if self._on_load:
+                        self._on_load(module)
+                    self._module = module
+                    print(f"📦 Lazy Import: {self._name} ({(time.perf_counter() - start) * 1000:.0f} ms)", file=sys.stderr)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "deferred"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_module(name: str, on_load=None) -> LazyModule:
+    """Returns the shared proxy for `name` (first caller's `on_load` wins)."""
+    if name not in _REGISTRY:
+        _REGISTRY[name] = LazyModule(name, on_load)
+    return _REGISTRY[name]
+
+
+def loaded_modules() -> dict:
+    """{module name: imported yet?} for every registered lazy module."""
+    return {name: proxy.is_loaded for name, proxy in _REGISTRY.items()}
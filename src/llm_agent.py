@@ -8,29 +8,84 @@ from typing import List, Dict, Any
 # Fix path for standalone execution
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
 from src.llm_router import get_llm
+from src import speculation
 
 # Import our MCP Client
-from src.mcp_client import UniMcpClient
+from src.mcp_client import UniMcpClient, mcp_session
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("uni-agent")
 
+def _extract_json(s: str) -> Dict[str, Any]:
+    """Robust JSON extraction from an 'Action Input:' segment."""
+    s = s.strip()
+    # If wrapped in code blocks, strip them
+    if "```" in s:
+        s = s.split("```")[1]
+        if s.startswith("json"): s = s[4:]
+    s = s.strip()
+    # Find outer braces
+    start = s.find('{')
+    end = s.rfind('}')
+    if start != -1 and end != -1:
+        s = s[start:end+1]
+    return json.loads(s)
+
+def parse_actions(content: str) -> List[tuple]:
+    """
+    Every (tool_name, args) pair in an LLM reply, in order.
+    Raises ValueError on a missing Action Input or invalid JSON.
+    """
+    actions = []
+    for block in content.split("Action:")[1:]:
+        name_part, sep, input_part = block.partition("Action Input:")
+        if not sep:
+            raise ValueError("missing Action Input")
+        tool_name = name_part.strip().split('\n')[0].strip()
+        try:
+            actions.append((tool_name, _extract_json(input_part)))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON for {tool_name}: {e}")
+    return actions
+
+def _result_text(result_obj) -> str:
+    # Result is list of Content objects
+    observation = ""
+    for c in result_obj.content:
+        if c.type == 'text':
+            observation += c.text + "\n"
+    return observation
+
+async def execute_actions(mcp: UniMcpClient, actions: List[tuple]) -> str:
+    """Runs the parsed actions and returns the observation text."""
+    if len(actions) == 1:
+        name, args = actions[0]
+        return _result_text(await mcp.call_tool(name, args))
+    
+    results = await mcp.call_tools(actions)
+    parts = []
+    for (name, _), result in zip(actions, results):
+        text = f"Error: {result}" if isinstance(result, Exception) else _result_text(result)
+        parts.append(f"[{name}]\n{text}")
+    return "\n".join(parts)
+
 class UniAgent:
-    def __init__(self):
-        # Initialize LLM via Router
-        self.llm = get_llm()
+    def __init__(self, session_key=None):
+        # Initialize LLM via Router (one Ollama server per session, so every
+        # step's prompt extends the previous one in that server's KV cache)
+        self.llm = get_llm(session_key)
         self.history = []
         self.system_prompt = ""
 
     def _build_system_prompt(self, tools: List[Any]):
         """Constructs the system prompt with tool definitions."""
         tool_desc = ""
-        for t in tools:
+        # Sorted: the server's listing order must not change the cached prompt prefix
+        for t in sorted(tools, key=lambda t: t.name):
             tool_desc += f"- {t.name}: {t.description}\n"
             # Parse inputsSchema (JSON Schema) for more detail if needed
             # For now, description is usually enough for simple tools
@@ -52,6 +107,9 @@ CRITICAL RULES:
 4. NEVER write "Observation:" yourself. The system will provide observations to you.
 5. After the SYSTEM gives you an "Observation:", use that information to answer the user in 1-2 sentences.
 6. FOR ELIGIBILITY (Exams, Fees): ALWAYS use 'check_eligibility'. Do NOT guess. The tool is the final judge.
+7. If you need SEVERAL lookups (e.g. rules + the student's profile + eligibility), use ONE 'batch_tools' action:
+   Action: batch_tools
+   Action Input: {{"calls": [{{"tool": "search_documents", "args": {{"query": "exam rules"}}}}, {{"tool": "check_eligibility", "args": {{"student_id": "12345", "context": "exam"}}}}]}}
 
 CORRECT Example:
 User: What are the hostel fees?
@@ -116,10 +174,19 @@ Action Input: {{"student_id": "12345", "context": "exam"}}
 
     async def _run_step(self, mcp: UniMcpClient):
         """Executes one or more steps (LLM -> Tool -> LLM)."""
+        # Search the question's own words while the model plans its first action
+        speculative = speculation.start(mcp, self.history[-1].content)
+        try:
+            await self._react(mcp, speculative)
+        finally:
+            if speculative:
+                speculative.close("no search requested")
+
+    async def _react(self, mcp: UniMcpClient, speculative):
         # Limit steps to prevent infinite loops
         for _ in range(3):
-            # Invoke LLM
-            response = self.llm.invoke(self.history)
+            # Invoke LLM (in a thread, so the speculative search runs meanwhile)
+            response = await asyncio.to_thread(self.llm.invoke, self.history)
             content = response.content
             print(f"\nModel: {content}")
             
@@ -127,56 +194,21 @@ Action Input: {{"student_id": "12345", "context": "exam"}}
             
             # Check for Intent
             if "Action:" in content:
-                # Parse Tool Call (Naive parsing for stability)
                 try:
-                    lines = content.split('\n')
-                    action_line = next(line for line in lines if "Action:" in line)
-                    tool_name = action_line.split("Action:", 1)[1].strip()
-                    
-                    # Look for input
-                    # Sometimes LLM puts it on same line, sometimes next
-                    start_marker = "Action Input:"
-                    if start_marker not in content:
-                        print("❌ invalid action format: missing input")
-                        continue
-                        
-                    # Extract everything after "Action Input:"
-                    input_segment = content.split(start_marker, 1)[1].strip()
-                    
-                    # Robust JSON extraction
-                    def extract_json(s):
-                        s = s.strip()
-                        # If wrapped in code blocks, strip them
-                        if "```" in s:
-                           s = s.split("```")[1]
-                           if s.startswith("json"): s = s[4:]
-                        
-                        s = s.strip()
-                        # Find outer braces
-                        start = s.find('{')
-                        end = s.rfind('}')
-                        if start != -1 and end != -1:
-                            s = s[start:end+1]
-                        return json.loads(s)
-
-                    try:
-                        args = extract_json(input_segment)
-                    except Exception as e:
-                        print(f"❌ JSON Parse Error: {e} | Input: {input_segment[:50]}...")
-                        self.history.append(HumanMessage(content=f"System Error: Invalid JSON in Action Input. {e}"))
-                        continue
-                    
-                    print(f"⚙️ Executing {tool_name} with {args} ...")
-                    
-                    # Execute
-                    result_obj = await mcp.call_tool(tool_name, args)
+                    actions = parse_actions(content)
+                except ValueError as e:
+                    print(f"❌ invalid action format: {e}")
+                    self.history.append(HumanMessage(content=f"System Error: Invalid Action Input. {e}"))
+                    continue
+                
+                try:
+                    print(f"⚙️ Executing {[name for name, _ in actions]} ...")
                     
-                    # Extract text content
-                    # Result is list of Content objects
-                    observation = ""
-                    for c in result_obj.content:
-                        if c.type == 'text':
-                            observation += c.text + "\n"
+                    if speculative and speculative.matches(actions):
+                        observation = _result_text(await speculative.result())
+                    else:
+                        # Several actions in one reply are pipelined over the session
+                        observation = await execute_actions(mcp, actions)
                     
                     # Feed back to LLM
                     obs_msg = f"Observation: {observation}"
@@ -191,6 +223,10 @@ Action Input: {{"student_id": "12345", "context": "exam"}}
                 except Exception as ToolErr:
                     print(f"❌ Tool Execution Failed: {ToolErr}")
                     self.history.append(HumanMessage(content=f"System Error: Failed to execute tool. {ToolErr}"))
+                finally:
+                    if speculative:
+                        speculative.close("model asked for something else")
+                        speculative = None
             
             # If no action, we are done
             break
@@ -204,85 +240,91 @@ Action Input: {{"student_id": "12345", "context": "exam"}}
             query: User's question
             student_id: Optional student ID for personalized queries
         """
-        async with UniMcpClient() as mcp:
+        # Shared pooled connection with MCP_CLIENT_TRANSPORT=http/sse, a stdio child otherwise
+        async with mcp_session() as mcp:
             # 1. Discover Tools
             tools = await mcp.get_tools()
             
             # 2. Build Prompt (inject student_id if provided)
             system_msg = SystemMessage(content=self._build_system_prompt(tools))
             
+            # Search the question's own words while the model plans its first action
+            speculative = speculation.start(mcp, query)
+            
             # Add context about student ID if provided
             if student_id:
                 query = f"[Student ID: {student_id}] {query}"
             
             self.history = [system_msg, HumanMessage(content=query)]
             
-            # 3. Run agent loop with streaming
-            for step_num in range(3):  # Limit steps
-                # Invoke LLM
-                response = self.llm.invoke(self.history)
-                content = response.content
-                
-                self.history.append(AIMessage(content=content))
-                
-                # Check for tool call
-                if "Action:" in content:
-                    try:
-                        # Parse tool call
-                        lines = content.split('\n')
-                        action_line = next(line for line in lines if "Action:" in line)
-                        tool_name = action_line.split("Action:", 1)[1].strip()
-                        
-                        if "Action Input:" not in content:
-                            yield f"❌ Error: Invalid action format\n"
-                            break
-                        
-                        input_segment = content.split("Action Input:", 1)[1].strip()
-                        
-                        # Extract JSON
-                        def extract_json(s):
-                            s = s.strip()
-                            if "```" in s:
-                                s = s.split("```")[1]
-                                if s.startswith("json"): s = s[4:]
-                            s = s.strip()
-                            start = s.find('{')
-                            end = s.rfind('}')
-                            if start != -1 and end != -1:
-                                s = s[start:end+1]
-                            return json.loads(s)
-                        
-                        args = extract_json(input_segment)
-                        
-                        # Notify user of tool use
-                        yield f"🔍 [Using {tool_name}...]\n"
-                        
-                        # Execute tool
-                        result_obj = await mcp.call_tool(tool_name, args)
-                        
-                        # Extract observation
+            try:
+                async for chunk in self._stream_steps(mcp, speculative):
+                    yield chunk
+            finally:
+                if speculative:
+                    speculative.close("no search requested")
+
+    async def _stream_steps(self, mcp, speculative):
+        # 3. Run agent loop with streaming
+        for step_num in range(3):  # Limit steps
+            # Invoke LLM (in a thread, so the speculative search runs meanwhile)
+            response = await asyncio.to_thread(self.llm.invoke, self.history)
+            content = response.content
+            
+            self.history.append(AIMessage(content=content))
+            
+            # Check for tool call
+            if "Action:" in content:
+                try:
+                    actions = parse_actions(content)
+                    
+                    # Notify user of tool use
+                    yield f"🔍 [Using {', '.join(name for name, _ in actions)}...]\n"
+                    
+                    if speculative and speculative.matches(actions):
+                        # Already running (or done) since the question arrived
+                        observation = _result_text(await speculative.result())
+                        sources = next((p["sources"] for p in speculative.partials if p.get("sources")), None)
+                        if sources:
+                            yield f"📄 [Found in {', '.join(sources)}...]\n"
+                    elif len(actions) == 1:
+                        # Stream partial results: "found in <source>" shows up
+                        # while the server is still reranking
+                        name, args = actions[0]
                         observation = ""
-                        for c in result_obj.content:
-                            if c.type == 'text':
-                                observation += c.text + "\n"
-                        
-                        # Feed back to history
-                        self.history.append(HumanMessage(content=f"Observation: {observation}"))
-                        
-                        # Continue loop for final answer
-                        continue
-                        
-                    except Exception as e:
-                        yield f"❌ Tool error: {str(e)}\n"
-                        break
-                else:
-                    # No tool call - this is the final answer
-                    # Stream it word by word for better UX
-                    words = content.split()
-                    for i, word in enumerate(words):
-                        yield word + (" " if i < len(words) - 1 else "")
-                        await asyncio.sleep(0.01)  # Simulated streaming delay
+                        async for kind, payload in mcp.call_tool_stream(name, args):
+                            if kind == "partial" and payload.get("sources"):
+                                yield f"📄 [Found in {', '.join(payload['sources'])}...]\n"
+                            elif kind == "result":
+                                observation = _result_text(payload)
+                    else:
+                        # Several actions are pipelined over the session
+                        observation = await execute_actions(mcp, actions)
+                    
+                    # Feed back to history
+                    self.history.append(HumanMessage(content=f"Observation: {observation}"))
+                    
+                    # Continue loop for final answer
+                    continue
+                    
+                except ValueError as e:
+                    yield f"❌ Error: Invalid action format\n"
+                    break
+                except Exception as e:
+                    yield f"❌ Tool error: {str(e)}\n"
                     break
+                finally:
+                    if speculative:
+                        speculative.close("model asked for something else")
+                        speculative = None
+            else:
+                # No tool call - this is the final answer
+                # Stream it word by word for better UX
+                words = content.split()
+                for i, word in enumerate(words):
+                    yield word + (" " if i < len(words) - 1 else "")
+                    await asyncio.sleep(0.01)  # Simulated streaming delay
+                break
 
 
 if __name__ == "__main__":
@@ -1,36 +1,66 @@
 import sys
-from langchain_ollama import ChatOllama
-from src.config import LOCAL_LLM_MODEL, CLOUD_LLM_MODEL, GROQ_API_KEY
+import hashlib
+import itertools
+from src.config import LOCAL_LLM_MODEL, CLOUD_LLM_MODEL, GROQ_API_KEY, OLLAMA_BASE_URLS, OLLAMA_NUM_CTX
 
 # Singleton LLM instance
 _LLM_INSTANCE = None
+# One client per Ollama server when OLLAMA_BASE_URLS lists several
+_OLLAMA_CLIENTS = {}
+_ROUND_ROBIN = itertools.count()
 
-def get_llm():
+
+def ollama_url_for(session_key=None, urls=None) -> str:
+    """
+    Ollama server for a session. Rendezvous hashing: a session always lands on
+    the same server (where its prompt prefix is in the KV cache), and removing
+    a server only moves that server's sessions. Requests without a session
+    are spread round-robin (their shared static prefix is warm everywhere).
+    """
+    urls = urls or OLLAMA_BASE_URLS
+    if session_key is None:
+        return urls[next(_ROUND_ROBIN) % len(urls)]
+    return max(urls, key=lambda url: hashlib.sha1(f"{session_key}\x00{url}".encode("utf-8")).digest())
+
+
+def _ollama(base_url: str):
+    from langchain_ollama import ChatOllama
+    return ChatOllama(
+        model=LOCAL_LLM_MODEL,
+        base_url=base_url,
+        temperature=0.1,
+        top_p=0.9,
+        num_ctx=OLLAMA_NUM_CTX,
+        keep_alive="1h"
+    )
+
+
+def get_llm(session_key=None):
     """
     Returns the appropriate LLM instance based on configuration (Router).
+    session_key (e.g. the student ID) pins a conversation to one Ollama server
+    when several are configured.
     """
     global _LLM_INSTANCE
-    
+
+    if len(OLLAMA_BASE_URLS) > 1:
+        url = ollama_url_for(session_key)
+        if url not in _OLLAMA_CLIENTS:
+            print(f"🎮 Router: Using Ollama at {url} ({len(OLLAMA_BASE_URLS)} servers)", file=sys.stderr)
+            _OLLAMA_CLIENTS[url] = _ollama(url)
+        _LLM_INSTANCE = _LLM_INSTANCE or _OLLAMA_CLIENTS[url]
+        return _OLLAMA_CLIENTS[url]
+
     if _LLM_INSTANCE is not None:
         return _LLM_INSTANCE
 
     # Routing Logic (Priority: T4 GPU → Groq → Local Ollama)
-    import os
-    ollama_url = os.getenv("OLLAMA_BASE_URL")
-    
     # 1. PRIMARY: Colab T4 GPU via Ngrok (if configured)
-    if ollama_url:
-        print(f"🎮 Router: Using T4 GPU (Ollama via Ngrok: {ollama_url})", file=sys.stderr)
-        _LLM_INSTANCE = ChatOllama(
-            model=LOCAL_LLM_MODEL,
-            base_url=ollama_url,
-            temperature=0.1,
-            top_p=0.9,
-            num_ctx=1024,
-            keep_alive="1h"
-        )
+    if OLLAMA_BASE_URLS:
+        print(f"🎮 Router: Using T4 GPU (Ollama via Ngrok: {OLLAMA_BASE_URLS[0]})", file=sys.stderr)
+        _LLM_INSTANCE = _ollama(OLLAMA_BASE_URLS[0])
         return _LLM_INSTANCE
-    
+
     # 2. FALLBACK: Groq Cloud API (fast, free tier)
     if GROQ_API_KEY:
         try:
@@ -44,17 +74,14 @@ def get_llm():
             return _LLM_INSTANCE
         except ImportError:
             print("⚠️ Router: langchain-groq not found. Falling back to Local.", file=sys.stderr)
-    
+
     # 3. LAST RESORT: Local Ollama (if running on same machine)
     print(f"💻 Router: Using Local Ollama ({LOCAL_LLM_MODEL})", file=sys.stderr)
-    _LLM_INSTANCE = ChatOllama(
-        model=LOCAL_LLM_MODEL,
-        base_url="http://localhost:11434",
-        temperature=0.1,
-        top_p=0.9,
-        num_ctx=1024,
-        keep_alive="1h"
-    )
-    
+    _LLM_INSTANCE = _ollama("http://localhost:11434")
+
     return _LLM_INSTANCE
 
+
+def is_loaded() -> bool:
+    """True once the LLM client has been constructed."""
+    return _LLM_INSTANCE is not None
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.config import (
+    LOCAL_INDEX_DIR, LOCAL_INDEX_KIND, LOCAL_INDEX_NPROBE, LOCAL_INDEX_RESCORE, LOCAL_SHARD_WORKERS
+)
+from src.vector_index import build_index, load_index
+from src.chunk_store import ChunkStore, write_chunk_store
+
+# A local store directory holds the vector index (src/vector_index.py: index.json,
+# vectors.f16.npy, codes) and the chunk store (src/chunk_store.py: texts and metadata).
+# Both are memory-mapped; nothing is unpickled at startup. A sharded store is one
+# such directory per doc_type plus shards.json (save_sharded_store).
+FILTER_OVERFETCH = 4  # filtered searches shortlist k * this before dropping other doc_types
+SHARD_KEY = "doc_type"
+DEFAULT_SHARD = "general"
+IVFPQ_MIN_VECTORS = 4096  # smaller shards can't train 256-centroid PQ codebooks well; they use int8
+
+
+def save_store(path: str, texts: List[str], metadatas: List[Dict[str, Any]], vectors,
+               kind: str = LOCAL_INDEX_KIND, **params) -> None:
+    """Builds the vector index and writes it with the chunk store to `path` (replaced atomically)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not (len(texts) == len(metadatas) == len(vectors)):
+        raise ValueError(f"{len(texts)} texts, {len(metadatas)} metadata, {len(vectors)} vectors")
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    build_index(vectors, kind, **params).save(tmp)
+    write_chunk_store(tmp, texts, metadatas)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def save_sharded_store(path: str, texts: List[str], metadatas: List[Dict[str, Any]], vectors,
+                       kind: str = LOCAL_INDEX_KIND, **params) -> Dict[str, int]:
+    """
+    Writes one local store per doc_type under `path` (replaced atomically),
+    so a doc_type-filtered query only scans its own shard. Returns {doc_type: chunks}.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not (len(texts) == len(metadatas) == len(vectors)):
+        raise ValueError(f"{len(texts)} texts, {len(metadatas)} metadata, {len(vectors)} vectors")
+    rows: Dict[str, List[int]] = {}
+    for i, meta in enumerate(metadatas):
+        rows.setdefault(str(meta.get(SHARD_KEY) or DEFAULT_SHARD), []).append(i)
+
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    shards = {}
+    for name, members in sorted(rows.items()):
+        shard_kind = "int8" if kind == "ivfpq" and len(members) < IVFPQ_MIN_VECTORS else kind
+        save_store(os.path.join(tmp, name), [texts[i] for i in members], [metadatas[i] for i in members],
+                   vectors[members], shard_kind, **(params if shard_kind == kind else {}))
+        shards[name] = {"count": len(members), "kind": shard_kind}
+    with open(os.path.join(tmp, "shards.json"), "w", encoding="utf-8") as f:
+        json.dump({"key": SHARD_KEY, "shards": shards}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return {name: shard["count"] for name, shard in shards.items()}
+
+
+class LocalVectorStore:
+    """
+    Vector store over a local index directory, queried like PineconeVectorStore:
+    similarity_search_with_score(query, k, filter) -> [(Chunk, score)], where
+    score is the cosine similarity of normalized embeddings.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_DIR, embedding=None,
+                 nprobe: int = LOCAL_INDEX_NPROBE, rescore: int = LOCAL_INDEX_RESCORE):
+        self.path = path
+        self.embedding = embedding
+        self.index = load_index(path, nprobe=nprobe, rescore=rescore)
+        self.chunks = ChunkStore(path)
+        if len(self.chunks) != len(self.index):
+            raise ValueError(f"{path}: {len(self.chunks)} chunks but {len(self.index)} vectors")
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search_by_vector(self, vector, k: int = 4, filter: Dict[str, Any] = None) -> list:
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        if filter:
+            rows = self.chunks.where(filter)
+            scores, ids = self.index.search(vector, k * FILTER_OVERFETCH, rows=rows)
+            scores, ids = scores[:k], ids[:k]
+        else:
+            scores, ids = self.index.search(vector, k)
+        return [(self.chunks.get(int(i)), float(s)) for s, i in zip(scores, ids)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Dict[str, Any] = None) -> list:
+        return self.search_by_vector(self.embedding.embed_query(query), k, filter)
+
+
+class ShardedVectorStore:
+    """
+    One LocalVectorStore per doc_type. A query filtered on doc_type searches
+    only that shard; an unfiltered query searches every shard in parallel
+    (the BLAS scans release the GIL) and merges the exact re-scored results.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_DIR, embedding=None, nprobe: int = LOCAL_INDEX_NPROBE,
+                 rescore: int = LOCAL_INDEX_RESCORE, workers: int = LOCAL_SHARD_WORKERS):
+        self.path = path
+        self.embedding = embedding
+        with open(os.path.join(path, "shards.json"), encoding="utf-8") as f:
+            layout = json.load(f)
+        self.key = layout["key"]
+        self.shards = {name: LocalVectorStore(os.path.join(path, name), embedding, nprobe, rescore)
+                       for name in layout["shards"]}
+        # Threads only pay off with spare cores: on a single-CPU host the shards are searched in turn
+        workers = workers or min(len(self.shards), os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard") if workers > 1 else None
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+
+    def search_by_vector(self, vector, k: int = 4, filter: Dict[str, Any] = None) -> list:
+        filter = dict(filter or {})
+        if self.key in filter:
+            shard = self.shards.get(str(filter.pop(self.key)))
+            return shard.search_by_vector(vector, k, filter) if shard else []
+
+        shards = list(self.shards.values())
+        if self._pool and len(shards) > 1:
+            results = self._pool.map(lambda shard: shard.search_by_vector(vector, k, filter), shards)
+        else:
+            results = (shard.search_by_vector(vector, k, filter) for shard in shards)
+        merged = [hit for hits in results for hit in hits]
+        merged.sort(key=lambda hit: -hit[1])
+        return merged[:k]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Dict[str, Any] = None) -> list:
+        return self.search_by_vector(self.embedding.embed_query(query), k, filter)
+
+
+def load_local_store(embedding, path: str = LOCAL_INDEX_DIR):
+    """Opens a sharded store (shards.json) or a single local store directory."""
+    start = time.time()
+    if os.path.exists(os.path.join(path, "shards.json")):
+        store = ShardedVectorStore(path, embedding)
+        detail = ", ".join(f"{name} {len(shard)}" for name, shard in store.shards.items())
+        print(f"✅ Local index loaded: {len(store)} chunks in {len(store.shards)} shards ({detail}) "
+              f"({time.time() - start:.2f}s)", file=sys.stderr)
+    else:
+        store = LocalVectorStore(path, embedding)
+        print(f"✅ Local {store.index.kind} index loaded: {len(store)} chunks ({time.time() - start:.2f}s)",
+              file=sys.stderr)
+    return store
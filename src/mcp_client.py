@@ -1,38 +1,66 @@
 import asyncio
 import sys
 import os
+import json
 import logging
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, asynccontextmanager
+import anyio
+import httpx
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import MCP_MAX_INFLIGHT, MCP_CLIENT_TRANSPORT, MCP_SERVER_URL
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("mcp-client")
 
 class UniMcpClient:
-    def __init__(self):
+    """
+    transport: "stdio" launches mcp_server.py as a child process; "http"
+    (streamable HTTP) and "sse" connect to a shared server at `url`.
+    """
+
+    def __init__(self, transport: str = None, url: str = None):
+        self.transport = transport or MCP_CLIENT_TRANSPORT
+        self.url = url or MCP_SERVER_URL
         self.session = None
         self.exit_stack = AsyncExitStack()
+        # Set when the connection closes, so calls still waiting on a reply fail
+        # instead of hanging (a dead transport never answers them)
+        self.closed = asyncio.Event()
+
+    async def _open_streams(self):
+        if self.transport == "stdio":
+            python_exe = sys.executable
+            # Assume mcp_server.py is in the same directory
+            script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
+            logger.info(f"Connecting to MCP Server: {script_path}")
+            
+            server_params = StdioServerParameters(
+                command=python_exe,
+                args=[script_path],
+                env=os.environ.copy()
+            )
+            return await self.exit_stack.enter_async_context(stdio_client(server_params))
+        
+        logger.info(f"Connecting to MCP Server: {self.url} ({self.transport})")
+        if self.transport == "http":
+            from mcp.client.streamable_http import streamablehttp_client
+            read, write, _ = await self.exit_stack.enter_async_context(streamablehttp_client(self.url))
+            return read, write
+        if self.transport == "sse":
+            from mcp.client.sse import sse_client
+            return await self.exit_stack.enter_async_context(sse_client(self.url))
+        raise ValueError(f"Unknown MCP transport '{self.transport}' (stdio, http, sse)")
 
     async def __aenter__(self):
         """
         Context Manager entry: Connects to MCP Server.
         """
-        python_exe = sys.executable
-        # Assume mcp_server.py is in the same directory
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
-        
-        logger.info(f"Connecting to MCP Server: {script_path}")
-        
-        server_params = StdioServerParameters(
-            command=python_exe,
-            args=[script_path],
-            env=os.environ.copy()
-        )
-
         try:
-            read, write = await self.exit_stack.enter_async_context(stdio_client(server_params))
+            read, write = await self._open_streams()
             self.session = await self.exit_stack.enter_async_context(ClientSession(read, write))
             await self.session.initialize()
             logger.info("✅ Connected to MCP Server.")
@@ -46,14 +74,28 @@ class UniMcpClient:
         """
         Context Manager exit: Closes connection.
         """
+        self.closed.set()
         await self.exit_stack.aclose()
         logger.info("🔌 Disconnected from MCP Server.")
 
+    async def _until_closed(self, coro):
+        """Awaits a session request; raises ConnectionError if the connection closes first."""
+        call = asyncio.ensure_future(coro)
+        closed = asyncio.ensure_future(self.closed.wait())
+        try:
+            await asyncio.wait({call, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            closed.cancel()
+        if not call.done():
+            call.cancel()
+            raise ConnectionError("MCP connection lost")
+        return call.result()
+
     async def get_tools(self):
         """Returns list of available tools."""
         if not self.session:
             raise RuntimeError("Not connected")
-        result = await self.session.list_tools()
+        result = await self._until_closed(self.session.list_tools())
         return result.tools
 
     async def call_tool(self, name: str, args: dict):
@@ -62,7 +104,149 @@ class UniMcpClient:
             raise RuntimeError("Not connected")
         
         # Returns CallToolResult
-        return await self.session.call_tool(name, arguments=args)
+        return await self._until_closed(self.session.call_tool(name, arguments=args))
+
+    async def call_tool_stream(self, name: str, args: dict):
+        """
+        Calls a tool and yields ("partial", dict) for each progress message the
+        server streams (e.g. dense search hits before reranking), then
+        ("result", CallToolResult).
+        """
+        if not self.session:
+            raise RuntimeError("Not connected")
+        partials = asyncio.Queue()
+        
+        async def on_progress(progress, total, message):
+            if message:
+                try:
+                    partials.put_nowait(json.loads(message))
+                except ValueError:
+                    partials.put_nowait({"message": message})
+        
+        call = asyncio.ensure_future(self.session.call_tool(name, arguments=args, progress_callback=on_progress))
+        closed = asyncio.ensure_future(self.closed.wait())
+        try:
+            while not call.done():
+                getter = asyncio.ensure_future(partials.get())
+                await asyncio.wait({call, getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield "partial", getter.result()
+                else:
+                    getter.cancel()
+                if closed.done() and not call.done():
+                    raise ConnectionError("MCP connection lost")
+            while not partials.empty():
+                yield "partial", partials.get_nowait()
+            yield "result", call.result()
+        finally:
+            closed.cancel()
+            if not call.done():
+                call.cancel()
+
+    async def call_tools(self, calls: list, max_inflight: int = MCP_MAX_INFLIGHT):
+        """
+        Pipelines several call_tool requests over the one session: all are sent
+        without waiting for earlier replies (JSON-RPC ids match them up).
+        calls: list of (name, args). Returns results in the same order; a failed
+        call yields its exception instead of a CallToolResult.
+        """
+        if not self.session:
+            raise RuntimeError("Not connected")
+        limit = asyncio.Semaphore(max_inflight)
+
+        async def one(name, args):
+            async with limit:
+                return await self._until_closed(self.session.call_tool(name, arguments=args))
+
+        return await asyncio.gather(*(one(name, args) for name, args in calls), return_exceptions=True)
+
+class SharedMcpClient:
+    """
+    One long-lived connection per process to a shared MCP server (http/sse).
+    Concurrent requests multiplex over its session instead of each spawning
+    a stdio server. The connection is owned by a background task, since the
+    transport's task group must be entered and exited by the same task. When
+    the transport dies (server restarted, connection dropped) that task ends,
+    calls in flight fail with ConnectionError and the next get() reconnects.
+    """
+
+    def __init__(self, transport: str = None, url: str = None):
+        self.transport = transport
+        self.url = url
+        self._client = None
+        self._task = None
+        self._stop = None
+        self._lock = asyncio.Lock()
+
+    async def _run(self, ready: asyncio.Event, stop: asyncio.Event):
+        # ready/stop are this connection's own: a dying old task must not touch a newer one
+        client = UniMcpClient(self.transport, self.url)
+        connected = False
+        try:
+            async with client:
+                self._client = client
+                connected = True
+                ready.set()
+                await stop.wait()
+        except Exception as e:
+            if not connected:
+                raise  # surfaced by get()
+            logger.warning(f"⚠️ Shared MCP connection lost ({e!r}), reconnecting on next request")
+        finally:
+            if self._client is client:
+                self._client = None
+            ready.set()  # wake waiters if connecting failed
+
+    def _alive(self) -> bool:
+        return (self._client is not None and not self._client.closed.is_set()
+                and self._task is not None and not self._task.done())
+
+    async def get(self) -> UniMcpClient:
+        async with self._lock:
+            if not self._alive():
+                self.reset()
+                ready, self._stop = asyncio.Event(), asyncio.Event()
+                self._task = asyncio.create_task(self._run(ready, self._stop))
+                await ready.wait()
+                if self._client is None:
+                    # Surface the connection error from the owner task
+                    await self._task
+                    raise RuntimeError("MCP connection closed during startup")
+            return self._client
+
+    def reset(self):
+        """Drops the connection; the next get() reconnects."""
+        if self._stop:
+            self._stop.set()
+        self._client = None
+
+    async def close(self):
+        self.reset()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+SHARED_CLIENT = SharedMcpClient()
+
+@asynccontextmanager
+async def mcp_session():
+    """
+    MCP access for one request: the process-wide shared connection with the
+    http/sse transports, a fresh stdio server otherwise.
+    """
+    if MCP_CLIENT_TRANSPORT == "stdio":
+        async with UniMcpClient() as client:
+            yield client
+        return
+    
+    client = await SHARED_CLIENT.get()
+    try:
+        yield client
+    except (OSError, anyio.ClosedResourceError, anyio.BrokenResourceError, httpx.HTTPError):
+        # Server restarted or connection dropped: reconnect on the next request
+        logger.warning("⚠️ Shared MCP connection lost, reconnecting on next request")
+        SHARED_CLIENT.reset()
+        raise
 
 async def run_interactive_cli():
     """
@@ -1,17 +1,27 @@
 import os
 import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
 
 # Ensure src is in path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from src.rag_pipeline import retrieve_context
 from src import user_storage
+from src.eligibility import EligibilityTable
+from src.config import (
+    MCP_BATCH_MAX_CALLS, MCP_TRANSPORT, MCP_HOST, MCP_PORT,
+    MCP_TOOL_CACHE_SIZE, MCP_SEARCH_CACHE_TTL
+)
 import logging
 import json
 
-# Initialize FastMCP server
-mcp = FastMCP("uni-rag-server")
+# Initialize FastMCP server (host/port only matter for the HTTP transports)
+mcp = FastMCP("uni-rag-server", host=MCP_HOST, port=MCP_PORT)
 
 # Setup logging
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -21,45 +31,76 @@ logging.basicConfig(filename=LOG_PATH, level=logging.INFO,
 
 logging.info("🚀 MCP Server Starting...")
 
-# DISABLED for Render memory limits (512MB free tier)
-# Pre-loading uses ~200MB at startup. Lazy loading on first request is better for production.
-# logging.info("📦 Pre-loading RAG resources...")
-# try:
-#     from src.rag_pipeline import _lazy_load_resources
-#     _lazy_load_resources()
-#     logging.info("✅ Resources loaded successfully")
-# except Exception as e:
-#     logging.error(f"❌ Failed to pre-load resources: {e}")
-#     # Continue anyway - will lazy load on first call
-
-@mcp.tool()
-def search_documents(query: str) -> str:
+# --- RESULT CACHE ---
+class ToolResultCache:
     """
-    Search university documents (vectors) for relevant context.
-    Returns raw text chunks relevant to the query.
-    
-    Args:
-        query: The search query (e.g., "hostel fees", "exam rules")
+    LRU of tool results keyed by (tool, args). Each entry stores a validity
+    stamp: the student's record version (user_storage.record_version, bumped
+    on every write from any process) or an expiry time for document search.
     """
+
+    def __init__(self, max_size: int = MCP_TOOL_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version=None):
+        """Cached value if still valid: same `version`, or not yet expired when version is None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (entry[0] == version if version is not None else entry[0] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, stamp, value):
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def status(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+TOOL_CACHE = ToolResultCache()
+ELIGIBILITY = EligibilityTable()
+
+# Pre-load RAG resources in a background thread (WARMUP_MODE=background) so the
+# first search does not pay the model load. Eager loading at import used ~200MB
+# before the stdio handshake on Render; set WARMUP_MODE=lazy to load on first call.
+from src.rag_pipeline import _lazy_load_resources
+from src.warmup import WarmupScheduler
+WARMUP = WarmupScheduler([
+    ("eligibility", ELIGIBILITY.build),
+    ("rag_resources", _lazy_load_resources),
+], delay=0)
+
+# Tool bodies are blocking (Pinecone, SQLite), so each call runs in a worker
+# thread; the server then serves pipelined and batched calls concurrently.
+
+def _search_documents(query: str, on_partial=None) -> str:
     logging.info(f"🔍 [TOOL] search_documents: {query}")
+    key = ("search_documents", query.strip().lower())
+    cached = TOOL_CACHE.get(key)
+    if cached is not None:
+        return cached
     try:
-        context = retrieve_context(query)
+        context = retrieve_context(query, on_partial=on_partial)
         if not context:
             return "No relevant documents found."
+        # Documents only change on re-ingestion, so a TTL is enough
+        TOOL_CACHE.put(key, time.time() + MCP_SEARCH_CACHE_TTL, context)
         return context
     except Exception as e:
         logging.error(f"❌ Error in search_documents: {e}")
         return f"Error: {str(e)}"
 
-@mcp.tool()
-def query_database(query_type: str, params: str) -> str:
-    """
-    Query the structured database (Postgres/JSON) for specific student data.
-    
-    Args:
-        query_type: Type of query. Supported: 'timetable', 'profile'
-        params: JSON string of parameters (e.g., '{"student_id": "123"}')
-    """
+def _query_database(query_type: str, params: str) -> str:
     logging.info(f"💾 [TOOL] query_database: {query_type} | {params}")
     try:
         try:
@@ -71,26 +112,73 @@ def query_database(query_type: str, params: str) -> str:
         if not student_id:
             return "Error: student_id is required in params"
 
+        # Serialized result reused until this student's records change
+        key = ("query_database", query_type, student_id)
+        version = user_storage.record_version(student_id)
+        cached = TOOL_CACHE.get(key, version)
+        if cached is not None:
+            return cached
+
         if query_type == "timetable":
             data = user_storage.get_user_timetable(student_id)
-            if data:
-                return json.dumps(data, indent=2)
-            return "Timetable not found."
+            result = json.dumps(data, indent=2) if data else "Timetable not found."
             
         elif query_type == "profile":
             data = user_storage.get_user_profile(student_id)
-            if data:
-                return json.dumps(data, indent=2)
-            return "Profile not found."
+            result = json.dumps(data, indent=2) if data else "Profile not found."
             
-        return f"Error: Unsupported query_type '{query_type}'"
+        else:
+            return f"Error: Unsupported query_type '{query_type}'"
+        
+        TOOL_CACHE.put(key, version, result)
+        return result
         
     except Exception as e:
         logging.error(f"❌ Error in query_database: {e}")
         return f"Error: {str(e)}"
 
+def _check_eligibility(student_id: str, context: str) -> str:
+    logging.info(f"⚖️ [TOOL] check_eligibility: {student_id} | {context}")
+    try:
+        # Precomputed per student; rebuilt only when the record changes
+        return ELIGIBILITY.check(student_id, context)
+    except Exception as e:
+        logging.error(f"❌ Error in check_eligibility: {e}")
+        return f"Error: {str(e)}"
+
 @mcp.tool()
-def check_eligibility(student_id: str, context: str) -> str:
+async def search_documents(query: str, ctx: Context) -> str:
+    """
+    Search university documents (vectors) for relevant context.
+    Returns raw text chunks relevant to the query.
+    
+    Args:
+        query: The search query (e.g., "hostel fees", "exam rules")
+    """
+    loop = asyncio.get_running_loop()
+    
+    def on_partial(partial):
+        # Dense hits arrive before reranking: stream them as a progress notification
+        # (only sent when the client passed a progress callback)
+        asyncio.run_coroutine_threadsafe(
+            ctx.report_progress(1, 2, message=json.dumps(partial)), loop
+        )
+    
+    return await asyncio.to_thread(_search_documents, query, on_partial)
+
+@mcp.tool()
+async def query_database(query_type: str, params: str) -> str:
+    """
+    Query the structured database (Postgres/JSON) for specific student data.
+    
+    Args:
+        query_type: Type of query. Supported: 'timetable', 'profile'
+        params: JSON string of parameters (e.g., '{"student_id": "123"}')
+    """
+    return await asyncio.to_thread(_query_database, query_type, params)
+
+@mcp.tool()
+async def check_eligibility(student_id: str, context: str) -> str:
     """
     Checks student eligibility for exams or other activities based on strict rules.
     
@@ -98,39 +186,44 @@ def check_eligibility(student_id: str, context: str) -> str:
         student_id: The student's ID (e.g., "12345")
         context: The context to check (e.g., "exam", "fee", "attendance")
     """
-    logging.info(f"⚖️ [TOOL] check_eligibility: {student_id} | {context}")
+    return await asyncio.to_thread(_check_eligibility, student_id, context)
+
+# --- BATCH ---
+BATCH_TOOLS = {
+    "search_documents": _search_documents,
+    "query_database": _query_database,
+    "check_eligibility": _check_eligibility,
+}
+
+async def _run_call(call: Dict[str, Any]) -> Dict[str, Any]:
+    name = call.get("tool") if isinstance(call, dict) else None
+    fn = BATCH_TOOLS.get(name)
+    if fn is None:
+        return {"tool": name, "error": f"Unknown tool '{name}'. Supported: {', '.join(BATCH_TOOLS)}"}
     try:
-        record = user_storage.get_academic_record(student_id)
-        if not record:
-            return "Error: Student record not found."
-            
-        if context.lower() in ["exam", "exams"]:
-            # Rule: Attendance >= 75%
-            # We assume 'attendance' in record has 'average_percentage'
-            att = record.get("attendance", {}).get("average_percentage", 0)
-            if att < 75.0:
-                 return f"NOT ELIGIBLE. Attendance is {att}% (Requires 75%)."
-            
-            # Rule: No Fee Dues
-            fees = record.get("fees", {})
-            if fees.get("status") != "Paid":
-                 return f"NOT ELIGIBLE. Fee status is '{fees.get('status')}'. Please clear dues."
-                 
-            return "ELIGIBLE. Attendance and Fee requirements met."
-            
-        elif context.lower() in ["fee", "fees", "dues"]:
-            fees = record.get("fees", {})
-            return f"Fee Status: {fees.get('status')}. Amount Due: {fees.get('amount_due', 0)}"
-            
-        elif context.lower() in ["attendance"]:
-             att = record.get("attendance", {})
-             return f"Average Attendance: {att.get('average_percentage')}%"
-             
-        return f"Error: Unknown context '{context}'. Supported: exam, fee, attendance."
-        
-    except Exception as e:
-        logging.error(f"❌ Error in check_eligibility: {e}")
-        return f"Error: {str(e)}"
+        return {"tool": name, "result": await asyncio.to_thread(fn, **(call.get("args") or {}))}
+    except TypeError as e:
+        return {"tool": name, "error": f"Invalid args: {e}"}
+
+@mcp.tool()
+async def batch_tools(calls: List[Dict[str, Any]]) -> str:
+    """
+    Run several tool calls at once (concurrently) and get all results in one reply.
+    Use this when a question needs more than one lookup, e.g. a document search
+    plus the student's profile plus an eligibility check.
+    
+    Args:
+        calls: List of {"tool": <name>, "args": {...}} using search_documents,
+               query_database or check_eligibility, e.g.
+               [{"tool": "search_documents", "args": {"query": "exam rules"}},
+                {"tool": "check_eligibility", "args": {"student_id": "123", "context": "exam"}}]
+    Returns a JSON array of {"tool", "result"} (or {"tool", "error"}) in call order.
+    """
+    logging.info(f"📦 [TOOL] batch_tools: {[c.get('tool') for c in calls if isinstance(c, dict)]}")
+    if len(calls) > MCP_BATCH_MAX_CALLS:
+        return f"Error: At most {MCP_BATCH_MAX_CALLS} calls per batch"
+    results = await asyncio.gather(*(_run_call(c) for c in calls))
+    return json.dumps(results)
 
 @mcp.tool()
 def get_metadata() -> str:
@@ -142,10 +235,21 @@ def get_metadata() -> str:
         "server": "uni-rag-server",
         "version": "1.0",
         "status": "online",
-        "capabilities": ["search_documents", "query_database"]
+        "warmup": WARMUP.status(),
+        "tool_cache": TOOL_CACHE.status(),
+        "eligibility": ELIGIBILITY.status(),
+        "transport": MCP_TRANSPORT,
+        "pid": os.getpid(),
+        "capabilities": ["search_documents", "query_database", "check_eligibility", "batch_tools"]
     }, indent=2)
 
 if __name__ == "__main__":
-    # fastmcp runs on stdio by default
-    print("Listening on Stdio...", file=sys.stderr)
-    mcp.run()
+    # stdio: one server per client process (default)
+    # streamable-http / sse: one long-lived server per host shared by all web workers,
+    # so retrieval models load once; clients set MCP_CLIENT_TRANSPORT=http
+    if MCP_TRANSPORT == "stdio":
+        print("Listening on Stdio...", file=sys.stderr)
+    else:
+        print(f"Listening on {MCP_TRANSPORT} at http://{MCP_HOST}:{MCP_PORT}...", file=sys.stderr)
+    WARMUP.start()
+    mcp.run(transport=MCP_TRANSPORT)
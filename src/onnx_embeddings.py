@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.config import (
+    EMBED_ONNX_DIR, EMBED_ONNX_FILE, EMBED_ONNX_THREADS, EMBED_ONNX_BATCH_SIZE, EMBED_MAX_TOKENS
+)
+
+
+class OnnxEmbeddings:
+    """
+    bge-small-en-v1.5 as an int8 ONNX Runtime session (no PyTorch).
+
+    Drop-in for HuggingFaceEmbeddings(normalize_embeddings=True): same CLS pooling
+    and L2 normalization, so vectors stay compatible with the existing index.
+    Build the model files with scripts/utils/export_onnx_embeddings.py.
+    """
+
+    def __init__(self, model_dir: str = EMBED_ONNX_DIR, model_file: str = EMBED_ONNX_FILE,
+                 num_threads: int = EMBED_ONNX_THREADS, batch_size: int = EMBED_ONNX_BATCH_SIZE,
+                 max_tokens: int = EMBED_MAX_TOKENS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, model_file)
+        tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+            raise FileNotFoundError(
+                f"ONNX embedding model not found in {model_dir}. "
+                "Run: python scripts/utils/export_onnx_embeddings.py"
+            )
+
+        start = time.time()
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        print(f"✅ ONNX Embeddings loaded: {model_file} ({num_threads} thread(s), {time.time() - start:.2f}s)", file=sys.stderr)
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        # bge uses the [CLS] token as the sentence embedding
+        vectors = last_hidden_state[:, 0]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        # Batch similar lengths together so each batch pads to a short max length
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode_batch([texts[i] for i in batch]).tolist()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._encode_batch([text])[0].tolist()
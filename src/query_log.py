@@ -0,0 +1,23 @@
+import sys
+import json
+import time
+import threading
+
+from src.config import QUERY_LOG_PATH
+
+# Opt-in request log (QUERY_LOG_PATH): one JSON line per question, in the
+# format tests/load_replay.py replays as traffic.
+_LOCK = threading.Lock()
+
+
+def record(endpoint: str, question: str, student_id: str = None) -> None:
+    """Appends {"ts", "endpoint", "question", "student_id"}; no-op when QUERY_LOG_PATH is unset."""
+    if not QUERY_LOG_PATH:
+        return
+    line = json.dumps({"ts": round(time.time(), 3), "endpoint": endpoint, "question": question,
+                       "student_id": student_id}, ensure_ascii=False)
+    try:
+        with _LOCK, open(QUERY_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️ Query log: {e}", file=sys.stderr)
@@ -0,0 +1,176 @@
+import re
+import time
+import asyncio
+from collections import deque
+
+from src import rag_pipeline, user_storage, cache_manager, stream_share, timetable_index, timetable_extractor
+from src.config import MCP_CLIENT_TRANSPORT
+from src.eligibility import CONTEXTS, EligibilityTable
+
+# Routes a question before the ReAct agent. Most questions need exactly one tool,
+# so they skip the agent's plan -> tool -> answer LLM calls:
+#   doc          one search + one LLM call (rag_pipeline.answer_question_stream)
+#   personal     the student's own timetable / profile / attendance / dues (no LLM)
+#   eligibility  the precomputed eligibility table (no LLM)
+#   agent        multi-step or mixed questions: the full UniAgent loop
+ROUTES = ("doc", "personal", "eligibility", "agent")
+NEED_STUDENT_ID = "Please log in with your Student ID so I can look up your own records."
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SELF = {"my", "mine"}
+_ELIGIBLE = {"eligible", "eligibility", "debarred", "detained"}
+_PROFILE = {"profile", "program", "programme", "semester", "name"}
+_DUES = {"dues", "due", "pending", "paid", "balance"}
+# Asking how something works, or when, rather than for the record itself
+_NOT_A_LOOKUP = {"how", "rule", "rules", "policy", "criteria", "required", "requirement", "minimum",
+                 "procedure", "apply", "change", "when", "date", "deadline", "last"}
+# Conditionals, comparisons and chained requests need several tool calls and reasoning
+_MULTI_STEP = re.compile(r"\b(if|compare|comparison|difference|versus|vs|then|also|both|and what|and how|and when)\b")
+
+# With a shared MCP server (http/sse) the doc route retrieves through its
+# search_documents tool, so this worker holds no retrieval models; with stdio a
+# server per question would cost more than retrieving in-process.
+DOC_SEARCH_VIA_MCP = MCP_CLIENT_TRANSPORT != "stdio"
+_NO_DOCUMENTS = "No relevant documents found."  # mcp_server._search_documents
+
+ELIGIBILITY = EligibilityTable()
+_LATENCIES = {route: deque(maxlen=1000) for route in ROUTES}
+_COUNTS = {route: 0 for route in ROUTES}
+
+
+def classify(query: str, student_id: str = None) -> tuple:
+    """
+    (route, topic): topic is the record or eligibility context for personal/eligibility
+    routes. The no-LLM routes only take questions they can answer for certain;
+    anything else about the student goes to the agent.
+    """
+    text = query.lower()
+    words = set(_WORD_RE.findall(text))
+    if _MULTI_STEP.search(text) or text.count("?") > 1:
+        return "agent", None
+
+    # "am I eligible for the exam", "my fee eligibility" (not "eligibility criteria for
+    # hostels"); only the contexts the eligibility table answers (exam / fee / attendance)
+    if words & _ELIGIBLE and words & (_SELF | {"i", "am"}):
+        context = next((CONTEXTS[w] for w in CONTEXTS if w in words), None)
+        return ("eligibility", context) if context else ("agent", None)
+
+    # Own schedule, by explicit schedule phrasing ("my next class", "am I free")
+    if words & (_SELF | {"i", "me"}) and timetable_index.is_schedule_question(None, query):
+        return "personal", "timetable"
+
+    if words & _SELF:
+        if not words & _NOT_A_LOOKUP:
+            if "attendance" in words:
+                return "personal", "attendance"
+            if words & {"fee", "fees"} and words & _DUES:
+                return "personal", "fee"
+            if words & _PROFILE:
+                return "personal", "profile"
+        # about the student, but not one record we can read directly
+        return "agent", None
+
+    return "doc", None
+
+
+def _profile_answer(profile: dict) -> str:
+    return (f"{profile.get('name', 'Student')} ({profile.get('student_id')}): "
+            f"{profile.get('program', 'program not set')}, semester {profile.get('semester', '?')}.")
+
+
+def answer_direct(route: str, topic: str, query: str, student_id: str = None) -> str:
+    """Answer for the personal and eligibility routes, read straight from user_storage."""
+    if not student_id:
+        return NEED_STUDENT_ID
+    if route == "eligibility" or topic in ("attendance", "fee"):
+        answer = ELIGIBILITY.check(student_id, topic)
+        return "I couldn't find your academic record." if answer.startswith("Error") else answer
+    if topic == "timetable":
+        timetable = user_storage.get_user_timetable(student_id)
+        if not timetable:
+            return "I couldn't find your timetable. Please upload it first."
+        return timetable_extractor.search_timetable(timetable, query, index=user_storage.get_timetable_index(student_id))
+    profile = user_storage.get_user_profile(student_id)
+    return _profile_answer(profile) if profile else "I couldn't find your profile."
+
+
+async def search_via_mcp(query: str) -> str:
+    """Context from the shared MCP server's search_documents ("" if nothing relevant)."""
+    from src.mcp_client import mcp_session
+    async with mcp_session() as mcp:
+        result = await mcp.call_tool("search_documents", {"query": query})
+    text = "\n".join(c.text for c in result.content if c.type == "text").strip()
+    if result.isError or text.startswith("Error:"):
+        raise RuntimeError(f"search_documents failed: {text}")
+    return "" if text == _NO_DOCUMENTS else text
+
+
+def record(route: str, seconds: float) -> None:
+    _COUNTS[route] += 1
+    _LATENCIES[route].append(seconds * 1000)
+
+
+async def answer_stream(query: str, student_id: str = None, agent_factory=None):
+    """
+    Streams the answer through the cheapest route that can give it. The agent
+    (agent_factory(student_id), default UniAgent) is only created for the agent route.
+    """
+    start = time.perf_counter()
+    route, topic = classify(query, student_id)
+    try:
+        if route in ("personal", "eligibility"):
+            yield await asyncio.to_thread(answer_direct, route, topic, query, student_id)
+        elif route == "doc":
+            # No student_id: not a timetable question ("hostel room change" isn't about room 37-606)
+            retrieve = search_via_mcp if DOC_SEARCH_VIA_MCP else None
+            async for chunk in rag_pipeline.answer_question_stream(query, retrieve=retrieve):
+                yield chunk
+        else:
+            async for chunk in agent_stream(query, student_id, agent_factory):
+                yield chunk
+    finally:
+        record(route, time.perf_counter() - start)
+
+
+async def agent_stream(query: str, student_id: str = None, agent_factory=None):
+    """
+    UniAgent's streamed answer, cached per student record version and shared
+    with an identical request (same student, same question) still in flight.
+    """
+    version = user_storage.record_version(student_id) if student_id else ""
+    # One cache entry per (student, question) holding the version it was answered at,
+    # so a write overwrites the stale answer instead of leaving it behind
+    key = f"agent\x00{student_id or ''}\x00{query}"
+    cached = cache_manager.get_from_cache(key)
+    if cached and cached[0] == version:
+        yield cached[1]
+        return
+
+    async def generate():
+        factory = agent_factory
+        if factory is None:
+            from src.llm_agent import UniAgent as factory
+        parts = []
+        async for chunk in factory(student_id).process_query_stream(query, student_id):
+            parts.append(chunk)
+            yield chunk
+        if parts and not any(p.startswith("❌") for p in parts):  # tool errors aren't answers
+            cache_manager.set_to_cache(key, (version, "".join(parts)))
+
+    async for chunk in stream_share.share(f"{key}\x00{version}", generate):
+        yield chunk
+
+
+def _percentile(values: list, p: float):
+    return round(values[min(int(p * len(values)), len(values) - 1)], 1) if values else None
+
+
+def stats() -> dict:
+    """Per route: requests, share of traffic and latency percentiles (last 1000 requests)."""
+    total = sum(_COUNTS.values())
+    out = {}
+    for route in ROUTES:
+        latencies = sorted(_LATENCIES[route])
+        out[route] = {"requests": _COUNTS[route], "share": round(_COUNTS[route] / total, 3) if total else 0.0,
+                      "p50_ms": _percentile(latencies, 0.5), "p95_ms": _percentile(latencies, 0.95)}
+    return out
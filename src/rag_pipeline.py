@@ -1,16 +1,18 @@
 import os
 import sys
 import time
+import asyncio
+import threading
 from functools import lru_cache
 
 # Imports moved to lazy loader to prevent timeout
 from src.config import (
     DB_PATH, EMBED_MODEL_NAME, RERANK_MODEL_NAME, 
-    MAX_CONTEXT_CHARS, RERANK_THRESHOLD, RETRIEVAL_K, CACHE_DIR,
+    MAX_CONTEXT_CHARS, CONTEXT_MAX_TOKENS, RERANK_THRESHOLD, RETRIEVAL_K, CACHE_DIR,
     PINECONE_API_KEY, PINECONE_INDEX_NAME
 )
 from src.llm_router import get_llm
-from src import cache_manager, user_storage, timetable_extractor
+from src import cache_manager, user_storage, timetable_extractor, timetable_index, stream_share
 
 # --- EMBEDDINGS WRAPPER ---
 class CachedEmbeddingsWrapper:
@@ -32,9 +34,17 @@ RERANKER = None
 EMBEDDINGS = None
 VECTORSTORE = None
 _RESOURCES_LOADED = False
+# Warmup thread and request threads may race to load; only one does the work
+_LOAD_LOCK = threading.Lock()
 
 def _lazy_load_resources():
     """Lazy load heavy ML models only when needed"""
+    if _RESOURCES_LOADED:
+        return
+    with _LOAD_LOCK:
+        _load_resources_locked()
+
+def _load_resources_locked():
     global RERANKER, EMBEDDINGS, VECTORSTORE, _RESOURCES_LOADED
     if _RESOURCES_LOADED:
         return
@@ -44,9 +54,6 @@ def _lazy_load_resources():
 
     # Import config and dependencies here to avoid loading at module import time
     from src.config import SKIP_RERANKER, RERANK_MODEL_NAME, CACHE_DIR
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-    from langchain_pinecone import PineconeVectorStore
-    from pinecone import Pinecone
     
     # 1. Reranker (Optional - can be disabled to save memory)
 
@@ -62,22 +69,33 @@ def _lazy_load_resources():
         RERANKER = None
         print("⚠️ Reranker disabled (SKIP_RERANKER=true)", file=sys.stderr)
 
-    # 2. Embeddings
+    # 2. Embeddings: the indexes hold 384-d BGE vectors, so queries are embedded with
+    # BGE (EMBEDDING_PROVIDER=huggingface or its ONNX build, onnx) whatever the setting
     try:
-        from langchain_community.embeddings import HuggingFaceEmbeddings
-        _raw_embeddings = HuggingFaceEmbeddings(
-            model_name=EMBED_MODEL_NAME,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        from src.config import EMBEDDING_PROVIDER
+        from src.embeddings_router import get_embeddings
+        provider = EMBEDDING_PROVIDER
+        if provider not in ("huggingface", "onnx"):
+            print(f"⚠️ EMBEDDING_PROVIDER={provider} doesn't match the BGE index. Using HuggingFace for queries.",
+                  file=sys.stderr)
+            provider = "huggingface"
+        _raw_embeddings = get_embeddings(provider)
         EMBEDDINGS = CachedEmbeddingsWrapper(_raw_embeddings)
     except Exception as e:
         print(f"⚠️ Embeddings failed to load: {e}", file=sys.stderr)
         EMBEDDINGS = None
 
-    # 3. Vector Store (Pinecone)
+    # 3. Vector Store (Pinecone, or the local compact index with VECTOR_BACKEND=local)
     global VECTORSTORE
-    if EMBEDDINGS and PINECONE_API_KEY:
+    from src.config import VECTOR_BACKEND, LOCAL_INDEX_DIR
+    if EMBEDDINGS and VECTOR_BACKEND == "local":
+        try:
+            from src.local_store import load_local_store
+            VECTORSTORE = load_local_store(EMBEDDINGS, LOCAL_INDEX_DIR)
+        except Exception as e:
+            print(f"⚠️ Local index failed to load from {LOCAL_INDEX_DIR}: {e}", file=sys.stderr)
+            VECTORSTORE = None
+    elif EMBEDDINGS and PINECONE_API_KEY:
         try:
             from langchain_pinecone import PineconeVectorStore
             from pinecone import Pinecone
@@ -100,6 +118,16 @@ def _lazy_load_resources():
     _RESOURCES_LOADED = True
 
 
+def resources_status() -> dict:
+    """Which heavy RAG resources are in memory (for readiness reporting)."""
+    return {
+        "rag_resources": _RESOURCES_LOADED,
+        "reranker": RERANKER is not None,
+        "embeddings": EMBEDDINGS is not None,
+        "vectorstore": VECTORSTORE is not None,
+    }
+
+
 # --- HELPER: INTENT ---
 def identify_intent(query: str) -> dict:
     query_lower = query.lower()
@@ -118,9 +146,16 @@ def identify_intent(query: str) -> dict:
 
 
 # --- CORE: RETRIEVAL ---
-def retrieve_context(query: str) -> str:
+def _source_name(doc) -> str:
+    source = doc.metadata.get("source") or doc.metadata.get("doc_type") or "university records"
+    return os.path.basename(str(source))
+
+def retrieve_context(query: str, on_partial=None) -> str:
     """
     Core Retrieval Function used by MCP Server.
+    on_partial(dict), if given, is called once dense search returns (before
+    reranking) with the top passage and its sources, so callers can show
+    progress while the reranker runs.
     """
     search_filter = identify_intent(query)
     
@@ -140,12 +175,23 @@ def retrieve_context(query: str) -> str:
     if not scores_and_docs:
         return ""
 
+    if on_partial:
+        sources = list(dict.fromkeys(
+            os.path.basename(str(s)) for doc, _ in scores_and_docs[:3]
+            for s in doc.metadata.get("sources") or [_source_name(doc)]
+        ))
+        on_partial({
+            "stage": "dense",
+            "sources": sources,
+            "passage": scores_and_docs[0][0].page_content[:MAX_CONTEXT_CHARS],
+        })
+
     # Conditional Rerank
     best_score = scores_and_docs[0][1]
     
     if best_score < RERANK_THRESHOLD or not RERANKER:
         # High confidence or no reranker -> Take top
-        final_docs_content = [doc.page_content for doc, score in scores_and_docs[:2]]
+        ranked = [(doc.page_content, doc.metadata) for doc, score in scores_and_docs]
     else:
         # Rerank
         passages = [
@@ -155,14 +201,61 @@ def retrieve_context(query: str) -> str:
         from flashrank import RerankRequest
         rerank_request = RerankRequest(query=query, passages=passages)
         results = RERANKER.rerank(rerank_request)
-        final_docs_content = [res['text'] for res in results[:2]]
+        ranked = [(res['text'], res.get('meta') or {}) for res in results]
+
+    return _pack_context(ranked)
+
+
+def _pack_context(ranked) -> str:
+    """
+    Joins ranked (text, metadata) passages into the LLM context. Chunks from the
+    structure-aware chunker carry a "tokens" count, so whole chunks are packed
+    up to CONTEXT_MAX_TOKENS instead of cutting the text at a character limit.
+    """
+    if not all("tokens" in meta for _, meta in ranked):
+        # Index built before token metadata: top 2, truncated
+        context = "\n\n".join(text for text, _ in ranked[:2])
+        if len(context) > MAX_CONTEXT_CHARS:
+            context = context[:MAX_CONTEXT_CHARS] + "..."
+        return context
+
+    picked, used = [], 0
+    for text, meta in ranked:
+        if picked and used + meta["tokens"] > CONTEXT_MAX_TOKENS:
+            continue
+        picked.append(text)
+        used += meta["tokens"]
+    return "\n\n".join(picked)
 
-    # Truncate
-    context = "\n\n".join(final_docs_content)
-    if len(context) > MAX_CONTEXT_CHARS:
-        context = context[:MAX_CONTEXT_CHARS] + "..."
-    
-    return context
+
+# --- TIMETABLE (User Data) ---
+TIMETABLE_KEYWORDS = ["class", "schedule", "timetable", "when is", "lecture", "free slot", "room"]
+
+def _answer_from_timetable(query: str, student_id: str = None):
+    """Answers schedule questions from the student's precomputed timetable index."""
+    if not student_id or not any(k in query.lower() for k in TIMETABLE_KEYWORDS):
+        return None
+    tt = user_storage.get_user_timetable(student_id)
+    if not tt:
+        return None
+    index = user_storage.get_timetable_index(student_id)
+    if not timetable_index.is_schedule_question(index, query):
+        # A keyword hit that isn't clearly about the schedule ("hostel room change"):
+        # answer only if the index can, otherwise fall through to RAG
+        return timetable_index.answer_query(index, query)
+    return timetable_extractor.search_timetable(tt, query, index=index)
+
+
+# --- PROMPT ---
+# Static instructions first, then the retrieved context, then the question: every
+# prompt starts with the same bytes, so Ollama reuses their KV cache across requests.
+ANSWER_PREFIX = (
+    "You are the university assistant. Answer the question using only the context "
+    "below. If the context does not contain the answer, say so.\n\n"
+)
+
+def build_prompt(context: str, query: str) -> str:
+    return f"{ANSWER_PREFIX}Context:\n{context}\n\nQuestion: {query}\nAnswer:"
 
 
 # --- CORE: ORCHESTRATION (The "Answer" Service) ---
@@ -172,11 +265,8 @@ def answer_question(query: str, student_id: str = None) -> str:
     if cached: return cached
 
     # 2. Timetable Check (User Data)
-    if student_id and any(k in query.lower() for k in ["class", "schedule", "timetable", "when is"]):
-        tt = user_storage.get_user_timetable(student_id)
-        if tt:
-            res = timetable_extractor.search_timetable(tt, query)
-            if res: return res
+    res = _answer_from_timetable(query, student_id)
+    if res: return res
 
     # 3. Retrieve
     context = retrieve_context(query)
@@ -184,8 +274,8 @@ def answer_question(query: str, student_id: str = None) -> str:
         return "Information not available in university records."
 
     # 4. Generate (Router decides LLM)
-    prompt = f"Context:\n{context}\n\nQuestion: {query}\nAnswer:"
-    response = get_llm().invoke(prompt).content
+    prompt = build_prompt(context, query)
+    response = get_llm(student_id).invoke(prompt).content
     
     # 5. Cache & Return
     cache_manager.set_to_cache(query, response)
@@ -193,28 +283,49 @@ def answer_question(query: str, student_id: str = None) -> str:
 
 
 # --- STREAMING ---
-async def answer_question_stream(query: str, student_id: str = None):
+async def answer_question_stream(query: str, student_id: str = None, retrieve=None):
+    """
+    Streams the answer. `retrieve` is an async fn(query) -> context that replaces
+    the in-process retrieve_context (e.g. search_documents on a shared MCP server).
+    """
     # 1. Cache
     cached = cache_manager.get_from_cache(query)
     if cached: 
         yield cached
         return
 
-    # 2. Retrieve
-    context = retrieve_context(query)
+    # 2. Timetable Check (User Data)
+    res = _answer_from_timetable(query, student_id)
+    if res:
+        yield res
+        return
+
+    # 3-5. Retrieve, generate and cache; the same question already being
+    # answered for someone else is joined instead of generated twice
+    async for text in stream_share.share(query, lambda: _generate_stream(query, student_id, retrieve)):
+        yield text
+
+
+_DONE = object()
+
+async def _generate_stream(query: str, student_id: str = None, retrieve=None):
+    # 3. Retrieve
+    context = await (retrieve(query) if retrieve else asyncio.to_thread(retrieve_context, query))
     if not context:
         yield "Information not available."
         return
 
-    # 3. Generate Stream
-    prompt = f"Context:\n{context}\n\nQuestion: {query}\nAnswer:"
+    # 4. Generate Stream (pulled in a thread, so other requests keep running and
+    # followers of this stream get each token as it arrives)
+    prompt = build_prompt(context, query)
     full_response = ""
-    for chunk in get_llm().stream(prompt):
+    chunks = iter(get_llm(student_id).stream(prompt))
+    while (chunk := await asyncio.to_thread(next, chunks, _DONE)) is not _DONE:
         if hasattr(chunk, 'content') and chunk.content:
             text = chunk.content
             full_response += text
             yield text
             
-    # 4. Cache
+    # 5. Cache
     if full_response:
          cache_manager.set_to_cache(query, full_response)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import re
+import time
+import asyncio
+import logging
+
+from src.config import AGENT_SPECULATIVE_SEARCH, AGENT_SPECULATIVE_MATCH
+
+logger = logging.getLogger("uni-agent")
+
+# Speculative retrieval for the ReAct agent: the first LLM call almost always
+# ends in `Action: search_documents` for a factual question, so the search for
+# the user's own words starts while the model is still generating. If the model
+# asks for a matching search the finished (or half-finished) result is reused;
+# otherwise it is cancelled and counted as waste.
+SEARCH_TOOL = "search_documents"
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "what", "when", "where", "which", "who", "how",
+    "do", "does", "can", "could", "should", "will", "would", "i", "we", "you", "it", "of", "for", "to",
+    "in", "on", "at", "by", "from", "about", "and", "or", "tell", "me", "please", "there", "any",
+}
+# Questions about the student's own records go to query_database / check_eligibility instead
+_PERSONAL = {"my", "mine", "eligible", "eligibility", "timetable", "profile", "attendance", "cgpa"}
+
+STATS = {"started": 0, "used": 0, "wasted": 0, "saved_seconds": 0.0}
+
+
+def _words(text: str) -> set:
+    # crude plural folding so "sundays" matches "sunday"
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w
+            for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def should_speculate(query: str) -> bool:
+    if not AGENT_SPECULATIVE_SEARCH:
+        return False
+    words = set(_WORD_RE.findall(query.lower()))
+    # greetings and one-word replies ("hi", "thanks") aren't worth a search
+    return len(_words(query)) >= 2 and not (words & _PERSONAL)
+
+
+def queries_match(user_query: str, search_query: str, threshold: float = AGENT_SPECULATIVE_MATCH) -> bool:
+    """True if most of the model's search words come from the user's question."""
+    asked, searched = _words(user_query), _words(search_query)
+    if not searched:
+        return False
+    return len(asked & searched) / len(searched) >= threshold
+
+
+class SpeculativeSearch:
+    """search_documents(query) running in the background on an MCP client."""
+
+    def __init__(self, mcp, query: str):
+        self.query = query
+        self.partials = []
+        self.started = time.perf_counter()
+        self.finished = None
+        self.settled = False  # reused or discarded
+        self.task = asyncio.ensure_future(self._run(mcp))
+        STATS["started"] += 1
+
+    async def _run(self, mcp):
+        async for kind, payload in mcp.call_tool_stream(SEARCH_TOOL, {"query": self.query}):
+            if kind == "partial":
+                self.partials.append(payload)
+            else:
+                self.finished = time.perf_counter()
+                return payload
+
+    def matches(self, actions: list) -> bool:
+        return (len(actions) == 1 and actions[0][0] == SEARCH_TOOL
+                and queries_match(self.query, str(actions[0][1].get("query", ""))))
+
+    async def result(self):
+        """The CallToolResult; records how much of the search overlapped the LLM call."""
+        requested = time.perf_counter()
+        self.settled = True
+        result = await self.task
+        saved = (min(self.finished, requested) if self.finished else requested) - self.started
+        STATS["used"] += 1
+        STATS["saved_seconds"] += saved
+        logger.info(f"⚡ Speculative search reused ({saved * 1000:.0f} ms saved)")
+        return result
+
+    def close(self, reason: str = "") -> None:
+        """Discards the search unless it was reused (cancelling it if still running)."""
+        if self.settled:
+            return
+        self.settled = True
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            self.task.exception()  # retrieve it so a failed search isn't logged as unhandled
+        STATS["wasted"] += 1
+        logger.info(f"🗑️ Speculative search discarded{': ' + reason if reason else ''}")
+
+
+def start(mcp, query: str):
+    """A SpeculativeSearch for `query`, or None when the question isn't a document lookup."""
+    return SpeculativeSearch(mcp, query) if should_speculate(query) else None
+
+
+def stats() -> dict:
+    """Counters since startup: searches started / reused / discarded, waste rate, seconds saved."""
+    done = STATS["used"] + STATS["wasted"]
+    return dict(STATS, waste_rate=STATS["wasted"] / done if done else 0.0)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import sys
+import time
+
+from src.config import SSE_FLUSH_INTERVAL, SSE_FLUSH_BYTES, SSE_HEARTBEAT_INTERVAL
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx / Render)
+}
+
+_END = object()
+
+
+def format_event(data: dict, event: str = None) -> str:
+    """
+    Serialize one Server-Sent Event.
+    json.dumps escapes newlines, so the payload always fits on one `data:` line.
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+class StreamStats:
+    """Per-answer counters for the SSE transport."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_frame_at = None
+        self.tokens = 0
+        self.frames = 0
+        self.heartbeats = 0
+        self.bytes = 0
+
+    def record_frame(self, frame: str):
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+        self.frames += 1
+        self.bytes += len(frame.encode("utf-8"))
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        ttfb = (self.first_frame_at - self.started) if self.first_frame_at else None
+        return {
+            "tokens": self.tokens,
+            "events": self.frames,
+            "heartbeats": self.heartbeats,
+            "bytes": self.bytes,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "ttfb_ms": round(ttfb * 1000, 1) if ttfb is not None else None,
+            "tokens_per_sec": round(self.tokens / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+async def sse_stream(chunks, flush_interval: float = SSE_FLUSH_INTERVAL,
+                     flush_bytes: int = SSE_FLUSH_BYTES,
+                     heartbeat_interval: float = SSE_HEARTBEAT_INTERVAL,
+                     stats: StreamStats = None):
+    """
+    Wrap an async iterator of text chunks into SSE frames.
+
+    The first chunk is sent immediately (low time-to-first-byte); later chunks are
+    coalesced into one `{"chunk": ...}` event until `flush_interval` seconds have
+    passed since the oldest buffered chunk or `flush_bytes` UTF-8 bytes are buffered.
+    While the producer is silent, a `heartbeat` event is sent every
+    `heartbeat_interval` seconds so proxies keep the connection open.
+    Ends with `{"done": true, "stats": {...}}` or `{"error": ...}`.
+    """
+    stats = stats or StreamStats()
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(pump())
+    buffer = []
+    buffered_bytes = 0
+    buffered_since = 0.0
+    last_sent = time.monotonic()
+
+    def flush():
+        nonlocal buffer, buffered_bytes, last_sent
+        frame = format_event({"chunk": "".join(buffer)})
+        buffer = []
+        buffered_bytes = 0
+        last_sent = time.monotonic()
+        stats.record_frame(frame)
+        return frame
+
+    try:
+        while True:
+            now = time.monotonic()
+            if buffer:
+                timeout = max(0.0, buffered_since + flush_interval - now)
+            else:
+                timeout = max(0.0, last_sent + heartbeat_interval - now)
+
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if buffer:
+                    yield flush()
+                else:
+                    frame = format_event({"ts": time.time()}, event="heartbeat")
+                    last_sent = time.monotonic()
+                    stats.heartbeats += 1
+                    yield frame
+                continue
+
+            if item is _END:
+                break
+
+            if isinstance(item, Exception):
+                if buffer:
+                    yield flush()
+                print(f"❌ SSE: Stream failed: {item}", file=sys.stderr)
+                yield format_event({"error": str(item)})
+                return
+
+            if not item:
+                continue
+
+            stats.tokens += 1
+            if not buffer:
+                buffered_since = time.monotonic()
+            buffer.append(item)
+            buffered_bytes += len(item.encode("utf-8"))
+
+            # First frame goes out at once; afterwards respect the byte budget
+            if stats.frames == 0 or buffered_bytes >= flush_bytes:
+                yield flush()
+
+        if buffer:
+            yield flush()
+
+        summary = stats.summary()
+        print(
+            f"📡 SSE: {summary['tokens']} tokens in {summary['events']} events "
+            f"({summary['bytes']} B, {summary['elapsed_ms']} ms, "
+            f"TTFB {summary['ttfb_ms']} ms, {summary['tokens_per_sec']} tok/s)",
+            file=sys.stderr
+        )
+        yield format_event({"done": True, "stats": summary})
+    finally:
+        producer.cancel()
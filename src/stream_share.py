@@ -0,0 +1,76 @@
+import sys
+import asyncio
+
+# In-flight generation sharing: a second request for an answer that is still
+# being generated attaches to the first generation instead of starting its own.
+# It gets the chunks produced so far, then follows live. The generation runs in
+# its own task, so it finishes (and reaches the cache) even if the request that
+# started it disconnects. Answers are committed to the cache by the producing
+# generator itself, before the entry leaves INFLIGHT, so there is no gap between
+# "in flight" and "cached" for a request to fall through.
+INFLIGHT = {}
+STATS = {"started": 0, "joined": 0}
+
+
+class SharedStream:
+    """One generation (an async iterator of text chunks) fanned out to any number of followers."""
+
+    def __init__(self, key: str, chunks):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._produce(chunks))
+
+    async def _produce(self, chunks):
+        try:
+            async for chunk in chunks:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            print(f"❌ Shared stream failed: {e}", file=sys.stderr)
+            self.error = e
+        finally:
+            self.done = True
+            if INFLIGHT.get(self.key) is self:
+                del INFLIGHT[self.key]
+            self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self):
+        """Every chunk from the first one, live; re-raises the generation's error."""
+        i = 0
+        while True:
+            if i < len(self.chunks):
+                i += 1
+                yield self.chunks[i - 1]
+            elif self.done:
+                if self.error:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+async def share(key: str, make_stream):
+    """
+    Streams make_stream() (an async generator factory), or joins the identical
+    generation already running under `key`.
+    """
+    stream = INFLIGHT.get(key)
+    if stream is None:
+        stream = INFLIGHT[key] = SharedStream(key, make_stream())
+        STATS["started"] += 1
+    else:
+        STATS["joined"] += 1
+    async for chunk in stream.follow():
+        yield chunk
+
+
+def stats() -> dict:
+    """Generations started / requests that joined one in flight, and how many are running now."""
+    return dict(STATS, inflight=len(INFLIGHT))
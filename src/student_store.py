@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Optional
+
+# Documents kept per student (one row each)
+KINDS = ("profile", "timetable", "timetable_index", "academic_record")
+
+_MISSING = object()
+
+_UPSERT_SQL = (
+    "INSERT INTO student_docs (student_id, kind, data, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (student_id, kind) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at"
+)
+_BUMP_VERSION_SQL = (
+    "INSERT INTO student_versions (student_id, version) VALUES (?, 1) "
+    "ON CONFLICT (student_id) DO UPDATE SET version = version + 1"
+)
+
+
+class StudentStore:
+    """
+    SQLite-backed store for per-student JSON documents.
+
+    - WAL mode: readers never block on the single writer.
+    - One connection per thread; sqlite3 caches the prepared statements.
+    - In-process LRU read-through cache (negative hits included), invalidated
+      on local writes and when another process commits (PRAGMA data_version).
+    - Per-student version counter, bumped in the same transaction as the
+      student's documents, for caches of derived results.
+    """
+
+    def __init__(self, db_path: str, cache_size: int = 4096):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        # Bumped on every invalidation so a read racing a write never caches stale data
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS student_docs ("
+            " student_id TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL,"
+            " PRIMARY KEY (student_id, kind)"
+            ") WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS student_versions ("
+            " student_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    def _check_external_writes(self, conn: sqlite3.Connection):
+        # data_version changes when *another* connection commits. Its values are only
+        # comparable within one connection, so a thread's new connection has no
+        # baseline: commits since the cache was filled can't be ruled out, so its
+        # first check counts as a change.
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._local.data_version:
+            self.clear_cache()
+        self._local.data_version = version
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def version(self, student_id: str) -> int:
+        """Changes whenever one of the student's documents is written, from any process (one indexed read)."""
+        row = self._conn().execute(
+            "SELECT version FROM student_versions WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def iter_kind(self, kind: str):
+        """
+        Yields (student_id, version, data) for every stored document of one kind.
+        One SELECT reads a consistent snapshot, so each version matches its data;
+        the LRU cache is bypassed.
+        """
+        rows = self._conn().execute(
+            "SELECT d.student_id, COALESCE(v.version, 0), d.data FROM student_docs d"
+            " LEFT JOIN student_versions v ON v.student_id = d.student_id WHERE d.kind = ?", (kind,)
+        ).fetchall()
+        for student_id, version, raw in rows:
+            yield student_id, version, json.loads(raw)
+
+    def get_raw(self, student_id: str, kind: str) -> Optional[str]:
+        """Returns the stored JSON text (or None)."""
+        conn = self._conn()
+        self._check_external_writes(conn)
+        key = (student_id, kind)
+
+        with self._cache_lock:
+            cached = self._cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            generation = self._generation
+
+        row = conn.execute(
+            "SELECT data FROM student_docs WHERE student_id = ? AND kind = ?", key
+        ).fetchone()
+        value = row[0] if row else None
+
+        with self._cache_lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._cache[key] = value
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def get(self, student_id: str, kind: str) -> Optional[Any]:
+        raw = self.get_raw(student_id, kind)
+        # Parsed per call so callers can mutate the result freely
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, student_id: str, kind: str, data: Any):
+        with self.transaction() as txn:
+            txn.put(student_id, kind, data)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Read-modify-write under BEGIN IMMEDIATE (one writer at a time, across
+        processes). Yields a handle with get(student_id, kind) / put(student_id, kind, data);
+        everything commits together or not at all.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        txn = _Transaction(conn)
+        try:
+            yield txn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            with self._cache_lock:
+                for key in txn.touched:
+                    self._cache.pop(key, None)
+                self._generation += 1
+
+    def put_many(self, rows):
+        """Bulk upsert of (student_id, kind, data) in one transaction."""
+        now = datetime.now().isoformat()
+        conn = self._conn()
+        rows = list(rows)
+        with conn:
+            conn.executemany(
+                _UPSERT_SQL,
+                ((sid, kind, json.dumps(data, separators=(",", ":")), now) for sid, kind, data in rows)
+            )
+            conn.executemany(_BUMP_VERSION_SQL, ((sid,) for sid in {sid for sid, _, _ in rows}))
+        self.clear_cache()
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM student_docs").fetchone()[0]
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.touched = set()
+
+    def get(self, student_id: str, kind: str) -> Optional[Any]:
+        row = self.conn.execute(
+            "SELECT data FROM student_docs WHERE student_id = ? AND kind = ?", (student_id, kind)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, student_id: str, kind: str, data: Any):
+        self.conn.execute(
+            _UPSERT_SQL,
+            (student_id, kind, json.dumps(data, separators=(",", ":")), datetime.now().isoformat())
+        )
+        if not any(sid == student_id for sid, _ in self.touched):
+            self.conn.execute(_BUMP_VERSION_SQL, (student_id,))  # once per transaction
+        self.touched.add((student_id, kind))
+
+
+def import_json_tree(store: StudentStore, users_dir: str, batch_size: int = 1000) -> int:
+    """
+    Bulk-imports ./data/users/<id>/{profile,timetable,academic_record}.json.
+    Unreadable files are reported and skipped. Returns the number of documents.
+    """
+    if not os.path.isdir(users_dir):
+        return 0
+
+    start = time.time()
+    batch, total = [], 0
+    for student_id in sorted(os.listdir(users_dir)):
+        student_dir = os.path.join(users_dir, student_id)
+        if not os.path.isdir(student_dir):
+            continue
+        for kind in KINDS:
+            path = os.path.join(student_dir, f"{kind}.json")
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    batch.append((student_id, kind, json.load(f)))
+            except Exception as e:
+                print(f"⚠️ Student Store: Skipping {path}: {e}", file=sys.stderr)
+                continue
+            if len(batch) >= batch_size:
+                store.put_many(batch)
+                total += len(batch)
+                batch = []
+
+    if batch:
+        store.put_many(batch)
+        total += len(batch)
+
+    print(f"✅ Student Store: Imported {total} document(s) from {users_dir} ({time.time() - start:.2f}s)", file=sys.stderr)
+    return total
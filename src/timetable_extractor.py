@@ -1,14 +1,36 @@
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 from typing import Dict, List, Any
 import time
 import json
+from src.lazy_import import lazy_module
+from src import timetable_index
+from src.timetable_parser import parse_timetable_pdf
+from src.config import TIMETABLE_LOCAL_PARSER, TIMETABLE_PARSE_MIN_CONFIDENCE
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# google.generativeai is slow to import; it is imported and configured on first use
+genai = lazy_module("google.generativeai", on_load=lambda m: m.configure(api_key=os.getenv("GOOGLE_API_KEY")))
 
 def extract_timetable_from_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Extract timetable data from PDF: local grid parser first (LPU timetables are
+    machine-generated), Gemini Vision only when the local parse is not confident
+    """
+    if TIMETABLE_LOCAL_PARSER:
+        try:
+            result = parse_timetable_pdf(pdf_path)
+            if result["schedule"] and result["confidence"] >= TIMETABLE_PARSE_MIN_CONFIDENCE:
+                return result
+            print(f"⚠️ Local parse confidence {result['confidence']:.2f}, falling back to Gemini")
+        except Exception as e:
+            print(f"⚠️ Local parse failed ({e}), falling back to Gemini")
+    
+    result = extract_timetable_with_gemini(pdf_path)
+    result["source"] = "gemini"
+    return result
+
+def extract_timetable_with_gemini(pdf_path: str) -> Dict[str, Any]:
     """
     Extract timetable data from PDF using Gemini Vision API with two-step approach
     """
@@ -18,10 +40,12 @@ def extract_timetable_from_pdf(pdf_path: str) -> Dict[str, Any]:
     uploaded_file = genai.upload_file(path=pdf_path, display_name="Timetable")
     print(f"✅ Uploaded: {uploaded_file.name}")
     
-    # Wait for processing
+    # Wait for processing (runs in a timetable_jobs worker thread, not the request)
+    poll_interval = 0.5
     while uploaded_file.state.name == "PROCESSING":
         print("⏳ Processing...")
-        time.sleep(2)
+        time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, 4)
         uploaded_file = genai.get_file(uploaded_file.name)
     
     if uploaded_file.state.name == "FAILED":
@@ -104,9 +128,13 @@ def extract_timetable_from_pdf(pdf_path: str) -> Dict[str, Any]:
         print(f"❌ Extraction error: {e}")
         return {"schedule": [], "error": str(e)}
 
-def search_timetable(timetable_data: Dict[str, Any], query: str) -> str:
+# How timetable questions were answered (local index vs Gemini)
+QUERY_STATS = {"local": 0, "llm": 0}
+
+def search_timetable(timetable_data: Dict[str, Any], query: str, index: Dict[str, Any] = None) -> str:
     """
-    Search timetable using LLM for intelligent query understanding
+    Answer a timetable question: deterministic index lookup first,
+    LLM only for questions the intent parser cannot handle
     """
     if not timetable_data or "schedule" not in timetable_data:
         return "No timetable data available."
@@ -116,6 +144,11 @@ def search_timetable(timetable_data: Dict[str, Any], query: str) -> str:
     if not schedule:
         return "Your timetable appears to be empty."
     
+    answer = timetable_index.answer_query(index or timetable_index.build_index(timetable_data), query)
+    if answer:
+        QUERY_STATS["local"] += 1
+        return answer
+    
     # Convert schedule to readable text context for LLM
     schedule_context = "Student's Class Schedule:\n\n"
     for entry in schedule:
@@ -147,6 +180,7 @@ Instructions:
 
 Answer the user's question now:"""
         
+        QUERY_STATS["llm"] += 1
         response = model.generate_content(system_prompt)
         print(f"✅ LLM response received")
         return response.text
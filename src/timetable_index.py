@@ -0,0 +1,255 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from src.config import TIMETABLE_TZ, TIMETABLE_DAY_START, TIMETABLE_DAY_END
+
+INDEX_VERSION = 1
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DAY_ALIASES = {d[:3]: d for d in DAYS}
+DAY_ALIASES.update({"tues": "tuesday", "wed": "wednesday", "thur": "thursday", "thurs": "thursday"})
+
+_TIME_RE = re.compile(
+    r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?",
+    re.IGNORECASE
+)
+_COURSE_RE = re.compile(r"\b([a-z]{2,4}\s?\d{2,3}[a-z]?)\b", re.IGNORECASE)
+_ROOM_RE = re.compile(r"\b(\d{1,3}-\d{2,4}[a-z]?)\b", re.IGNORECASE)
+
+
+# --- TIME PARSING ---
+def _to_24h(hour: int, meridiem: Optional[str]) -> int:
+    if meridiem == "pm" and hour != 12:
+        return hour + 12
+    if meridiem == "am" and hour == 12:
+        return 0
+    return hour
+
+
+def parse_time_range(text: str) -> Optional[tuple]:
+    """
+    "01-02 PM" -> (780, 840) minutes since midnight.
+    LPU slots carry one meridiem for the end time ("11-12 AM" is 11:00-12:00,
+    "12-01 PM" is 12:00-13:00), so the start is derived from the slot length.
+    """
+    m = _TIME_RE.search(text or "")
+    if not m:
+        return None
+    h1, m1, mer1, h2, m2, mer2 = m.groups()
+    h1, h2 = int(h1), int(h2)
+    m1, m2 = int(m1 or 0), int(m2 or 0)
+    mer1 = mer1.lower() if mer1 else None
+    mer2 = mer2.lower() if mer2 else None
+
+    if mer1 and mer2:
+        start, end = _to_24h(h1, mer1) * 60 + m1, _to_24h(h2, mer2) * 60 + m2
+    else:
+        if mer2:
+            end_hour = 12 if h2 == 12 else _to_24h(h2, mer2)
+        else:
+            # No meridiem: assume a daytime academic slot (1-7 means afternoon)
+            end_hour = h2 + 12 if h2 < 8 else h2
+        end = end_hour * 60 + m2
+        duration = ((h2 * 60 + m2) - (h1 * 60 + m1)) % (12 * 60) or 60
+        start = end - duration
+    return (start, end) if end > start else None
+
+
+def _fmt_minutes(minutes: int) -> str:
+    hour, minute = divmod(minutes, 60)
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {suffix}"
+
+
+# --- INDEX ---
+def build_index(timetable_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Precomputes lookup tables for a student's schedule (done once at upload).
+    Slots are sorted by (day, start); the maps hold positions into `slots`.
+    """
+    slots = []
+    for entry in (timetable_data or {}).get("schedule", []):
+        day = DAY_ALIASES.get(str(entry.get("day", "")).strip().lower()[:3])
+        span = parse_time_range(str(entry.get("time", "")))
+        if not day or not span:
+            continue
+        slots.append({
+            **entry,
+            "day_idx": DAYS.index(day),
+            "start": span[0],
+            "end": span[1],
+        })
+    slots.sort(key=lambda s: (s["day_idx"], s["start"]))
+
+    by_day, by_course, by_room = {}, {}, {}
+    for pos, slot in enumerate(slots):
+        by_day.setdefault(DAYS[slot["day_idx"]], []).append(pos)
+        if slot.get("course_code"):
+            by_course.setdefault(_norm(slot["course_code"]), []).append(pos)
+        if slot.get("room"):
+            by_room.setdefault(_norm(slot["room"]), []).append(pos)
+
+    return {
+        "version": INDEX_VERSION,
+        "slots": slots,
+        "by_day": by_day,
+        "by_course": by_course,
+        "by_room": by_room,
+    }
+
+
+def _norm(value: str) -> str:
+    return re.sub(r"\s+", "", str(value)).lower()
+
+
+def _now() -> datetime:
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo(TIMETABLE_TZ))
+    except Exception:
+        return datetime.now()
+
+
+# --- INTENT PARSER ---
+# Rules that don't name a course or room only fire on explicit schedule context,
+# so "When is the library free?" or "Are all classes cancelled on Diwali?" fall
+# through instead of being answered with the student's own timetable.
+_CLASS_WORD = r"(?:class(?:es)?|lectures?|labs?|tutorials?|practicals?)"
+_FREE_RE = re.compile(
+    r"\bfree (?:slots?|periods?|time|hours?)\b|\b(?:am i|i am|i'm) free\b"
+    rf"|\b(?:gaps?|breaks?) (?:in|between) (?:my )?(?:{_CLASS_WORD}|timetable|schedule)\b"
+)
+_NEXT_RE = re.compile(rf"\b(?:next|upcoming) {_CLASS_WORD}\b")
+_DAY_RE = re.compile(rf"\b{_CLASS_WORD}\b|\b(?:schedule|timetable)\b|\bdo i have\b|\bam i busy\b")
+_WEEK_RE = re.compile(
+    r"\b(?:my|full|whole|entire|weekly|class) (?:timetable|schedule)\b|\bmy week\b"
+    rf"|\b(?:all|full|whole|entire) (?:of )?my {_CLASS_WORD}\b|\bmy {_CLASS_WORD} (?:this|for the|for this) week\b"
+)
+_SCHEDULE_RE = re.compile(rf"\b(?:my|next|today'?s|tomorrow'?s) {_CLASS_WORD}\b|\btimetable\b|\bmy schedule\b")
+
+
+def _course_positions(index: Dict[str, Any], query: str) -> Optional[List[int]]:
+    for candidate in _COURSE_RE.findall(query):
+        positions = index["by_course"].get(_norm(candidate))
+        if positions:
+            return positions
+    return None
+
+
+def is_schedule_question(index: Dict[str, Any], query: str) -> bool:
+    """True if the question is clearly about the student's own classes (worth an LLM call over the timetable)."""
+    q = query.lower()
+    if any(rule.search(q) for rule in (_SCHEDULE_RE, _FREE_RE, _NEXT_RE, _WEEK_RE)):
+        return True
+    return bool(index and index.get("slots") and _course_positions(index, query))
+
+
+def _mentioned_day(query_lower: str, now: datetime) -> Optional[str]:
+    if "tomorrow" in query_lower:
+        return DAYS[(now.weekday() + 1) % 7]
+    if "today" in query_lower or "tonight" in query_lower:
+        return DAYS[now.weekday()]
+    for word in re.findall(r"[a-z]+", query_lower):
+        if word in DAYS:
+            return word
+        if word in DAY_ALIASES:
+            return DAY_ALIASES[word]
+    return None
+
+
+def _slots(index: Dict[str, Any], positions: List[int]) -> List[Dict[str, Any]]:
+    return [index["slots"][p] for p in positions]
+
+
+def _format(slots: List[Dict[str, Any]]) -> str:
+    from src.timetable_extractor import format_schedule
+    return format_schedule(slots)
+
+
+def _free_slots(index: Dict[str, Any], day: str) -> List[tuple]:
+    gaps, cursor = [], TIMETABLE_DAY_START
+    for slot in _slots(index, index["by_day"].get(day, [])):
+        if slot["start"] > cursor:
+            gaps.append((cursor, slot["start"]))
+        cursor = max(cursor, slot["end"])
+    if cursor < TIMETABLE_DAY_END:
+        gaps.append((cursor, TIMETABLE_DAY_END))
+    return gaps
+
+
+def _next_class(slots: List[Dict[str, Any]], now: datetime) -> Optional[Dict[str, Any]]:
+    minute_of_week = now.weekday() * 1440 + now.hour * 60 + now.minute
+    best, best_delta = None, None
+    for slot in slots:
+        delta = (slot["day_idx"] * 1440 + slot["start"] - minute_of_week) % (7 * 1440)
+        if best_delta is None or delta < best_delta:
+            best, best_delta = slot, delta
+    return best
+
+
+def answer_query(index: Dict[str, Any], query: str, now: datetime = None) -> Optional[str]:
+    """
+    Answers common timetable questions from the index without an LLM.
+    Handles: next class, today/tomorrow/<day>, <course> room/timings, room
+    occupancy, free slots and the full week. Returns None when unsure.
+    """
+    if not index or not index.get("slots"):
+        return None
+    now = now or _now()
+    q = query.lower()
+    day = _mentioned_day(q, now)
+
+    # 1. Free slots
+    if _FREE_RE.search(q):
+        day = day or DAYS[now.weekday()]
+        gaps = _free_slots(index, day)
+        if not gaps:
+            return f"🗓️ No free slots on {day.capitalize()} between {_fmt_minutes(TIMETABLE_DAY_START)} and {_fmt_minutes(TIMETABLE_DAY_END)}."
+        lines = [f"   🟢 {_fmt_minutes(a)} - {_fmt_minutes(b)}" for a, b in gaps]
+        return f"🗓️ **Your free slots on {day.capitalize()}:**\n\n" + "\n".join(lines)
+
+    course_positions = _course_positions(index, query)
+
+    # 2. Next class, optionally of one course ("next Monday" is a day question, handled below)
+    if (_NEXT_RE.search(q) or (course_positions and re.search(r"\bnext\b|\bupcoming\b", q))) \
+            and (not day or "today" in q):
+        slot = _next_class(_slots(index, course_positions) if course_positions else index["slots"], now)
+        return "⏭️ **Your next class:**\n\n" + _format([slot])
+
+    # 3. Specific course ("INT374 room", "when is PEV301")
+    if course_positions:
+        slots = _slots(index, course_positions)
+        code = slots[0]["course_code"]
+        if day:
+            slots = [s for s in slots if DAYS[s["day_idx"]] == day]
+            if not slots:
+                return f"📭 No {code} class on {day.capitalize()}."
+        if re.search(r"\broom\b|\bwhere\b|\bvenue\b", q):
+            rooms = {}
+            for s in slots:
+                rooms.setdefault(s.get("room", "N/A"), set()).add(s.get("type", "Class"))
+            lines = [f"   🚪 {room} ({', '.join(sorted(types))})" for room, types in rooms.items()]
+            return f"📍 **{code} is held in:**\n\n" + "\n".join(lines)
+        return f"📚 **{code} schedule:**\n\n" + _format(slots)
+
+    # 4. Room occupancy ("what's in 37-606")
+    room_match = _ROOM_RE.search(query)
+    if room_match and _norm(room_match.group(1)) in index["by_room"]:
+        slots = _slots(index, index["by_room"][_norm(room_match.group(1))])
+        if day:
+            slots = [s for s in slots if DAYS[s["day_idx"]] == day]
+        return f"🚪 **Your classes in {room_match.group(1)}:**\n\n" + _format(slots)
+
+    # 5. A day's schedule
+    if day and _DAY_RE.search(q):
+        slots = _slots(index, index["by_day"].get(day, []))
+        if not slots:
+            return f"🎉 No classes on {day.capitalize()}."
+        return f"📅 **Your {day.capitalize()} Schedule:**\n\n" + _format(slots)
+
+    # 6. Whole week ("show my timetable", "all my classes this week")
+    if _WEEK_RE.search(q):
+        return "📅 **Your Weekly Schedule:**\n\n" + _format(index["slots"])
+
+    return None
@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+from src.config import (
+    TIMETABLE_JOB_WORKERS, TIMETABLE_JOB_QUEUE_SIZE, TIMETABLE_JOB_RETRIES,
+    TIMETABLE_JOB_BACKOFF, TIMETABLE_CACHE_DIR
+)
+
+# Finished jobs are kept this long for status polling
+JOB_TTL = 3600
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the extraction backlog is full (callers answer 429)."""
+
+
+def content_hash(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+class TimetableJobQueue:
+    """
+    Background pipeline for timetable PDF extraction.
+
+    - submit() returns a job at once; a bounded pool of asyncio workers runs the
+      blocking extractor in threads, so the upload request never waits on Gemini.
+    - Failed attempts are retried with exponential backoff + jitter.
+    - Results are keyed by the PDF's SHA-256: classmates uploading the same
+      section timetable reuse one extraction (finished or still in flight).
+    - Status via get(job_id); wait(job_id, timeout) long-polls for completion.
+
+    extract_fn(pdf_path) -> {"schedule": [...]} and save_fn(student_id, data, pdf_path)
+    default to the Gemini extractor and user_storage; tests inject their own.
+    """
+
+    def __init__(self, extract_fn: Callable = None, save_fn: Callable = None,
+                 workers: int = TIMETABLE_JOB_WORKERS, queue_size: int = TIMETABLE_JOB_QUEUE_SIZE,
+                 retries: int = TIMETABLE_JOB_RETRIES, backoff: float = TIMETABLE_JOB_BACKOFF,
+                 cache_dir: Optional[str] = TIMETABLE_CACHE_DIR):
+        self.extract_fn = extract_fn or _default_extract
+        self.save_fn = save_fn or _default_save
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_dir = cache_dir
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"submitted": 0, "extracted": 0, "deduplicated": 0, "retries": 0, "failed": 0}
+        self._results: Dict[str, Dict[str, Any]] = {}     # content hash -> extracted timetable
+        self._inflight: Dict[str, asyncio.Future] = {}    # content hash -> pending extraction
+        self._events: Dict[str, asyncio.Event] = {}
+        self._queue = None
+        self._tasks = []
+
+    # --- LIFECYCLE ---
+    def start(self):
+        """Starts the worker pool on the running loop (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"🧵 Timetable Jobs: {self.workers} worker(s) started", file=sys.stderr)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- API ---
+    def check_capacity(self, pdf_bytes: bytes):
+        """Raises QueueFullError if submit() would reject this PDF right now."""
+        self.start()
+        digest = content_hash(pdf_bytes)
+        if self._cached_result(digest) is None and digest not in self._inflight and self._queue.full():
+            raise QueueFullError("Timetable extraction queue is full, try again shortly")
+
+    async def submit(self, student_id: str, pdf_path: str, pdf_bytes: bytes) -> Dict[str, Any]:
+        """Registers an extraction job for an already saved PDF and returns its record."""
+        self.start()
+        self._expire_jobs()
+        digest = content_hash(pdf_bytes)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "student_id": student_id,
+            "content_hash": digest,
+            "status": "queued",
+            "attempts": 0,
+            "deduplicated": False,
+            "classes": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+        }
+
+        self.check_capacity(pdf_bytes)
+        cached = self._cached_result(digest)
+
+        self.jobs[job["job_id"]] = job
+        self._events[job["job_id"]] = asyncio.Event()
+        self.stats["submitted"] += 1
+
+        if cached is not None:
+            # Same PDF extracted before: reuse without touching the queue
+            job["deduplicated"] = True
+            self.stats["deduplicated"] += 1
+            await self._finish(job, pdf_path, cached)
+        elif digest in self._inflight:
+            # Same PDF currently extracting: piggyback on that attempt
+            job["deduplicated"] = True
+            self.stats["deduplicated"] += 1
+            asyncio.create_task(self._follow(job, pdf_path, self._inflight[digest]))
+        else:
+            self._inflight[digest] = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait((job, pdf_path))
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def wait(self, job_id: str, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Long-poll: returns the job once finished, or its current state after timeout."""
+        event = self._events.get(job_id)
+        if event is None:
+            return self.get(job_id)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "inflight": len(self._inflight),
+        }
+
+    # --- WORKERS ---
+    async def _worker(self, worker_id: int):
+        while True:
+            job, pdf_path = await self._queue.get()
+            digest = job["content_hash"]
+            future = self._inflight[digest]
+            try:
+                result = await self._extract_with_retries(job, pdf_path)
+                self._store_result(digest, result)
+                self.stats["extracted"] += 1
+                future.set_result(result)
+                await self._finish(job, pdf_path, result)
+            except Exception as e:
+                self.stats["failed"] += 1
+                future.set_exception(e)
+                future.exception()  # mark retrieved; followers re-raise it themselves
+                self._fail(job, e)
+            finally:
+                self._inflight.pop(digest, None)
+                self._queue.task_done()
+
+    async def _extract_with_retries(self, job: Dict[str, Any], pdf_path: str) -> Dict[str, Any]:
+        job["status"] = "running"
+        for attempt in range(1, self.retries + 2):
+            job["attempts"] = attempt
+            try:
+                result = await asyncio.to_thread(self.extract_fn, pdf_path)
+                if not result or result.get("error") or not result.get("schedule"):
+                    raise RuntimeError((result or {}).get("error") or "No classes extracted")
+                return result
+            except Exception as e:
+                if attempt > self.retries:
+                    raise
+                delay = self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                self.stats["retries"] += 1
+                print(f"⚠️ Timetable Jobs: Attempt {attempt} failed ({e}), retrying in {delay:.1f}s", file=sys.stderr)
+                await asyncio.sleep(delay)
+
+    async def _follow(self, job: Dict[str, Any], pdf_path: str, future: asyncio.Future):
+        job["status"] = "running"
+        try:
+            result = await asyncio.shield(future)
+        except Exception as e:
+            self._fail(job, e)
+            return
+        await self._finish(job, pdf_path, result)
+
+    async def _finish(self, job: Dict[str, Any], pdf_path: str, result: Dict[str, Any]):
+        try:
+            await asyncio.to_thread(self.save_fn, job["student_id"], result, pdf_path)
+        except Exception as e:
+            self._fail(job, e)
+            return
+        job.update(status="done", classes=len(result.get("schedule", [])), finished_at=time.time())
+        print(f"✅ Timetable Jobs: {job['student_id']} -> {job['classes']} classes"
+              f"{' (deduplicated)' if job['deduplicated'] else ''}", file=sys.stderr)
+        self._events[job["job_id"]].set()
+
+    def _fail(self, job: Dict[str, Any], error: Exception):
+        job.update(status="failed", error=str(error), finished_at=time.time())
+        print(f"❌ Timetable Jobs: {job['student_id']} failed: {error}", file=sys.stderr)
+        self._events[job["job_id"]].set()
+
+    def _expire_jobs(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j for j, job in self.jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            self.jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+
+    # --- RESULT CACHE (by content hash) ---
+    def _cache_path(self, digest: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{digest}.json") if self.cache_dir else None
+
+    def _cached_result(self, digest: str) -> Optional[Dict[str, Any]]:
+        if digest in self._results:
+            return self._results[digest]
+        path = self._cache_path(digest)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._results[digest] = json.load(f)
+                return self._results[digest]
+            except Exception as e:
+                print(f"⚠️ Timetable Jobs: Ignoring unreadable cache {path}: {e}", file=sys.stderr)
+        return None
+
+    def _store_result(self, digest: str, result: Dict[str, Any]):
+        self._results[digest] = result
+        path = self._cache_path(digest)
+        if not path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def _default_extract(pdf_path: str) -> Dict[str, Any]:
+    from src.timetable_extractor import extract_timetable_from_pdf
+    return extract_timetable_from_pdf(pdf_path)
+
+
+def _default_save(student_id: str, timetable_data: Dict[str, Any], pdf_path: str):
+    from src import user_storage
+    user_storage.save_user_timetable(student_id, timetable_data, pdf_path)
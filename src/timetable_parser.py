@@ -0,0 +1,146 @@
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from src.timetable_index import DAYS, parse_time_range
+
+_CLASS_TYPES = ("Lecture", "Tutorial", "Practical")
+_ENTRY_RE = re.compile(r"(Lecture|Tutorial|Practical)\b(.*?)(?=(?:Lecture|Tutorial|Practical)\b|$)", re.DOTALL)
+_COURSE_RE = re.compile(r"C:\s*([A-Z]{2,5}\s*\d{2,3}[A-Z]?)")
+_ROOM_RE = re.compile(r"R:\s*(\d{1,3}\s*-\s*\d{2,4}[A-Z]?)")
+_SECTION_RE = re.compile(r"S:\s*([A-Z0-9]{3,8})")
+_GROUP_RE = re.compile(r"G:\s*(All|\d+)")
+_TIME_CELL_RE = re.compile(r"^\s*\d{1,2}(?::\d{2})?\s*-\s*\d{1,2}(?::\d{2})?\s*(?:AM|PM)\s*$", re.IGNORECASE)
+
+# Fragments this far left of a column's header x still belong to that column
+_COLUMN_SLACK = 4.0
+
+
+def _fragments(page) -> List[tuple]:
+    """(x, y, text) for every text run on the page, in PDF user space."""
+    runs = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if not text:
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        runs.append((x, y, text))
+
+    page.extract_text(visitor_text=visit)
+    return runs
+
+
+def _parse_cell(text: str) -> List[Dict[str, Any]]:
+    """ " Lecture / G:All C:INT234 / R: 37-606 / S:K23BR" -> one entry per class in the cell."""
+    entries = []
+    for class_type, body in _ENTRY_RE.findall(text):
+        course = _COURSE_RE.search(body)
+        room = _ROOM_RE.search(body)
+        section = _SECTION_RE.search(body)
+        entry = {
+            "type": class_type,
+            "course_code": re.sub(r"\s+", "", course.group(1)) if course else None,
+            "room": re.sub(r"\s+", "", room.group(1)) if room else None,
+            "section": section.group(1) if section else None,
+        }
+        group = _GROUP_RE.search(body)
+        if group and group.group(1) != "All":
+            entry["group"] = group.group(1)
+        if "makeup" in body.lower():
+            entry["note"] = "Makeup Class"
+        entries.append(entry)
+    return entries
+
+
+def _parse_grid(runs: List[tuple]) -> Optional[Dict[str, Any]]:
+    """Maps text runs onto the Timing x Day grid of one page (None if no grid)."""
+    headers = {}
+    timing_x = header_y = None
+    for x, y, text in runs:
+        label = text.strip().lower()
+        if label in DAYS and label not in headers:
+            headers[label] = x
+            header_y = y
+        elif label == "timing":
+            timing_x = x
+    if len(headers) < 5 or timing_x is None:
+        return None
+
+    columns = sorted(headers.items(), key=lambda item: item[1])
+    first_day_x = columns[0][1]
+    rows = sorted(
+        ((y, text.strip()) for x, y, text in runs
+         if x < first_day_x - _COLUMN_SLACK and y < header_y and _TIME_CELL_RE.match(text)),
+        reverse=True
+    )
+    if not rows:
+        return None
+    # Cells end where the next time label starts; the last row is as tall as the one above it
+    row_height = rows[0][0] - rows[1][0] if len(rows) > 1 else header_y - rows[0][0]
+    bottom = rows[-1][0] - row_height
+
+    cells: Dict[tuple, List[tuple]] = {}
+    for x, y, text in runs:
+        if y >= header_y or y <= bottom or x < first_day_x - _COLUMN_SLACK:
+            continue
+        day = next((d for d, cx in reversed(columns) if x >= cx - _COLUMN_SLACK), None)
+        row = next((label for ry, label in reversed(rows) if y <= ry + 1.0), None)
+        if day and row:
+            cells.setdefault((day, row), []).append((-y, x, text))
+
+    return {"columns": [d for d, _ in columns], "rows": [label for _, label in rows], "cells": cells}
+
+
+def parse_timetable_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Offline extractor for LPU's machine-generated timetable PDFs.
+
+    Rebuilds the day x time grid from text positions (pypdf), reads the
+    "C:" / "R:" / "S:" markers in each cell and returns the same
+    {"schedule": [...]} shape as the Gemini extractor, plus "confidence"
+    (share of class cells that parsed completely) and "source": "local".
+    """
+    from pypdf import PdfReader
+
+    start = time.perf_counter()
+    schedule, class_cells, complete_cells = [], 0, 0
+    grid_found = False
+
+    for page in PdfReader(pdf_path).pages:
+        grid = _parse_grid(_fragments(page))
+        if not grid:
+            continue
+        grid_found = True
+        for day in grid["columns"]:
+            for row in grid["rows"]:
+                parts = grid["cells"].get((day, row))
+                if not parts:
+                    continue
+                text = "".join(t for _, _, t in sorted(parts)).replace("\n", "")
+                if not any(t in text for t in _CLASS_TYPES) and "C:" not in text:
+                    continue  # empty / "Project Work" cells
+                class_cells += 1
+                entries = _parse_cell(text)
+                if entries and all(e["course_code"] and e["room"] for e in entries):
+                    complete_cells += 1
+                for entry in entries:
+                    if entry["course_code"]:
+                        schedule.append({"day": day.capitalize(), "time": row, **entry})
+
+    if not grid_found:
+        confidence = 0.0
+    elif class_cells == 0:
+        confidence = 0.5  # a grid with no classes is possible but worth a second opinion
+    else:
+        confidence = complete_cells / class_cells
+
+    # Sanity: every time label must parse, or rows may have been mislabelled
+    if any(parse_time_range(e["time"]) is None for e in schedule):
+        confidence = min(confidence, 0.5)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"📄 Local timetable parse: {len(schedule)} classes, confidence {confidence:.2f} ({elapsed_ms:.0f} ms)",
+          file=sys.stderr)
+    return {"schedule": schedule, "confidence": round(confidence, 3), "source": "local"}
@@ -0,0 +1,134 @@
+const chatMessages = document.getElementById('chatMessages');
+
+function appendMsg(text, type) {
+    const div = document.createElement('div');
+    div.className = `message ${type}-message`;
+    div.innerHTML = type === 'bot' ? marked.parse(text) : text;
+    chatMessages.appendChild(div);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+    return div;
+}
+
+// Incremental SSE parser: keeps partial reads buffered and only dispatches complete events
+function createSSEParser(onEvent) {
+    let buffer = '';
+    let eventType = 'message';
+    let dataLines = [];
+
+    function processLine(line) {
+        if(line === '') {
+            if(dataLines.length) onEvent(eventType, dataLines.join('\n'));
+            eventType = 'message';
+            dataLines = [];
+            return;
+        }
+        if(line.startsWith(':')) return;  // comment
+        const idx = line.indexOf(':');
+        const field = idx === -1 ? line : line.slice(0, idx);
+        let value = idx === -1 ? '' : line.slice(idx + 1);
+        if(value.startsWith(' ')) value = value.slice(1);
+        if(field === 'event') eventType = value;
+        else if(field === 'data') dataLines.push(value);
+    }
+
+    return {
+        push(text) {
+            buffer += text;
+            // A trailing lone \r may be the first half of \r\n, so leave it buffered
+            const lines = buffer.split(/\r\n|\n|\r(?!$)/);
+            buffer = lines.pop();
+            for(const line of lines) processLine(line);
+        }
+    };
+}
+
+async function sendMessage() {
+    const input = document.getElementById('chatInput');
+    const txt = input.value.trim();
+    if(!txt) return;
+
+    appendMsg(txt, 'user');
+    input.value = '';
+
+    const botDiv = appendMsg('...', 'bot');
+
+    try {
+        const res = await fetch('/ask_stream', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ question: txt, student_id: localStorage.getItem('studentId') || '12345' })
+        });
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let fullText = "";
+        botDiv.innerHTML = "";
+
+        const parser = createSSEParser((event, data) => {
+            if(event !== 'message') return;  // heartbeat etc.
+            const payload = JSON.parse(data);
+            if(payload.chunk) {
+                fullText += payload.chunk;
+                botDiv.innerHTML = marked.parse(fullText);
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if(payload.error) {
+                botDiv.innerHTML = "Error: " + payload.error;
+            }
+        });
+
+        while(true) {
+            const {value, done} = await reader.read();
+            if(done) break;
+            parser.push(decoder.decode(value, {stream:true}));
+        }
+        parser.push(decoder.decode());
+    } catch(e) {
+        botDiv.innerHTML = "Error: " + e.message;
+    }
+}
+
+// Voice Logic
+let recognition;
+let isListening = false;
+if('webkitSpeechRecognition' in window) {
+    recognition = new webkitSpeechRecognition();
+    recognition.continuous = false;
+    recognition.onresult = (e) => {
+        const txt = e.results[0][0].transcript;
+        document.getElementById('chatInput').value = txt;
+        sendMessage();
+    };
+    recognition.onend = () => { if(isListening) isListening = false; document.getElementById('micBtn').classList.remove('active'); };
+}
+
+function toggleVoice() {
+    if(!recognition) return alert("Browser not supported");
+    if(isListening) { recognition.stop(); }
+    else { recognition.start(); isListening = true; document.getElementById('micBtn').classList.add('active'); }
+}
+
+// Three.js Sphere (Simplified)
+const scene = new THREE.Scene();
+const camera = new THREE.PerspectiveCamera(75, 1, 0.1, 1000);
+const renderer = new THREE.WebGLRenderer({alpha:true});
+document.getElementById('canvas-container').appendChild(renderer.domElement);
+
+const geometry = new THREE.SphereGeometry(1, 32, 32);
+const material = new THREE.MeshBasicMaterial({color: 0xf47920, wireframe: true});
+const sphere = new THREE.Mesh(geometry, material);
+scene.add(sphere);
+camera.position.z = 2;
+
+function animate() {
+    requestAnimationFrame(animate);
+    sphere.rotation.x += 0.01;
+    sphere.rotation.y += 0.01;
+
+    const cont = document.getElementById('canvas-container');
+    renderer.setSize(cont.clientWidth, cont.clientHeight);
+    camera.aspect = cont.clientWidth / cont.clientHeight;
+    camera.updateProjectionMatrix();
+
+    renderer.render(scene, camera);
+}
+animate();
@@ -1,85 +1,241 @@
 import os
+import re
+import sys
 import json
+import tempfile
+import threading
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from src.config import USER_STORE_BACKEND, USER_DB_PATH, USER_CACHE_SIZE
+from src import timetable_index
+
+try:
+    import fcntl  # POSIX: cross-process lock for the JSON backend
+except ImportError:
+    fcntl = None
+
 USER_DATA_DIR = "./data/users"
 
+# Student IDs name directories under USER_DATA_DIR, so nothing path-like gets through
+STUDENT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+def is_valid_student_id(student_id) -> bool:
+    return isinstance(student_id, str) and bool(STUDENT_ID_RE.match(student_id))
+
+# --- STORAGE BACKEND ---
+# "sqlite": indexed store with an LRU cache (src/student_store.py)
+# "json":   legacy one-file-per-document layout under USER_DATA_DIR
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def _store():
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                from src.student_store import StudentStore, import_json_tree
+                is_new = not os.path.exists(USER_DB_PATH)
+                store = StudentStore(USER_DB_PATH, cache_size=USER_CACHE_SIZE)
+                if is_new:
+                    # First run: seed from the existing per-student JSON files
+                    print(f"📦 User Storage: Creating {USER_DB_PATH} from {USER_DATA_DIR}", file=sys.stderr)
+                    import_json_tree(store, USER_DATA_DIR)
+                _STORE = store
+    return _STORE
+
+# --- CRASH-SAFE WRITES ---
+_STUDENT_LOCKS = {}
+_STUDENT_LOCKS_GUARD = threading.Lock()
+
+def _atomic_write(path: str, content: bytes):
+    """Write to a temp file in the same directory, fsync, then rename over `path`.
+    Readers see either the old or the new file, never a truncated one."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextmanager
+def _student_lock(student_id: str):
+    """Serializes writers for one student (threads + processes where fcntl exists)."""
+    with _STUDENT_LOCKS_GUARD:
+        lock = _STUDENT_LOCKS.setdefault(student_id, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        lock_path = os.path.join(ensure_user_dir(student_id), ".lock")
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class _JsonTransaction:
+    """get/put on one student's JSON documents while holding the student lock."""
+
+    def __init__(self, student_id: str):
+        self.student_id = student_id
+
+    def get(self, kind: str) -> Optional[Dict[str, Any]]:
+        return _read_json_file(self.student_id, kind)
+
+    def put(self, kind: str, data: Dict[str, Any]):
+        path = os.path.join(ensure_user_dir(self.student_id), f"{kind}.json")
+        _atomic_write(path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+class _StoreTransaction:
+    def __init__(self, txn, student_id: str):
+        self.txn = txn
+        self.student_id = student_id
+
+    def get(self, kind: str) -> Optional[Dict[str, Any]]:
+        return self.txn.get(self.student_id, kind)
+
+    def put(self, kind: str, data: Dict[str, Any]):
+        self.txn.put(self.student_id, kind, data)
+
+@contextmanager
+def _transaction(student_id: str):
+    """One atomic read-modify-write over a student's documents."""
+    if USER_STORE_BACKEND == "sqlite":
+        with _store().transaction() as txn:
+            yield _StoreTransaction(txn, student_id)
+    else:
+        with _student_lock(student_id):
+            yield _JsonTransaction(student_id)
+
+def _read_json_file(student_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(USER_DATA_DIR, student_id, f"{kind}.json")
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return None
+
+def _read(student_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    if USER_STORE_BACKEND == "sqlite":
+        return _store().get(student_id, kind)
+    return _read_json_file(student_id, kind)
+
 def ensure_user_dir(student_id: str) -> str:
     """Create user directory if it doesn't exist"""
+    if not is_valid_student_id(student_id):
+        raise ValueError(f"Invalid student ID: {student_id!r}")
     user_path = os.path.join(USER_DATA_DIR, student_id)
     os.makedirs(user_path, exist_ok=True)
     return user_path
 
 def save_user_profile(student_id: str, name: str, program: str, semester: int) -> Dict[str, Any]:
-    """Save user profile"""
-    ensure_user_dir(student_id)
-    
-    profile = {
-        "student_id": student_id,
-        "name": name,
-        "program": program,
-        "semester": semester,
-        "timetable_uploaded": False,
-        "created_at": datetime.now().isoformat()
-    }
-    
-    profile_path = os.path.join(USER_DATA_DIR, student_id, "profile.json")
-    with open(profile_path, 'w') as f:
-        json.dump(profile, f, indent=2)
-    
+    """Save user profile (keeps created_at and timetable fields of an existing profile)"""
+    with _transaction(student_id) as txn:
+        profile = txn.get("profile") or {
+            "timetable_uploaded": False,
+            "created_at": datetime.now().isoformat()
+        }
+        profile.update({
+            "student_id": student_id,
+            "name": name,
+            "program": program,
+            "semester": semester,
+        })
+        txn.put("profile", profile)
+
     return profile
 
 def get_user_profile(student_id: str) -> Optional[Dict[str, Any]]:
     """Get user profile"""
-    profile_path = os.path.join(USER_DATA_DIR, student_id, "profile.json")
-    if os.path.exists(profile_path):
-        with open(profile_path, 'r') as f:
-            return json.load(f)
-    return None
+    return _read(student_id, "profile")
 
 def save_user_timetable(student_id: str, timetable_data: Dict[str, Any], pdf_path: str) -> bool:
-    """Save user timetable data"""
-    ensure_user_dir(student_id)
-    
-    # Save JSON data
-    timetable_path = os.path.join(USER_DATA_DIR, student_id, "timetable.json")
-    with open(timetable_path, 'w') as f:
-        json.dump(timetable_data, f, indent=2)
-    
-    # Update profile
-    profile = get_user_profile(student_id)
-    if profile:
-        profile["timetable_uploaded"] = True
-        profile["timetable_updated_at"] = datetime.now().isoformat()
-        save_user_profile(profile["student_id"], profile["name"], profile["program"], profile["semester"])
-    
+    """Save user timetable data and flag it on the profile in one read-modify-write"""
+    # Query index is built once here so timetable questions need no LLM (src/timetable_index.py)
+    index = timetable_index.build_index(timetable_data)
+
+    with _transaction(student_id) as txn:
+        txn.put("timetable", timetable_data)
+        txn.put("timetable_index", index)
+
+        profile = txn.get("profile")
+        if profile:
+            profile["timetable_uploaded"] = True
+            profile["timetable_updated_at"] = datetime.now().isoformat()
+            txn.put("profile", profile)
+
     return True
 
 def get_user_timetable(student_id: str) -> Optional[Dict[str, Any]]:
     """Get user timetable data"""
-    timetable_path = os.path.join(USER_DATA_DIR, student_id, "timetable.json")
-    if os.path.exists(timetable_path):
-        with open(timetable_path, 'r') as f:
-            return json.load(f)
-    return None
+    return _read(student_id, "timetable")
+
+def get_timetable_index(student_id: str) -> Optional[Dict[str, Any]]:
+    """Get the precomputed timetable index (built on the fly for older uploads)"""
+    index = _read(student_id, "timetable_index")
+    if index and index.get("version") == timetable_index.INDEX_VERSION:
+        return index
+    timetable = get_user_timetable(student_id)
+    return timetable_index.build_index(timetable) if timetable else None
 
 def save_user_timetable_pdf(student_id: str, pdf_content: bytes) -> str:
     """Save user timetable PDF"""
     user_dir = ensure_user_dir(student_id)
     pdf_path = os.path.join(user_dir, "timetable.pdf")
-    
-    with open(pdf_path, 'wb') as f:
-        f.write(pdf_content)
-    
-    return pdf_path
-    
+    _atomic_write(pdf_path, pdf_content)
     return pdf_path
 
+def delete_user_timetable_pdf(student_id: str):
+    """Remove the stored timetable PDF (e.g. an upload that was never queued)"""
+    try:
+        os.remove(os.path.join(USER_DATA_DIR, student_id, "timetable.pdf"))
+    except FileNotFoundError:
+        pass
+
 def get_academic_record(student_id: str) -> Optional[Dict[str, Any]]:
     """Get academic record (attendance, fees, exam status)"""
-    record_path = os.path.join(USER_DATA_DIR, student_id, "academic_record.json")
-    if os.path.exists(record_path):
-        with open(record_path, 'r') as f:
-            return json.load(f)
-    return None
+    return _read(student_id, "academic_record")
+
+def save_academic_record(student_id: str, record: Dict[str, Any]) -> bool:
+    """Save academic record (e.g. a nightly attendance/fee sync)"""
+    with _transaction(student_id) as txn:
+        txn.put("academic_record", record)
+    return True
+
+def iter_academic_records():
+    """Yields (student_id, record_version, record) for every student with an academic record"""
+    if USER_STORE_BACKEND == "sqlite":
+        yield from _store().iter_kind("academic_record")
+        return
+    if not os.path.isdir(USER_DATA_DIR):
+        return
+    for student_id in sorted(os.listdir(USER_DATA_DIR)):
+        # Version before record: a write in between leaves a stale version, never a stale record
+        version = record_version(student_id)
+        record = _read_json_file(student_id, "academic_record")
+        if record:
+            yield student_id, version, record
+
+def record_version(student_id: str) -> Any:
+    """
+    Cheap version stamp of a student's documents; it changes on every write to
+    that student (from any process) and nothing else, so derived results can be
+    cached against it.
+    """
+    if USER_STORE_BACKEND == "sqlite":
+        return _store().version(student_id)
+    stamps = []
+    for kind in ("profile", "timetable", "academic_record"):
+        try:
+            stamps.append(os.stat(os.path.join(USER_DATA_DIR, student_id, f"{kind}.json")).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
@@ -0,0 +1,240 @@
+import os
+import json
+import mmap
+from typing import Tuple
+
+import numpy as np
+
+from src.config import (
+    LOCAL_INDEX_KIND, LOCAL_INDEX_NLIST, LOCAL_INDEX_NPROBE, LOCAL_INDEX_PQ_M, LOCAL_INDEX_RESCORE
+)
+
+# Compact vector indexes for the local store (numpy only, inner product on
+# normalized vectors = cosine). Every kind also writes the vectors as float16
+# to a memory-mapped file: the compressed codes pick a shortlist, and only the
+# shortlisted rows are read back (paged in) for exact re-scoring.
+KINDS = ("flat", "int8", "ivfpq")
+_SCAN_BLOCK = 4096  # rows decoded at a time, bounds the per-query scratch memory
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = 12, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means (squared L2); returns (k, d) float32 centroids."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].astype(np.float32)
+    for _ in range(iters):
+        assign = _nearest(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():  # re-seed dead centroids on random points
+            centroids[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int32)
+    c_norm = (centroids ** 2).sum(axis=1)
+    for lo in range(0, len(x), _SCAN_BLOCK):
+        block = x[lo:lo + _SCAN_BLOCK]
+        out[lo:lo + len(block)] = np.argmin(c_norm[None, :] - 2 * block @ centroids.T, axis=1)
+    return out
+
+
+def _top(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        part = np.argpartition(-scores, k)[:k]
+        scores, ids = scores[part], ids[part]
+    order = np.argsort(-scores)
+    return scores[order], ids[order]
+
+
+class VectorIndex:
+    """Base: float16 vectors (memory-mapped) for re-scoring + a compressed scan."""
+
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray, rescore: int = LOCAL_INDEX_RESCORE):
+        self.vectors = vectors  # (n, d) float16, usually np.memmap
+        self.rescore = rescore
+
+    def __len__(self):
+        return len(self.vectors)
+
+    # Subclasses: approximate scores for a shortlist
+    def _candidates(self, query: np.ndarray, n: int) -> np.ndarray:
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        for lo in range(0, len(self.vectors), _SCAN_BLOCK):
+            scores[lo:lo + _SCAN_BLOCK] = self.vectors[lo:lo + _SCAN_BLOCK].astype(np.float32) @ query
+        return _top(scores, np.arange(len(scores)), n)[1]
+
+    def search(self, query: np.ndarray, k: int, rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (scores, ids) by inner product. The compressed codes shortlist
+        k * rescore candidates, which are then scored exactly from the float vectors.
+        `rows` restricts the search to those ids (post-filter on the shortlist).
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        shortlist = self._candidates(query, max(k * self.rescore, k))
+        if rows is not None:
+            shortlist = shortlist[np.isin(shortlist, rows)]
+        if len(shortlist) == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        shortlist = np.sort(shortlist)  # sequential reads from the memory map
+        exact = self.vectors[shortlist].astype(np.float32) @ query
+        return _top(exact, shortlist.astype(np.int64), k)
+
+    def _arrays(self) -> dict:
+        return {}
+
+    def save(self, path: str, **params) -> None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.f16.npy"), np.asarray(self.vectors, dtype=np.float16))
+        for name, arr in self._arrays().items():
+            np.save(os.path.join(path, f"{name}.npy"), arr)
+        meta = {"kind": self.kind, "count": len(self.vectors), "dim": int(self.vectors.shape[1]), **params}
+        with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def resident_bytes(self) -> int:
+        """Bytes held in RAM by the scan structures (the float16 vectors stay on disk)."""
+        return sum(a.nbytes for a in self._arrays().values())
+
+
+class FlatIndex(VectorIndex):
+    """Exact scan over the float16 vectors (baseline; touches every page per query)."""
+
+    kind = "flat"
+
+    def resident_bytes(self) -> int:
+        return self.vectors.nbytes  # every query pages the whole file in
+
+
+class Int8Index(VectorIndex):
+    """Per-dimension affine uint8 codes (4x smaller than float32) scanned in blocks."""
+
+    kind = "int8"
+
+    def __init__(self, vectors, codes, lo, scale, rescore=LOCAL_INDEX_RESCORE):
+        super().__init__(vectors, rescore)
+        self.codes, self.lo, self.scale = codes, lo, scale
+
+    @classmethod
+    def build(cls, x: np.ndarray, rescore: int = LOCAL_INDEX_RESCORE):
+        lo, hi = x.min(axis=0), x.max(axis=0)
+        scale = np.maximum(hi - lo, 1e-9) / 255.0
+        codes = np.clip(np.rint((x - lo) / scale), 0, 255).astype(np.uint8)
+        return cls(x.astype(np.float16), codes, lo.astype(np.float32), scale.astype(np.float32), rescore)
+
+    def _candidates(self, query, n):
+        # q . x ~= (q * scale) . code + q . lo
+        q_scaled = (query * self.scale).astype(np.float32)
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for lo in range(0, len(self.codes), _SCAN_BLOCK):
+            scores[lo:lo + _SCAN_BLOCK] = self.codes[lo:lo + _SCAN_BLOCK].astype(np.float32) @ q_scaled
+        return _top(scores, np.arange(len(scores)), n)[1]
+
+    def _arrays(self):
+        return {"codes": self.codes, "lo": self.lo, "scale": self.scale}
+
+
+class IVFPQIndex(VectorIndex):
+    """
+    Inverted lists over k-means cells; residuals product-quantized into m
+    bytes per vector. A query scans only the `nprobe` closest cells, scoring
+    codes with per-query lookup tables (asymmetric distance).
+    """
+
+    kind = "ivfpq"
+
+    def __init__(self, vectors, coarse, pq, codes, list_ids, list_offsets,
+                 nprobe=LOCAL_INDEX_NPROBE, rescore=LOCAL_INDEX_RESCORE):
+        super().__init__(vectors, rescore)
+        self.coarse = coarse              # (nlist, d)
+        self.pq = pq                      # (m, 256, d/m) residual codebooks
+        self.codes = codes                # (n, m) uint8, grouped by list
+        self.list_ids = list_ids          # (n,) original id of each code row
+        self.list_offsets = list_offsets  # (nlist + 1,) row ranges per list
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, x: np.ndarray, nlist: int = LOCAL_INDEX_NLIST, m: int = LOCAL_INDEX_PQ_M,
+              nprobe: int = LOCAL_INDEX_NPROBE, rescore: int = LOCAL_INDEX_RESCORE):
+        n, d = x.shape
+        if d % m:
+            raise ValueError(f"dim {d} is not divisible by pq_m {m}")
+        nlist = max(1, min(nlist or int(4 * np.sqrt(n)), n // 8 or 1))
+        rng = np.random.default_rng(0)
+
+        # ~64 training points per centroid is plenty and keeps builds to seconds
+        coarse = kmeans(x[rng.choice(n, min(n, 64 * nlist), replace=False)], nlist)
+        assign = _nearest(x, coarse)
+        residuals = x - coarse[assign]
+        sub = d // m
+        sample_res = residuals[rng.choice(n, min(n, 64 * 256), replace=False)]
+        ksub = min(256, len(sample_res))
+        pq = np.stack([kmeans(sample_res[:, j * sub:(j + 1) * sub], ksub, seed=j) for j in range(m)])
+        codes = np.stack([_nearest(residuals[:, j * sub:(j + 1) * sub], pq[j]) for j in range(m)], axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+        return cls(x.astype(np.float16), coarse, pq, codes[order].astype(np.uint8),
+                   order.astype(np.int64), offsets, nprobe, rescore)
+
+    def _candidates(self, query, n):
+        m, _, sub = self.pq.shape
+        cell_scores = self.coarse @ query
+        probe = np.argsort(-cell_scores)[:self.nprobe]
+        # lut[j, c] = q_j . codebook_j[c]
+        lut = np.einsum("jcs,js->jc", self.pq, query.reshape(m, sub))
+        rows = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in probe])
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64)
+        base = np.repeat(cell_scores[probe], np.diff(self.list_offsets)[probe])
+        scores = base + lut[np.arange(m), self.codes[rows]].sum(axis=1)
+        return self.list_ids[_top(scores, rows, n)[1]]
+
+    def _arrays(self):
+        return {"coarse": self.coarse, "pq": self.pq, "codes": self.codes,
+                "list_ids": self.list_ids, "list_offsets": self.list_offsets}
+
+
+def _advise_random(array) -> None:
+    """Re-scoring reads scattered rows: without this, kernel read-ahead pages in most of the file."""
+    mm = getattr(array, "_mmap", None)
+    if mm is not None and hasattr(mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+        mm.madvise(mmap.MADV_RANDOM)
+
+
+def build_index(vectors: np.ndarray, kind: str = LOCAL_INDEX_KIND, **params) -> VectorIndex:
+    x = np.ascontiguousarray(vectors, dtype=np.float32)
+    if kind == "flat":
+        return FlatIndex(x.astype(np.float16), params.get("rescore", LOCAL_INDEX_RESCORE))
+    if kind == "int8":
+        return Int8Index.build(x, **params)
+    if kind == "ivfpq":
+        return IVFPQIndex.build(x, **params)
+    raise ValueError(f"Unknown index kind '{kind}'. Supported: {', '.join(KINDS)}")
+
+
+def load_index(path: str, nprobe: int = LOCAL_INDEX_NPROBE, rescore: int = LOCAL_INDEX_RESCORE) -> VectorIndex:
+    """Opens a saved index; the float16 vectors are memory-mapped, codes loaded."""
+    with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    vectors = np.load(os.path.join(path, "vectors.f16.npy"), mmap_mode="r")
+    _advise_random(vectors)
+
+    def arr(name):
+        return np.load(os.path.join(path, f"{name}.npy"))
+
+    kind = meta["kind"]
+    if kind == "flat":
+        return FlatIndex(vectors, rescore)
+    if kind == "int8":
+        return Int8Index(vectors, arr("codes"), arr("lo"), arr("scale"), rescore)
+    if kind == "ivfpq":
+        return IVFPQIndex(vectors, arr("coarse"), arr("pq"), arr("codes"), arr("list_ids"),
+                          arr("list_offsets"), nprobe, rescore)
+    raise ValueError(f"Unknown index kind '{kind}' in {path}")
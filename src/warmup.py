@@ -0,0 +1,89 @@
+import sys
+import threading
+import time
+
+from src.config import WARMUP_MODE, WARMUP_DELAY
+
+
+class WarmupScheduler:
+    """
+    Loads heavy resources in a background thread shortly after startup, so the
+    server binds immediately and the first user does not pay the model load.
+
+    tasks: list of (name, fn) run in order. With mode="lazy" nothing is preloaded
+    and the scheduler reports ready at once (resources load on first request).
+    Also records first-request latency so cold vs warm starts can be compared.
+    """
+
+    def __init__(self, tasks, mode: str = WARMUP_MODE, delay: float = WARMUP_DELAY):
+        self.tasks = list(tasks)
+        self.mode = mode
+        self.delay = delay
+        self.state = "pending"
+        self.timings = {}
+        self.errors = {}
+        self.first_request = None
+        self._started_at = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        """Kicks off warmup (idempotent)."""
+        with self._lock:
+            if self._thread or self.state != "pending":
+                return
+            self._started_at = time.perf_counter()
+            if self.mode == "lazy":
+                self.state = "lazy"
+                self._ready.set()
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.state = "warming"
+        print(f"🔥 Warmup: Loading {[name for name, _ in self.tasks]}...", file=sys.stderr)
+
+        for name, fn in self.tasks:
+            start = time.perf_counter()
+            try:
+                fn()
+                self.timings[name] = round((time.perf_counter() - start) * 1000)
+                print(f"✅ Warmup: {name} ready ({self.timings[name]} ms)", file=sys.stderr)
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"⚠️ Warmup: {name} failed: {e}", file=sys.stderr)
+
+        # Failed tasks fall back to lazy loading on the request path
+        self.state = "degraded" if self.errors else "ready"
+        self._ready.set()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Blocks until warmup finished (or timeout). Returns readiness."""
+        return self._ready.wait(timeout)
+
+    def record_request(self, latency_ms: float, warm: bool):
+        """Keeps the latency of the first served request (cold vs warm start)."""
+        with self._lock:
+            if self.first_request is None:
+                self.first_request = {"latency_ms": round(latency_ms, 1), "warm": warm}
+                label = "warm" if warm else "cold"
+                print(f"⏱️ Warmup: First request served {label} in {latency_ms:.0f} ms", file=sys.stderr)
+
+    def status(self) -> dict:
+        uptime = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "state": self.state,
+            "mode": self.mode,
+            "uptime_s": round(uptime, 1),
+            "timings_ms": dict(self.timings),
+            "errors": dict(self.errors),
+            "first_request": self.first_request,
+        }
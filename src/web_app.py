@@ -1,6 +1,8 @@
 import os
 import sys
 import io
+import time
+import asyncio
 # Force UTF-8 encoding for stdout/stderr
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
@@ -10,15 +12,21 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
 from fastapi import FastAPI, Request, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 import uvicorn
 from dotenv import load_dotenv
-import google.generativeai as genai
+# Heavy SDKs (Gemini, LangChain, torch) are deferred until first use
+# so the server binds quickly; see src/lazy_import.py and tests/verify_import_time.py
+from src.lazy_import import loaded_modules
+from src import rag_pipeline, llm_router, cache_manager, query_router, stream_share, query_log
+from src.config import USE_MCP, QUERY_ROUTER, WARMUP_WAIT_TIMEOUT, TIMETABLE_UPLOAD_MAX_BYTES
+from src.warmup import WarmupScheduler
+from src.timetable_jobs import TimetableJobQueue, QueueFullError
 from src.rag_pipeline import answer_question
 import src.user_storage as user_storage
 import src.timetable_extractor as timetable_extractor
+from src.static_assets import StaticAssets, INDEX_NAME
 import traceback
 
 load_dotenv()
@@ -41,250 +49,162 @@ if not os.path.exists("static"):
     os.makedirs("static")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-from elevenlabs import ElevenLabs
-
-try:
-    client = ElevenLabs(
-      api_key=os.getenv("ELEVENLABS_API_KEY")
-    )
-except Exception:
-    client = None
-    print("Warning: ElevenLabs client failed to init")
+# UI is served from memory: fingerprinted, precompressed assets built once at startup
+ASSETS = StaticAssets(os.path.join(BASE_DIR, "src", "ui"))
 
 @app.get("/", response_class=HTMLResponse)
-async def home():
-    return r"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>LPU UMS - AI Assistant</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;700&display=swap');
-
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-
-        body {
-            font-family: 'Roboto', sans-serif;
-            background: linear-gradient(135deg, #f4f6f9 0%, #e0eafc 100%);
-            background-size: 400% 400%;
-            animation: gradientBG 15s ease infinite;
-            color: #333;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-            overflow: hidden;
-        }
-        
-        @keyframes gradientBG { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-
-        /* Header */
-        .ums-header { background: #fff; height: 70px; display: flex; align-items: center; padding: 0 20px; border-bottom: 5px solid #f47920; }
-        .ums-logo-text { font-size: 28px; font-weight: 800; color: #000; }
-        .ums-logo-text span { color: #f47920; }
-        .sub-text { font-size: 11px; color: #666; font-weight: 500; }
-        
-        /* Layout */
-        .main-container { display: flex; flex: 1; overflow: hidden; padding: 25px; gap: 20px; }
-        
-        .chat-card {
-            flex: 2; background: rgba(255,255,255,0.9); border-radius: 16px; 
-            border-top: 5px solid #f47920; display: flex; flex-direction: column;
-            box-shadow: 0 8px 32px rgba(0,0,0,0.05);
-        }
-        
-        .chat-messages { flex: 1; padding: 20px; overflow-y: auto; display: flex; flex-direction: column; gap: 15px; }
-        
-        .message { padding: 12px 18px; border-radius: 12px; max-width: 85%; font-size: 14px; line-height: 1.5; }
-        .user-message { background: #f47920; color: white; align-self: flex-end; }
-        .bot-message { background: #fff; border: 1px solid #eee; align-self: flex-start; }
-        
-        .chat-input-area { padding: 15px; background: #fff; display: flex; gap: 10px; border-top: 1px solid #eee; }
-        .input-group { flex: 1; display: flex; background: #f5f5f5; border-radius: 25px; padding: 8px 15px; border: 1px solid #ddd; }
-        .chat-input { flex: 1; border: none; background: transparent; outline: none; }
-        .send-btn { background: #f47920; color: white; border: none; width: 40px; height: 40px; border-radius: 50%; cursor: pointer; }
-        
-        /* Floating Mic */
-        .mic-btn-floating { position: fixed; bottom: 30px; right: 30px; width: 60px; height: 60px; background: white; border-radius: 50%; display: flex; align-items: center; justify-content: center; box-shadow: 0 4px 15px rgba(244,121,32,0.3); cursor: pointer; color: #f47920; font-size: 24px; border: 2px solid #f47920; }
-        .mic-btn-floating.active { background: #f47920; color: white; animation: pulse 1.5s infinite; }
-        @keyframes pulse { 0% { box-shadow: 0 0 0 0 rgba(244,121,32,0.4); } 70% { box-shadow: 0 0 0 15px rgba(244,121,32,0); } 100% { box-shadow: 0 0 0 0 rgba(244,121,32,0); } }
-
-    </style>
-</head>
-<body>
-    <div class="ums-header">
-        <div class="ums-logo-text"><span>U</span>MS</div>
-        <div style="margin-left: 10px;">
-            <div style="font-weight: 800;">UNIVERSITY MANAGEMENT SYSTEM</div>
-            <div class="sub-text">AI ASSISTANT PORTAL</div>
-        </div>
-    </div>
-
-    <div class="main-container">
-        <div class="chat-card">
-            <div style="padding: 15px; border-bottom: 1px solid #eee; font-weight: bold;">LPU CHATBOT</div>
-            <div class="chat-messages" id="chatMessages">
-                <div class="message bot-message">Hello! I am JARVIS. How can I help you?</div>
-            </div>
-            <div class="chat-input-area">
-                <div class="input-group">
-                    <input id="chatInput" class="chat-input" placeholder="Type your query..." onkeydown="if(event.key==='Enter') sendMessage()">
-                </div>
-                <button class="send-btn" onclick="sendMessage()">➤</button>
-            </div>
-        </div>
-        
-         <!-- Particle Sphere Container -->
-        <div id="canvas-container" style="flex: 1; background: white; border-radius: 16px; border-top: 5px solid #f47920;"></div>
-    </div>
-    
-    <div class="mic-btn-floating" id="micBtn" onclick="toggleVoice()">🎤</div>
-
-    <script>
-        const chatMessages = document.getElementById('chatMessages');
-        
-        function appendMsg(text, type) {
-            const div = document.createElement('div');
-            div.className = `message ${type}-message`;
-            div.innerHTML = type === 'bot' ? marked.parse(text) : text;
-            chatMessages.appendChild(div);
-            chatMessages.scrollTop = chatMessages.scrollHeight;
-            return div;
-        }
-
-        async function sendMessage() {
-            const input = document.getElementById('chatInput');
-            const txt = input.value.trim();
-            if(!txt) return;
-            
-            appendMsg(txt, 'user');
-            input.value = '';
-            
-            const botDiv = appendMsg('...', 'bot');
-            
-            try {
-                const res = await fetch('/ask_stream', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({ question: txt, student_id: localStorage.getItem('studentId') || '12345' })
-                });
-                
-                const reader = res.body.getReader();
-                const decoder = new TextDecoder();
-                let fullText = "";
-                botDiv.innerHTML = "";
-                
-                while(true) {
-                    const {value, done} = await reader.read();
-                    if(done) break;
-                    const chunk = decoder.decode(value, {stream:true});
-                    const lines = chunk.split('\\n\\n');
-                    for(const line of lines) {
-                        if(line.startsWith('data: ')) {
-                            const data = JSON.parse(line.slice(6));
-                            if(data.chunk) {
-                                fullText += data.chunk;
-                                botDiv.innerHTML = marked.parse(fullText);
-                                chatMessages.scrollTop = chatMessages.scrollHeight;
-                            }
-                        }
-                    }
-                }
-            } catch(e) {
-                botDiv.innerHTML = "Error: " + e.message;
-            }
-        }
-        
-        // Voice Logic
-        let recognition;
-        let isListening = false;
-        if('webkitSpeechRecognition' in window) {
-            recognition = new webkitSpeechRecognition();
-            recognition.continuous = false;
-            recognition.onresult = (e) => {
-                const txt = e.results[0][0].transcript;
-                document.getElementById('chatInput').value = txt;
-                sendMessage();
-            };
-            recognition.onend = () => { if(isListening) isListening = false; document.getElementById('micBtn').classList.remove('active'); };
-        }
-        
-        function toggleVoice() {
-            if(!recognition) return alert("Browser not supported");
-            if(isListening) { recognition.stop(); }
-            else { recognition.start(); isListening = true; document.getElementById('micBtn').classList.add('active'); }
-        }
-
-        // Three.js Sphere (Simplified)
-        const scene = new THREE.Scene();
-        const camera = new THREE.PerspectiveCamera(75, 1, 0.1, 1000);
-        const renderer = new THREE.WebGLRenderer({alpha:true});
-        document.getElementById('canvas-container').appendChild(renderer.domElement);
-        
-        const geometry = new THREE.SphereGeometry(1, 32, 32);
-        const material = new THREE.MeshBasicMaterial({color: 0xf47920, wireframe: true});
-        const sphere = new THREE.Mesh(geometry, material);
-        scene.add(sphere);
-        camera.position.z = 2;
-        
-        function animate() {
-            requestAnimationFrame(animate);
-            sphere.rotation.x += 0.01;
-            sphere.rotation.y += 0.01;
-            
-            const cont = document.getElementById('canvas-container');
-            renderer.setSize(cont.clientWidth, cont.clientHeight);
-            camera.aspect = cont.clientWidth / cont.clientHeight;
-            camera.updateProjectionMatrix();
-            
-            renderer.render(scene, camera);
-        }
-        animate();
-    </script>
-</body>
-</html>"""
+async def home(request: Request):
+    return ASSETS.response("index.html", request.headers)
+
+@app.get("/assets/{name}")
+async def assets(name: str, request: Request):
+    if name == INDEX_NAME:  # the shell page is only served (no-cache) from /
+        return Response(status_code=404)
+    return ASSETS.response(name, request.headers)
+
+# --- WARMUP ---
+# With USE_MCP the retrieval models live in the MCP server process, so this
+# worker only needs the LLM client; otherwise it serves RAG itself. The query
+# router's document questions retrieve through a shared MCP server (http/sse);
+# only with stdio does the router load the models here too (see config.QUERY_ROUTER).
+_WARMUP_TASKS = [("llm", llm_router.get_llm)]
+if not USE_MCP or (QUERY_ROUTER and not query_router.DOC_SEARCH_VIA_MCP):
+    _WARMUP_TASKS.insert(0, ("rag_resources", rag_pipeline._lazy_load_resources))
+WARMUP = WarmupScheduler(_WARMUP_TASKS)
+WARMING_UP_MESSAGE = "⏳ The assistant is still warming up. Please try again in a few seconds."
+
+# PDF extraction runs in background workers; uploads return a job to poll
+TIMETABLE_JOBS = TimetableJobQueue()
+
+@app.on_event("startup")
+async def start_warmup():
+    # Runs in a background thread, so the server binds without waiting for models
+    WARMUP.start()
+    TIMETABLE_JOBS.start()
+
+async def _wait_for_warmup() -> bool:
+    """Queues the request behind warmup for up to WARMUP_WAIT_TIMEOUT seconds."""
+    if WARMUP.is_ready:
+        return True
+    return await asyncio.to_thread(WARMUP.wait_ready, WARMUP_WAIT_TIMEOUT)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once warmup finished; also reports which subsystems are warm."""
+    subsystems = {
+        **loaded_modules(),
+        **rag_pipeline.resources_status(),
+        "llm": llm_router.is_loaded(),
+    }
+    body = {
+        "status": "ready" if WARMUP.is_ready else "warming",
+        "warmup": WARMUP.status(),
+        "timetable_jobs": TIMETABLE_JOBS.status(),
+        "routes": query_router.stats(),
+        "shared_streams": stream_share.stats(),
+        "subsystems": subsystems,
+    }
+    return JSONResponse(body, status_code=200 if WARMUP.is_ready else 503)
 
 @app.post("/ask")
 async def ask(request: Request):
+    start = time.perf_counter()
     data = await request.json()
     question = data.get("question", "")
     student_id = data.get("student_id", None)
+    query_log.record("/ask", question, student_id)
+    
+    warm = WARMUP.is_ready
+    if not await _wait_for_warmup():
+        # Degraded path: only answer from cache while models are still loading
+        cached = cache_manager.get_from_cache(question)
+        if cached:
+            return {"answer": cached}
+        return JSONResponse({"answer": WARMING_UP_MESSAGE}, status_code=503, headers={"Retry-After": "5"})
+    
     answer = answer_question(question, student_id)
+    WARMUP.record_request((time.perf_counter() - start) * 1000, warm)
     return {"answer": answer}
 
 @app.post("/ask_stream")
 async def ask_stream(request: Request):
     from fastapi.responses import StreamingResponse
-    import json
-    from src.config import USE_MCP
+    from src.sse import sse_stream, SSE_HEADERS
     
+    start = time.perf_counter()
     data = await request.json()
     question = data.get("question", "")
     student_id = data.get("student_id", None)
+    query_log.record("/ask_stream", question, student_id)
+    warm = WARMUP.is_ready
     
     async def generate():
-        try:
-            if USE_MCP:
-                # Use MCP agent (local/high-memory environments)
-                from src.llm_agent import UniAgent
-                agent = UniAgent()
-                async for chunk in agent.process_query_stream(question, student_id):
-                    yield f"data: {json.dumps({'chunk': chunk})}\\n\\n"
-            else:
-                # Use basic RAG (production/low-memory environments like Render free tier)
-                from src.rag_pipeline import answer_question_stream
-                async for chunk in answer_question_stream(question, student_id):
-                    yield f"data: {json.dumps({'chunk': chunk})}\\n\\n"
-            
-            yield f"data: {json.dumps({'done': True})}\\n\\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\\n\\n"
+        if not await _wait_for_warmup():
+            # Degraded path: only answer from cache while models are still loading
+            yield cache_manager.get_from_cache(question) or WARMING_UP_MESSAGE
+            return
+        
+        if USE_MCP and QUERY_ROUTER:
+            # Single-tool questions answered directly; the agent only gets multi-step ones
+            async for chunk in query_router.answer_stream(question, student_id):
+                yield chunk
+        elif USE_MCP:
+            # Use MCP agent (local/high-memory environments)
+            async for chunk in query_router.agent_stream(question, student_id):
+                yield chunk
+        else:
+            # Use basic RAG (production/low-memory environments like Render free tier)
+            from src.rag_pipeline import answer_question_stream
+            async for chunk in answer_question_stream(question, student_id):
+                yield chunk
+        WARMUP.record_request((time.perf_counter() - start) * 1000, warm)
     
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    # sse_stream coalesces tokens into frames, adds heartbeats and the final done/error event
+    return StreamingResponse(sse_stream(generate()), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# --- TIMETABLE UPLOAD ---
+@app.post("/upload_timetable")
+async def upload_timetable(student_id: str = Form(...), file: UploadFile = File(...)):
+    """Saves the PDF and queues extraction. Returns 202 with a job to poll."""
+    # Checked before anything touches the disk: the ID becomes a directory name
+    if not user_storage.is_valid_student_id(student_id):
+        return JSONResponse({"error": "Invalid student ID"}, status_code=400)
+    if await asyncio.to_thread(user_storage.get_user_profile, student_id) is None:
+        return JSONResponse({"error": "Unknown student ID"}, status_code=404)
+
+    content = await file.read(TIMETABLE_UPLOAD_MAX_BYTES + 1)
+    if len(content) > TIMETABLE_UPLOAD_MAX_BYTES:
+        return JSONResponse({"error": f"Timetable PDF is larger than {TIMETABLE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB"},
+                            status_code=413)
+    if not content.startswith(b"%PDF"):
+        return JSONResponse({"error": "Please upload a PDF timetable"}, status_code=400)
+
+    # A rejected upload must not replace the PDF behind the stored timetable
+    try:
+        TIMETABLE_JOBS.check_capacity(content)
+    except QueueFullError as e:
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "10"})
+    pdf_path = await asyncio.to_thread(user_storage.save_user_timetable_pdf, student_id, content)
+    try:
+        job = await TIMETABLE_JOBS.submit(student_id, pdf_path, content)
+    except QueueFullError as e:
+        # Queue filled while the PDF was being written: drop the file that will never be extracted
+        await asyncio.to_thread(user_storage.delete_user_timetable_pdf, student_id)
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "10"})
+    return JSONResponse(job, status_code=202)
+
+@app.get("/timetable_jobs/{job_id}")
+async def timetable_job(job_id: str, wait: float = 0):
+    """Job status; ?wait=N long-polls up to N seconds (max 30) for completion."""
+    job = await TIMETABLE_JOBS.wait(job_id, min(wait, 30)) if wait > 0 else TIMETABLE_JOBS.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return job
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
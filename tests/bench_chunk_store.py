@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Chunk store (src/chunk_store.py) vs the pickled docstore FAISS writes
+(index.pkl: a dict of Document objects, unpickled whole at startup) and the
+previous local layout (text blob + one JSON list of metadata). Uses the corpus
+chunks from data/, replicated to a larger corpus, and measures startup time,
+RSS growth (fresh process per format), reads by chunk ID and doc_type
+filtering. Also checks that every chunk round-trips exactly.
+Usage: python tests/bench_chunk_store.py [copies_of_corpus]
+"""
+import sys
+import os
+import glob
+import json
+import time
+import pickle
+import shutil
+import random
+import logging
+import tempfile
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_chunking import load_corpus
+from src.chunker import chunk_documents
+from src.dedup import dedup_chunks
+from src.chunk_store import ChunkStore, chunk_id, write_chunk_store
+
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+LOOKUPS = 200
+
+
+class Document:
+    """Pickled like langchain's Document (page_content + metadata per object)."""
+
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+def corpus_chunks(copies):
+    folders = {os.path.basename(p): os.path.basename(os.path.dirname(p))
+               for p in glob.glob(os.path.join(ROOT, "data", "**", "*"), recursive=True)}
+    docs, _ = load_corpus()
+    for doc in docs:
+        doc.metadata["doc_type"] = folders.get(doc.metadata["source"], "general")
+    chunks, _ = dedup_chunks(chunk_documents(docs))
+    texts, metas = [], []
+    for copy in range(copies):  # same text, distinct files: a corpus `copies` times larger
+        for c in chunks:
+            meta = dict(c.metadata)
+            if copy:
+                meta["source"] = f"{copy}/{meta['source']}"
+                if "sources" in meta:
+                    meta["sources"] = [f"{copy}/{s}" for s in meta["sources"]]
+            texts.append(c.page_content if not copy else f"{c.page_content}\n(copy {copy})")  # no shared strings
+            metas.append(meta)
+    return texts, metas
+
+
+def write_pickle(path, texts, metas):
+    """Same shape as FAISS.save_local's index.pkl: (docstore dict, index_to_docstore_id)."""
+    ids = [chunk_id(t, m) for t, m in zip(texts, metas)]
+    docstore = {i: Document(t, m) for i, t, m in zip(ids, texts, metas)}
+    with open(os.path.join(path, "index.pkl"), "wb") as f:
+        pickle.dump((docstore, dict(enumerate(ids))), f)
+
+
+def write_json(path, texts, metas):
+    """Previous local store layout: memory-mapped texts, metadata as one JSON list."""
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    with open(os.path.join(path, "texts.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    with open(os.path.join(path, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metas, f, ensure_ascii=False)
+
+
+def rss_anon_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(fmt, path, ids_path):
+    """Fresh process: load the docstore, then read LOOKUPS chunks by ID and filter by doc_type."""
+    with open(ids_path) as f:
+        wanted, doc_type = json.load(f)
+    before = rss_anon_kb()
+    start = time.perf_counter()
+    if fmt == "pickle":
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, _ = pickle.load(f)
+        get = lambda cid: docstore[cid]  # noqa: E731
+        where = lambda: [i for i, d in docstore.items() if d.metadata.get("doc_type") == doc_type]  # noqa: E731
+    elif fmt == "json":
+        texts = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r")
+        offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "metadata.json"), encoding="utf-8") as f:
+            metas = json.load(f)
+        rows = {chunk_id(None, m): i for i, m in enumerate(metas)}  # an ID map has to be built at load
+        get = lambda cid: Document(bytes(texts[offsets[rows[cid]]:offsets[rows[cid] + 1]]).decode(), metas[rows[cid]])  # noqa: E731
+        where = lambda: [i for i, m in enumerate(metas) if m.get("doc_type") == doc_type]  # noqa: E731
+    else:
+        store = ChunkStore(path)
+        get = store.get_by_id
+        where = lambda: store.where({"doc_type": doc_type})  # noqa: E731
+    load_ms = (time.perf_counter() - start) * 1000
+    rss = rss_anon_kb() - before
+
+    start = time.perf_counter()
+    chars = sum(len(get(cid).page_content) for cid in wanted)
+    get_us = (time.perf_counter() - start) / len(wanted) * 1e6
+    start = time.perf_counter()
+    matched = len(where())
+    where_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps({"load_ms": load_ms, "rss_kb": rss, "get_us": get_us, "where_ms": where_ms,
+                      "chars": chars, "matched": matched}))
+
+
+def run(fmt, path, ids_path):
+    out = subprocess.run([sys.executable, __file__, "--child", fmt, path, ids_path],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def dir_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    tmp = tempfile.mkdtemp(prefix="chunk_store_")
+    ok = True
+    try:
+        texts, metas = corpus_chunks(copies)
+        base = len(texts) // copies
+        print(f"📦 {len(texts)} chunks ({copies} x {base} corpus chunks), "
+              f"{sum(len(t.encode('utf-8')) for t in texts) / 1e6:.1f} MB of text")
+
+        paths = {}
+        for fmt, writer in (("pickle", write_pickle), ("json", write_json), ("chunk store", write_chunk_store)):
+            paths[fmt] = os.path.join(tmp, fmt.replace(" ", "_"))
+            os.makedirs(paths[fmt])
+            start = time.perf_counter()
+            writer(paths[fmt], texts, metas)
+            print(f"  wrote {fmt:12s} in {time.perf_counter() - start:5.2f}s ({dir_mb(paths[fmt]):.1f} MB)")
+
+        rng = random.Random(0)
+        wanted = [chunk_id(texts[i], metas[i]) for i in rng.sample(range(len(texts)), LOOKUPS)]
+        ids_path = os.path.join(tmp, "ids.json")
+        with open(ids_path, "w") as f:
+            json.dump([wanted, "hostel"], f)
+
+        print(f"\n  {'':14s} {'startup ms':>11s} {'RSS MB':>7s} {'get by ID us':>13s} {'doc_type filter ms':>19s}")
+        results = {}
+        for fmt in ("pickle", "json", "chunk store"):
+            r = results[fmt] = run(fmt.split()[0], paths[fmt], ids_path)
+            print(f"  {fmt:14s} {r['load_ms']:11.1f} {r['rss_kb'] / 1024:7.1f} {r['get_us']:13.1f} {r['where_ms']:19.2f}")
+        print()
+
+        same = len({(r["chars"], r["matched"]) for r in results.values()}) == 1
+        ok &= check("All formats return the same chunks", same,
+                    f"{results['pickle']['matched']} hostel chunks")
+        old, new = results["pickle"], results["chunk store"]
+        ok &= check("Startup faster than unpickling", new["load_ms"] * 10 < old["load_ms"],
+                    f"{old['load_ms']:.0f} ms -> {new['load_ms']:.1f} ms")
+        ok &= check("RSS after load lower", new["rss_kb"] * 10 < old["rss_kb"],
+                    f"{old['rss_kb'] / 1024:.1f} MB -> {new['rss_kb'] / 1024:.1f} MB")
+
+        store = ChunkStore(paths["chunk store"])
+        exact = all(store.text(i) == texts[i] and store.metadata(i) == metas[i] for i in range(len(texts)))
+        ok &= check("Every chunk round-trips (text + metadata)", exact)
+        ok &= check("Lookup by chunk ID", all(store.row(chunk_id(texts[i], metas[i])) == i for i in range(0, len(texts), 37))
+                    and store.row("0" * 40) == -1)
+        extra_key = next(k for k in ("sources", "duplicates") if any(k in m for m in metas))
+        sample = next(m for m in metas if extra_key in m)
+        query = {extra_key: sample[extra_key], "doc_type": sample["doc_type"]}
+        rows = store.where(query)
+        ok &= check("Filters on columns and on other metadata", len(rows) > 0 and list(rows) == [
+            i for i, m in enumerate(metas) if all(m.get(k) == v for k, v in query.items())], f"{len(rows)} rows")
+        dtypes = {np.load(os.path.join(store.path, f), mmap_mode="r").dtype.kind
+                  for f in os.listdir(store.path) if f.endswith(".npy")}
+        ok &= check("No pickled objects on disk", "O" not in dtypes and not glob.glob(os.path.join(store.path, "*.pkl")))
+
+        empty = os.path.join(tmp, "empty")
+        os.makedirs(empty)
+        write_chunk_store(empty, [], [])
+        ok &= check("Empty store opens", len(ChunkStore(empty)) == 0 and ChunkStore(empty).row("x" * 40) == -1)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if ok:
+        print("\n✅ Chunk store verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main()
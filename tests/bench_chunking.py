@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Chunking before/after on the corpus in data/: the old fixed splitter
+(RecursiveCharacterTextSplitter 400/60 chars) vs the structure-aware chunker
+(src/chunker.py). Reports chunk count, tokens, index size, how many table rows
+and list items survive intact, and retrieval recall on questions with known answers.
+Retrieval is BM25 (+ the FlashRank reranker when its model is downloaded), so
+no embedding model or vector DB is needed.
+Usage: python tests/bench_chunking.py
+"""
+import sys
+import os
+import re
+import glob
+import html
+import math
+import time
+import logging
+import zipfile
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.chunker import chunk_documents, get_token_counter, split_blocks
+from src.config import CACHE_DIR, RERANK_MODEL_NAME, RETRIEVAL_K, CONTEXT_MAX_TOKENS
+
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+EMBED_DIM = 384  # bge-small-en-v1.5, float32 vectors in FAISS / Pinecone
+
+# (question, strings that must all appear in ONE retrieved chunk)
+QUERIES = [
+    ("What are the mess breakfast timings on Sundays?", ["Breakfast 07:15 AM to 09:30 AM 08:00 AM to 10:00 AM", "Sundays"]),
+    ("Hostel attendance time from November to February", ["01st Nov – 28th Feb 7:00 PM", "Attendance Timings"]),
+    ("How many free electricity units for a Std AC 02 Seater room?", ["Std AC 02 Seater 750", "Free Units"]),
+    ("Free electricity units for Std Non-AC 04 Seater", ["Std Non-AC 04 Seater 300", "Free Units"]),
+    ("Late fee amount if academic fee is paid between 21.01.2026 and 31.01.2026", ["21.01.2026 31.01.2026 2000", "Late Fee Amount"]),
+    ("Last date for academic fee submission", ["Last Date for Fee Submission", "31.12.2025"]),
+    ("Central library opening hours", ["Central LPU Library will remain open from 08:00 am to 12:00 am"]),
+    ("Compounding fee for late return of a library book", ["compounding fee of ₹. 10 per book per day"]),
+    ("How many books can a regular student issue from the library and for how long?", ["maximum of 3 books", "one week"]),
+    ("When can I meet Dr. Lovi Raj Gupta?", ["Lovi Raj Gupta", "4pm to 6pm"]),
+    ("Landline number of BH-5 hostel block C", ["BH-5", "01824-444531"]),
+    ("Minimum CGPA for credit transfer for continuing students", ["minimum #6.5 CGPA", "Continuing students"]),
+    ("How early should candidates reach the examination hall?", ["30 Minutes before the start time of examination"]),
+    ("How do I update my phone number on the placement portal?", ["Update Details menu option", "phone number"]),
+    ("What is the placement reinstatement fee?", ["Placement Reinstatement Fee is the fine imposed"]),
+    ("Can I carry a mobile phone into the exam room?", ["NO MOBILE PHONES", "Unfair means case"]),
+]
+
+
+class Doc:
+    """Minimal stand-in for langchain Document (page_content + metadata)."""
+
+    def __init__(self, page_content, metadata=None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+def load_corpus():
+    """Same units as src/ingest.py: one document per PDF page, one per text file."""
+    from pypdf import PdfReader
+    docs, skipped = [], []
+    for path in sorted(glob.glob(os.path.join(ROOT, "data", "**", "*"), recursive=True)):
+        name = os.path.basename(path)
+        if path.endswith(".pdf"):
+            for i, page in enumerate(PdfReader(path).pages):
+                docs.append(Doc(page.extract_text() or "", {"source": name, "page": i}))
+        elif path.endswith(".txt"):
+            with open(path, encoding="utf-8") as f:
+                docs.append(Doc(f.read(), {"source": name}))
+        elif path.endswith(".docx"):
+            xml = zipfile.ZipFile(path).read("word/document.xml").decode("utf-8")
+            paras = re.findall(r"<w:p[ >].*?</w:p>", xml, re.S)
+            text = "\n".join(html.unescape("".join(re.findall(r"<w:t[^>]*>([^<]*)</w:t>", p))) for p in paras)
+            docs.append(Doc(text, {"source": name}))
+        elif path.endswith(".doc"):
+            skipped.append(name)  # needs unstructured (as in ingest)
+    return docs, skipped
+
+
+def baseline_chunks(docs):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=60)
+    out = []
+    for doc in docs:
+        out.extend(Doc(t, dict(doc.metadata)) for t in splitter.split_text(doc.page_content))
+    return out
+
+
+def norm(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+# --- RETRIEVAL ---
+class BM25:
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.docs = [Counter(re.findall(r"\w+", t.lower())) for t in texts]
+        self.lengths = [sum(d.values()) for d in self.docs]
+        self.avg = sum(self.lengths) / max(1, len(self.lengths))
+        df = Counter(w for d in self.docs for w in d)
+        n = len(self.docs)
+        self.idf = {w: math.log(1 + (n - f + 0.5) / (f + 0.5)) for w, f in df.items()}
+        self.k1, self.b = k1, b
+
+    def search(self, query, k):
+        terms = re.findall(r"\w+", query.lower())
+        scores = []
+        for i, d in enumerate(self.docs):
+            s = 0.0
+            for w in terms:
+                if w in d:
+                    tf = d[w]
+                    s += self.idf[w] * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg))
+            scores.append(s)
+        return sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+
+
+def load_reranker():
+    try:
+        from flashrank import Ranker
+        return Ranker(model_name=RERANK_MODEL_NAME, cache_dir=CACHE_DIR)
+    except Exception as e:
+        print(f"⚠️ FlashRank unavailable ({type(e).__name__}), reporting BM25 only")
+        return None
+
+
+def recall(chunks, reranker):
+    texts = [c.page_content for c in chunks]
+    normed = [norm(t) for t in texts]
+    bm25 = BM25(texts)
+    hits_k, hits_ctx = 0, 0
+    for question, needles in QUERIES:
+        ranked = bm25.search(question, 20)
+        if reranker:
+            from flashrank import RerankRequest
+            passages = [{"id": str(i), "text": texts[i]} for i in ranked]
+            ranked = [int(r["id"]) for r in reranker.rerank(RerankRequest(query=question, passages=passages))]
+        top = ranked[:RETRIEVAL_K]
+        found = [i for i in top if all(norm(n) in normed[i] for n in needles)]
+        hits_k += bool(found)
+        # What reaches the LLM: old = top 2 cut at 1200 chars, new = packed to CONTEXT_MAX_TOKENS
+        if "tokens" in chunks[0].metadata:
+            picked, used = [], 0
+            for i in top:
+                if picked and used + chunks[i].metadata["tokens"] > CONTEXT_MAX_TOKENS:
+                    continue
+                picked.append(i)
+                used += chunks[i].metadata["tokens"]
+            context = norm("\n\n".join(texts[i] for i in picked))
+        else:
+            context = norm("\n\n".join(texts[i] for i in top[:2])[:1200])
+        hits_ctx += any(all(norm(n) in norm(texts[i]) for n in needles) and norm(texts[i]) in context for i in top)
+    return hits_k / len(QUERIES), hits_ctx / len(QUERIES)
+
+
+def rows_intact(docs, chunks):
+    """Share of table rows and list items (from the source text) that land whole in some chunk."""
+    rows = {norm(b["text"]) for d in docs for b in split_blocks(d.page_content)
+            if b["kind"] in ("row", "list") and len(b["text"]) >= 12}
+    blob = [norm(c.page_content) for c in chunks]
+    intact = sum(1 for r in rows if any(r in c for c in blob))
+    return intact / max(1, len(rows)), len(rows)
+
+
+def report(label, docs, chunks, counter, reranker):
+    tokens = [counter.count(c.page_content) for c in chunks]
+    text_bytes = sum(len(c.page_content.encode("utf-8")) for c in chunks)
+    vector_bytes = len(chunks) * EMBED_DIM * 4
+    over = sum(1 for t in tokens if t > 512)
+    intact, n_rows = rows_intact(docs, chunks)
+    r_k, r_ctx = recall(chunks, reranker)
+    print(f"  {label:18s} {len(chunks):6d} chunks | {sum(tokens):7d} tokens (mean {sum(tokens) / len(tokens):5.1f}, "
+          f"max {max(tokens)}, >512: {over}) | index {(vector_bytes + text_bytes) / 1e6:5.2f} MB "
+          f"(vectors {vector_bytes / 1e6:.2f}) | rows/items intact {intact:6.1%} of {n_rows} "
+          f"| recall@{RETRIEVAL_K} {r_k:5.1%} | in context {r_ctx:5.1%}")
+    return {"chunks": len(chunks), "recall": r_k, "context": r_ctx, "intact": intact}
+
+
+def main():
+    counter = get_token_counter()
+    print(f"🔢 Token counts from: {counter.source}")
+    docs, skipped = load_corpus()
+    sources = {d.metadata["source"] for d in docs}
+    print(f"📄 {len(sources)} files / {len(docs)} pages" + (f" (skipped {', '.join(skipped)})" if skipped else ""))
+
+    corpus = norm("\n".join(d.page_content for d in docs))
+    missing = [q for q, needles in QUERIES if not all(norm(n) in corpus for n in needles)]
+    for q in missing:
+        print(f"  ⚠️ Answer not in extracted corpus: {q}")
+
+    reranker = load_reranker()
+    print(f"\n⏱️ Chunking + retrieval on {len(QUERIES)} questions with known answers")
+    ok = True
+    try:
+        before = report("400/60 chars", docs, baseline_chunks(docs), counter, reranker)
+    except ImportError:
+        print("  ⚠️ langchain_text_splitters not installed, skipping the baseline")
+        before = None
+
+    start = time.perf_counter()
+    chunks = chunk_documents(docs)
+    elapsed = time.perf_counter() - start
+    after = report("structure-aware", docs, chunks, counter, reranker)
+    print(f"  ✂️ Chunked in {elapsed * 1000:.0f} ms")
+
+    has_meta = all(isinstance(c.metadata.get("tokens"), int) and c.metadata["tokens"] == counter.count(c.page_content)
+                   for c in chunks)
+    print(f"  {'✅' if has_meta else '❌'} Every chunk carries its token count in metadata")
+    ok &= has_meta
+
+    if before:
+        better = after["recall"] >= before["recall"] and after["intact"] > before["intact"]
+        print(f"  {'✅' if better else '❌'} Recall {before['recall']:.1%} -> {after['recall']:.1%}, "
+              f"rows/items intact {before['intact']:.1%} -> {after['intact']:.1%}, "
+              f"chunks {before['chunks']} -> {after['chunks']}")
+        ok &= better
+
+    if ok:
+        print("\n✅ Structure-aware chunking verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
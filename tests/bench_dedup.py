@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate chunk removal (src/dedup.py) on the corpus in data/: chunk
+count and index size before/after, the duplicate groups found, whether every
+source is still credited, and retrieval diversity (unique passages in the
+top-k) with BM25 over the chunks.
+Usage: python tests/bench_dedup.py
+"""
+import sys
+import os
+import time
+import logging
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_chunking import BM25, QUERIES, load_corpus  # same corpus loader / retriever
+from src.chunker import chunk_documents
+from src.dedup import dedup_chunks, find_clusters, shingles
+from src.config import RETRIEVAL_K, DEDUP_THRESHOLD, DEDUP_MIN_WORDS
+
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+EMBED_DIM = 384
+
+# Exam-instruction questions hit the duplicated Annexure 6.0 files
+EXTRA_QUERIES = [
+    "Is a calculator allowed in the examination hall?",
+    "What should I do if I find unauthorized material near my seat?",
+    "Can I leave the examination hall before the end of the exam?",
+    "How do I fill the OMR sheet?",
+]
+
+
+def index_mb(chunks):
+    text = sum(len(c.page_content.encode("utf-8")) for c in chunks)
+    return (len(chunks) * EMBED_DIM * 4 + text) / 1e6
+
+
+def _passages(text):
+    return [shingles(line) for line in text.split("\n") if len(line.split()) >= DEDUP_MIN_WORDS]
+
+
+def diversity(chunks):
+    """
+    Share of retrieved top-k passages (paragraphs / list items) that are unique,
+    and share of questions whose top-k holds the same passage twice.
+    """
+    texts = [c.page_content for c in chunks]
+    bm25 = BM25(texts)
+    questions = [q for q, _ in QUERIES] + EXTRA_QUERIES
+    unique, total, repeated = 0, 0, 0
+    for q in questions:
+        seen, hit = [], False
+        for i in bm25.search(q, RETRIEVAL_K):
+            for p in _passages(texts[i]):
+                dup = any(len(p & o) / max(1, len(p | o)) >= DEDUP_THRESHOLD for o in seen)
+                hit |= dup
+                unique += not dup
+                total += 1
+                seen.append(p)
+        repeated += hit
+    return unique / max(1, total), repeated / len(questions)
+
+
+def main():
+    ok = True
+    docs, _ = load_corpus()
+    chunks = chunk_documents(docs)
+    before_mb = index_mb(chunks)
+    before_div, before_rep = diversity(chunks)
+    n_before = len(chunks)
+
+    start = time.perf_counter()
+    kept, stats = dedup_chunks(chunks)
+    elapsed = time.perf_counter() - start
+
+    print(f"🧹 Dedup (threshold {DEDUP_THRESHOLD}) over {n_before} chunks in {elapsed * 1000:.0f} ms")
+    groups = Counter(tuple(c.metadata["sources"]) for c in kept if len(c.metadata.get("sources", [])) > 1)
+    for sources, n in groups.most_common(8):
+        print(f"  {n:4d} chunk(s) shared by {' + '.join(sources)}")
+
+    after_div, after_rep = diversity(kept)
+    print(f"\n  {'':14s} {'chunks':>7s} {'index MB':>9s} {'unique passages@' + str(RETRIEVAL_K):>18s} {'queries w/ repeats':>19s}")
+    print(f"  {'before':14s} {n_before:7d} {before_mb:9.2f} {before_div:18.1%} {before_rep:19.1%}")
+    print(f"  {'after':14s} {len(kept):7d} {index_mb(kept):9.2f} {after_div:18.1%} {after_rep:19.1%}")
+
+    # 1. The two revisions of Annexure 6.0 share passages: one copy kept, credited to both files
+    annex = ["Annexure_6.0_Candidate_Instructions .pdf", "Annexure_6.0_Candidate_Instructions.pdf"]
+    before_n = Counter(c.metadata["source"] for c in chunks)
+    after_n = Counter(c.metadata["source"] for c in kept)
+    credited = [c for c in kept if set(annex) <= set(c.metadata.get("sources", []))]
+    passed = after_n[annex[1]] < before_n[annex[1]] and len(credited) >= 10
+    print(f"\n  {'✅' if passed else '❌'} Annexure chunks {[before_n[s] for s in annex]} -> {[after_n[s] for s in annex]}, "
+          f"{len(credited)} credit both files")
+    ok &= passed
+
+    # 2. No source lost: every file is still cited by some chunk
+    all_sources = {c.metadata["source"] for c in chunks}
+    cited = {s for c in kept for s in c.metadata.get("sources", [c.metadata["source"]])}
+    passed = all_sources == cited
+    print(f"  {'✅' if passed else '❌'} Provenance: {len(cited)}/{len(all_sources)} sources still cited")
+    ok &= passed
+
+    # 3. Merged chunks are genuinely the same passage (exact Jaccard, not the estimate)
+    worst = 1.0
+    for group in find_clusters([c.page_content for c in chunks]):
+        a = shingles(chunks[group[0]].page_content)
+        for i in group[1:]:
+            b = shingles(chunks[i].page_content)
+            worst = min(worst, len(a & b) / max(1, len(a | b)))
+    passed = worst >= DEDUP_THRESHOLD - 0.1
+    print(f"  {'✅' if passed else '❌'} Lowest true Jaccard inside a group: {worst:.2f}")
+    ok &= passed
+
+    # 4. Near (not exact) duplicates are caught: reformatted and lightly edited copies
+    base = next(c.page_content for c in chunks if len(c.page_content) > 500)
+    variants = [base, base.upper().replace("\n", "  "), base.replace(".", ". ").replace("the ", "the  ", 3)]
+    variants.append(" ".join(base.split()[:-2]) + " (revised)")
+    found = find_clusters(variants + ["An unrelated passage about hostel mess timings and laundry."])
+    passed = len(found) == 1 and sorted(found[0]) == [0, 1, 2, 3]
+    print(f"  {'✅' if passed else '❌'} Reformatted/edited copies grouped, unrelated text kept: {found}")
+    ok &= passed
+
+    passed = after_div >= before_div and len(kept) < n_before
+    print(f"  {'✅' if passed else '❌'} {stats['dropped']} chunks + {stats['passages']} passages dropped, "
+          f"{stats['bytes_saved'] / 1024:.0f} KB text, diversity {before_div:.1%} -> {after_div:.1%}")
+    ok &= passed
+
+    if ok:
+        print("\n✅ Near-duplicate dedup verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
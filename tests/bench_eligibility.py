@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Exam-registration peak: check_eligibility / query_database with the MCP result
+cache and precomputed eligibility table vs re-reading and re-evaluating per call.
+Also checks that writes (same process and another process) invalidate results.
+Runs against a temp store (./data is not touched).
+Usage: python tests/bench_eligibility.py [num_students] [sqlite|json]
+"""
+import sys
+import os
+import json
+import time
+import logging
+import random
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+NUM_STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+BACKEND = sys.argv[2] if len(sys.argv) > 2 else "sqlite"
+NUM_CHECKS = 20000
+
+TMP = tempfile.mkdtemp(prefix="eligibility_")
+# Configure before importing src so config picks it up
+os.environ["USER_STORE_BACKEND"] = BACKEND
+os.environ["USER_DB_PATH"] = os.path.join(TMP, "users.db")
+os.environ["WARMUP_MODE"] = "lazy"
+
+from src import user_storage
+user_storage.USER_DATA_DIR = os.path.join(TMP, "users")
+from src import mcp_server
+from src.eligibility import evaluate, CONTEXTS
+logging.disable(logging.INFO)  # tool logs would flood the output
+
+
+def seed():
+    rng = random.Random(7)
+    for i in range(NUM_STUDENTS):
+        sid = str(10000000 + i)
+        user_storage.save_user_profile(sid, f"Student {i}", "B.TECH cse", 5)
+        user_storage.save_academic_record(sid, {
+            "attendance": {"average_percentage": rng.choice([62.5, 74.9, 75.0, 88.1])},
+            "fees": {"status": rng.choice(["Paid", "Paid", "Pending"]), "amount_due": 0},
+        })
+
+
+def uncached_check(student_id, context):
+    # The previous tool body: read the record and evaluate the rules on every call
+    record = user_storage.get_academic_record(student_id)
+    if not record:
+        return "Error: Student record not found."
+    return evaluate(record)[CONTEXTS[context]]
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def run(name, fn, ops):
+    start = time.perf_counter()
+    for args in ops:
+        fn(*args)
+    rate = len(ops) / (time.perf_counter() - start)
+    print(f"  {name:40s} {rate:10.0f} calls/s")
+    return rate
+
+
+def main():
+    ok = True
+    try:
+        print(f"🏗️ Seeding {NUM_STUDENTS} students ({BACKEND} backend)...")
+        seed()
+        reads = []
+        real_get = user_storage.get_academic_record
+        user_storage.get_academic_record = lambda sid: reads.append(sid) or real_get(sid)
+        start = time.perf_counter()
+        try:
+            mcp_server.ELIGIBILITY.build()
+        finally:
+            user_storage.get_academic_record = real_get
+        print(f"📋 Eligibility table built in {(time.perf_counter() - start) * 1000:.0f} ms")
+        ok &= check("Build reads each record once (no per-student re-read)", not reads, f"{len(reads)} extra reads")
+
+        rng = random.Random(1)
+        ops = [(str(10000000 + rng.randrange(NUM_STUDENTS)), "exam") for _ in range(NUM_CHECKS)]
+        profile_ops = [("profile", json.dumps({"student_id": sid})) for sid, _ in ops]
+
+        print(f"\n⏱️ {NUM_CHECKS} calls")
+        base = run("check_eligibility: read + evaluate", uncached_check, ops)
+        fast = run("check_eligibility: precomputed table", mcp_server.ELIGIBILITY.check, ops)
+        run("query_database profile: cached", mcp_server._query_database, profile_ops)
+        print(f"  ✅ Eligibility {fast / base:.1f}x faster | table {mcp_server.ELIGIBILITY.status()} "
+              f"| tool cache {mcp_server.TOOL_CACHE.status()}")
+
+        print("\n🔍 Invalidation")
+        sid = "10000000"
+        # Only the student's own writes invalidate: not a new thread's connection, not other students
+        version = user_storage.record_version(sid)
+        with ThreadPoolExecutor(1) as pool:
+            threaded = pool.submit(user_storage.record_version, sid).result()
+        user_storage.save_academic_record("10000001", {"attendance": {"average_percentage": 80}, "fees": {"status": "Paid"}})
+        rebuilds = mcp_server.ELIGIBILITY.rebuilds
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(mcp_server.ELIGIBILITY.check, sid, "exam").result()
+        passed = (threaded == version == user_storage.record_version(sid)
+                  and mcp_server.ELIGIBILITY.rebuilds == rebuilds)
+        print(f"  {'✅' if passed else '❌'} Other threads and students leave the row valid: "
+              f"version {version} -> {threaded} (thread), rebuilds +{mcp_server.ELIGIBILITY.rebuilds - rebuilds}")
+        ok &= passed
+
+        user_storage.save_academic_record(sid, {"attendance": {"average_percentage": 50}, "fees": {"status": "Paid"}})
+        answer = mcp_server._check_eligibility(sid, "exam")
+        passed = answer.startswith("NOT ELIGIBLE. Attendance is 50")
+        print(f"  {'✅' if passed else '❌'} Same-process write: {answer}")
+        ok &= passed
+
+        mcp_server._query_database("profile", json.dumps({"student_id": sid}))
+        code = (
+            "from src import user_storage as u; "
+            f"u.USER_DATA_DIR = {user_storage.USER_DATA_DIR!r}; "
+            f"u.save_user_profile({sid!r}, 'Renamed', 'B.TECH cse', 6); "
+            f"u.save_academic_record({sid!r}, {{'attendance': {{'average_percentage': 90}}, 'fees': {{'status': 'Paid'}}}})"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, env=dict(os.environ),
+                       stderr=subprocess.DEVNULL)
+        answer = mcp_server._check_eligibility(sid, "exam")
+        profile = json.loads(mcp_server._query_database("profile", json.dumps({"student_id": sid})))
+        passed = answer.startswith("ELIGIBLE") and profile["name"] == "Renamed"
+        print(f"  {'✅' if passed else '❌'} Other-process write: {answer} | name={profile['name']}")
+        ok &= passed
+
+        # A write landing while build() is iterating must not be cached under its new version
+        real_iter = user_storage.iter_academic_records
+
+        def racing_iter():
+            for student_id, version, record in real_iter():
+                if student_id == sid:
+                    user_storage.save_academic_record(sid, {"attendance": {"average_percentage": 40},
+                                                            "fees": {"status": "Paid"}})
+                yield student_id, version, record
+        user_storage.iter_academic_records = racing_iter
+        try:
+            mcp_server.ELIGIBILITY.build()
+        finally:
+            user_storage.iter_academic_records = real_iter
+        answer = mcp_server.ELIGIBILITY.check(sid, "exam")
+        passed = answer.startswith("NOT ELIGIBLE. Attendance is 40")
+        print(f"  {'✅' if passed else '❌'} Write during build: {answer}")
+        ok &= passed
+
+        missing = mcp_server._check_eligibility("99999999", "exam")
+        print(f"  {'✅' if missing.startswith('Error') else '❌'} Unknown student: {missing}")
+        ok &= missing.startswith("Error")
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+    if ok:
+        print("\n✅ Cached eligibility verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
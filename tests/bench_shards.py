@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Per-doc_type shards (src/local_store.py: save_sharded_store / ShardedVectorStore)
+vs one local index that post-filters: recall@k against exact search within the
+doc_type, and query latency, for filtered queries (what identify_intent sends)
+and for unfiltered queries that fan out to every shard (in parallel vs one by
+one). Synthetic vectors with a skewed doc_type split like the corpus (mostly
+regulations, few map pages) and topics shared across doc_types.
+Usage: python tests/bench_shards.py [num_vectors]
+"""
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_vector_index import make_queries, synthetic
+from src.local_store import LocalVectorStore, ShardedVectorStore, load_local_store, save_sharded_store, save_store
+
+K = 5
+QUERIES_PER_TYPE = 50
+SPLIT = {"regulation": 0.45, "general": 0.25, "hostel": 0.15, "navigation": 0.08, "hospital": 0.04, "map": 0.03}
+
+
+def corpus(n):
+    """doc_types share topics (fees sit in regulations and in hostel rules), so a filter is not a cluster."""
+    vectors = synthetic(n)
+    types = np.random.default_rng(0).choice(list(SPLIT), size=n, p=list(SPLIT.values()))
+    metas = [{"source": f"{t}_{i // 40}.pdf", "doc_type": str(t), "chunk_index": i} for i, t in enumerate(types)]
+    return vectors, metas
+
+
+def key(meta):
+    return meta["source"], meta["chunk_index"]
+
+
+def measure(store, queries, truth, filters):
+    hits, times, leaked = 0, [], 0
+    for q, want, flt in zip(queries, truth, filters):
+        start = time.perf_counter()
+        found = store.search_by_vector(q, K, flt)
+        times.append((time.perf_counter() - start) * 1000)
+        hits += len({key(d.metadata) for d, _ in found} & want)
+        leaked += sum(1 for d, _ in found if flt and d.metadata["doc_type"] != flt["doc_type"])
+    return hits / (len(truth) * K), float(np.percentile(times, 50)), float(np.percentile(times, 95)), leaked
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    vectors, metas = corpus(n)
+    types = np.array([m["doc_type"] for m in metas])
+    texts = [f"chunk {m['chunk_index']} of {m['source']}" for m in metas]
+    print(f"🗂️ {len(vectors)} vectors: " + ", ".join(f"{t} {int((types == t).sum())}" for t in SPLIT))
+
+    # Filtered: queries near chunks of each doc_type; truth = exact top-k inside that doc_type
+    queries, truth, filters = [], [], []
+    for doc_type in SPLIT:
+        rows = np.flatnonzero(types == doc_type)
+        for q in make_queries(vectors[rows], QUERIES_PER_TYPE, seed=len(queries)):
+            top = rows[np.argsort(-(vectors[rows] @ q))[:K]]
+            queries.append(q)
+            truth.append({key(metas[i]) for i in top})
+            filters.append({"doc_type": doc_type})
+    # Unfiltered: truth = exact global top-k
+    open_queries = make_queries(vectors, 200, seed=99)
+    open_truth = [{key(metas[i]) for i in np.argsort(-(vectors @ q))[:K]} for q in open_queries]
+
+    tmp = tempfile.mkdtemp(prefix="shards_")
+    ok = True
+    try:
+        for kind in ("int8", "ivfpq"):
+            single_path, sharded_path = os.path.join(tmp, f"single_{kind}"), os.path.join(tmp, f"sharded_{kind}")
+            start = time.perf_counter()
+            save_store(single_path, texts, metas, vectors, kind)
+            single_s = time.perf_counter() - start
+            start = time.perf_counter()
+            shards = save_sharded_store(sharded_path, texts, metas, vectors, kind)
+            sharded_s = time.perf_counter() - start
+            single = LocalVectorStore(single_path)
+            sharded = ShardedVectorStore(sharded_path, workers=len(shards))
+            sequential = ShardedVectorStore(sharded_path, workers=1)
+            kinds = {name: s.index.kind for name, s in sharded.shards.items()}
+            print(f"\n📐 {kind}: single index built in {single_s:.1f}s, {len(shards)} shards in {sharded_s:.1f}s "
+                  f"({', '.join(f'{t} {kinds[t]}' for t in shards)})")
+
+            print(f"  {'filtered (doc_type)':28s} {'recall@' + str(K):>9s} {'p50 ms':>7s} {'p95 ms':>7s}")
+            per_type = {}
+            for label, store in (("single index + post-filter", single), ("shard", sharded)):
+                recall, p50, p95, leaked = measure(store, queries, truth, filters)
+                per_type[label] = {t: measure(store, queries[i:i + QUERIES_PER_TYPE], truth[i:i + QUERIES_PER_TYPE],
+                                              filters[i:i + QUERIES_PER_TYPE])[0]
+                                   for t, i in zip(SPLIT, range(0, len(queries), QUERIES_PER_TYPE))}
+                per_type[label]["all"], per_type[label]["p50"], per_type[label]["leaked"] = recall, p50, leaked
+                print(f"  {label:28s} {recall:9.3f} {p50:7.2f} {p95:7.2f}")
+            print("  recall by doc_type:        " + "  ".join(
+                f"{t} {per_type['single index + post-filter'][t]:.2f}->{per_type['shard'][t]:.2f}" for t in SPLIT))
+
+            print(f"  {'unfiltered':28s} {'recall@' + str(K):>9s} {'p50 ms':>7s} {'p95 ms':>7s}")
+            open_results = {}
+            for label, store in (("single index", single), ("shards, parallel fan-out", sharded),
+                                 ("shards, one by one", sequential)):
+                recall, p50, p95, _ = open_results[label] = measure(store, open_queries, open_truth, [None] * len(open_queries))
+                print(f"  {label:28s} {recall:9.3f} {p50:7.2f} {p95:7.2f}")
+            print()
+
+            old, new = per_type["single index + post-filter"], per_type["shard"]
+            ok &= check(f"{kind}: filtered queries only return their doc_type", new["leaked"] == 0 and old["leaked"] == 0)
+            # post-filtering re-scores a FILTER_OVERFETCH-times larger shortlist, which hides some PQ
+            # error on the largest doc_type; what it cannot do is find the rare ones
+            ok &= check(f"{kind}: shard recall >= post-filter recall, rare doc_types found",
+                        new["all"] >= old["all"] and new["map"] >= max(old["map"], 0.95),
+                        f"{old['all']:.3f} -> {new['all']:.3f}, map {old['map']:.2f} -> {new['map']:.2f}")
+            ok &= check(f"{kind}: filtered recall", new["all"] >= (0.95 if kind == "int8" else 0.85), f"{new['all']:.3f}")
+            ok &= check(f"{kind}: filtered queries faster on a shard", new["p50"] < old["p50"],
+                        f"{old['p50']:.2f} ms -> {new['p50']:.2f} ms")
+            fan_recall = open_results["shards, parallel fan-out"][0]
+            ok &= check(f"{kind}: merged fan-out recall", fan_recall >= open_results["single index"][0] - 0.02,
+                        f"{open_results['single index'][0]:.3f} single vs {fan_recall:.3f} sharded")
+            parallel, serial = open_results["shards, parallel fan-out"][1], open_results["shards, one by one"][1]
+            if (os.cpu_count() or 1) > 1:
+                ok &= check(f"{kind}: parallel fan-out faster than one by one", parallel < serial,
+                            f"{serial:.2f} ms -> {parallel:.2f} ms")
+            else:
+                print(f"  ⚠️ {kind}: 1 CPU, shards searched in turn (fan-out needs spare cores)")
+
+        class Embedding:
+            def embed_query(self, text):
+                return vectors[int(text)]
+
+        store = load_local_store(Embedding(), os.path.join(tmp, "sharded_int8"))
+        hits = store.similarity_search_with_score("7", k=3)
+        ok &= check("load_local_store opens the sharded layout", isinstance(store, ShardedVectorStore)
+                    and key(hits[0][0].metadata) == key(metas[7]) and hits[0][0].page_content == texts[7])
+        ok &= check("Unknown doc_type returns nothing", store.similarity_search_with_score("7", 3, {"doc_type": "x"}) == [])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if ok:
+        print("\n✅ Sharded local index verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
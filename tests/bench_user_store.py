@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Read-throughput benchmark: legacy per-file JSON vs the SQLite student store.
+Builds a synthetic data/users tree in a temp dir (nothing in ./data is touched).
+Usage: python tests/bench_user_store.py [num_students]
+"""
+import sys
+import os
+import json
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.student_store import StudentStore, import_json_tree
+
+NUM_STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+NUM_READS = 20000
+HOT_SET = 500  # students active during an exam-registration peak
+
+
+def build_tree(root):
+    example = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "data", "users", "12313773", "timetable.json")
+    with open(example) as f:
+        timetable = json.load(f)
+    for i in range(NUM_STUDENTS):
+        sid = str(10000000 + i)
+        d = os.path.join(root, sid)
+        os.makedirs(d)
+        with open(os.path.join(d, "profile.json"), "w") as f:
+            json.dump({"student_id": sid, "name": f"Student {i}", "program": "B.TECH cse", "semester": 5}, f, indent=2)
+        with open(os.path.join(d, "timetable.json"), "w") as f:
+            json.dump(timetable, f, indent=2)
+        with open(os.path.join(d, "academic_record.json"), "w") as f:
+            json.dump({"attendance": {"average_percentage": 80}, "fees": {"status": "Paid"}}, f, indent=2)
+
+
+def json_read(root, sid, kind):
+    path = os.path.join(root, sid, f"{kind}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def workload(seed):
+    rng = random.Random(seed)
+    kinds = ["profile", "timetable", "academic_record"]
+    return [(str(10000000 + rng.randrange(HOT_SET)), rng.choice(kinds)) for _ in range(NUM_READS)]
+
+
+def run(name, read, threads=1):
+    ops = workload(1)
+    start = time.perf_counter()
+    if threads == 1:
+        for sid, kind in ops:
+            read(sid, kind)
+    else:
+        def worker(chunk):
+            for sid, kind in chunk:
+                read(sid, kind)
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, [ops[i::threads] for i in range(threads)]))
+    elapsed = time.perf_counter() - start
+    print(f"  {name:38s} {NUM_READS / elapsed:10.0f} reads/s")
+    return NUM_READS / elapsed
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="userstore_")
+    try:
+        users_dir = os.path.join(tmp, "users")
+        print(f"🏗️ Building {NUM_STUDENTS} synthetic students...")
+        build_tree(users_dir)
+
+        store = StudentStore(os.path.join(tmp, "users.db"), cache_size=4096)
+        start = time.perf_counter()
+        import_json_tree(store, users_dir)
+        print(f"📦 Bulk import: {store.count()} docs in {time.perf_counter() - start:.2f}s")
+
+        uncached = StudentStore(os.path.join(tmp, "users.db"), cache_size=0)
+
+        print(f"\n⏱️ {NUM_READS} reads over {HOT_SET} hot students")
+        base = run("JSON files (os.path.exists + json.load)", lambda s, k: json_read(users_dir, s, k))
+        run("SQLite, no cache", uncached.get)
+        cached = run("SQLite + LRU", store.get)
+        run("SQLite + LRU (8 threads)", store.get, threads=8)
+        print(f"\n✅ LRU store: {cached / base:.1f}x JSON-file throughput "
+              f"(hit rate {store.hits / max(1, store.hits + store.misses):.0%})")
+
+        # Write invalidation sanity check
+        sid = "10000000"
+        store.get(sid, "profile")
+        store.put(sid, "profile", {"student_id": sid, "name": "Renamed"})
+        assert store.get(sid, "profile")["name"] == "Renamed", "Stale cache after write"
+        print("✅ Cache invalidated on write")
+
+        # Another process commits; a thread that opens its connection afterwards
+        # must not be served the cached copy
+        before = store.version(sid)
+        other = StudentStore(os.path.join(tmp, "users.db"))
+        other.put(sid, "profile", {"student_id": sid, "name": "Renamed elsewhere"})
+        with ThreadPoolExecutor(1) as pool:
+            name, version = pool.submit(lambda: (store.get(sid, "profile")["name"], store.version(sid))).result()
+        assert name == "Renamed elsewhere", "Stale cache after another process wrote"
+        assert version != before, "version() unchanged after another process wrote"
+        print("✅ Cache invalidated on external write (new connection)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Compact local indexes (src/vector_index.py): recall@k against exact float32
+search, memory (resident scan structures, on-disk size, RSS after loading and
+querying in a fresh process) and query latency for flat / int8 / IVF-PQ, with
+and without the float re-scoring pass. Runs on the real bge-small vectors in
+db/faiss_index (read with numpy, no faiss needed) and on a synthetic
+clustered set sized like a much larger corpus.
+Usage: python tests/bench_vector_index.py [num_synthetic_vectors]
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.vector_index import build_index, load_index
+from src.local_store import LocalVectorStore, save_store
+
+K = 10
+NUM_QUERIES = 200
+DIM = 384
+CONFIGS = [  # (label, kind, build params, search params)
+    ("flat", "flat", {}, {"rescore": 1}),
+    ("int8", "int8", {}, {"rescore": 1}),
+    ("int8 + rescore", "int8", {}, {"rescore": 8}),
+    ("ivfpq np8", "ivfpq", {"m": 48}, {"nprobe": 8, "rescore": 1}),
+    ("ivfpq np8 + rescore", "ivfpq", {"m": 48}, {"nprobe": 8, "rescore": 8}),
+    ("ivfpq np16 + rescore", "ivfpq", {"m": 48}, {"nprobe": 16, "rescore": 8}),
+]
+
+
+def read_faiss_flat(path):
+    """Vectors of a faiss IndexFlat file ("IxF2"/"IxFI" header, then a float vector)."""
+    raw = open(path, "rb").read()
+    dim = int(np.frombuffer(raw[4:8], np.int32)[0])
+    count = int(np.frombuffer(raw[8:16], np.int64)[0])
+    size = int(np.frombuffer(raw[37:45], np.uint64)[0])  # after dummy fields, is_trained, metric
+    assert raw[:4] in (b"IxF2", b"IxFI") and size == dim * count, "not a flat faiss index"
+    return np.frombuffer(raw[45:45 + size * 4], np.float32).reshape(count, dim).copy()
+
+
+def synthetic(n, dim=DIM, clusters=None, seed=0):
+    """Normalized vectors around random topic centres (embeddings are far from uniform)."""
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(8, n // 200)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def make_queries(x, n=NUM_QUERIES, noise=0.5, seed=1):
+    """Questions land near, not on, stored chunks."""
+    rng = np.random.default_rng(seed)
+    q = x[rng.integers(0, len(x), n)] + noise * rng.standard_normal((n, x.shape[1])).astype(np.float32) / np.sqrt(x.shape[1])
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def exact_top(x, queries, k=K):
+    scores = queries @ x.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def rss_kb():
+    """(anonymous, file-backed) resident KB. Mapped file pages are clean page cache the kernel can drop."""
+    found = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                found[line.split(":")[0]] = int(line.split()[1])
+    return found.get("RssAnon", 0), found.get("RssFile", 0)
+
+
+def child(path, queries_path, params):
+    """Fresh process: RSS growth from opening the index and answering every query."""
+    queries = np.load(queries_path)
+    anon, mapped = rss_kb()
+    index = load_index(path, **params)
+    for q in queries:
+        index.search(q, K)
+    after = rss_kb()
+    print(json.dumps({"anon_kb": after[0] - anon, "file_kb": after[1] - mapped}))
+
+
+def disk_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def bench(name, x, tmp):
+    print(f"\n📐 {name}: {len(x)} x {x.shape[1]} vectors, {NUM_QUERIES} queries, recall@{K} vs exact float32")
+    queries = make_queries(x)
+    truth = exact_top(x, queries)
+    queries_path = os.path.join(tmp, "queries.npy")
+    np.save(queries_path, queries)
+    float32_mb = x.nbytes / 1e6
+    print(f"  {'':22s} {'build s':>8s} {'recall':>7s} {'p50 ms':>7s} {'p95 ms':>7s} {'resident MB':>12s} "
+          f"{'disk MB':>8s} {'RSS anon+file MB':>17s}")
+    print(f"  {'float32 (faiss flat)':22s} {'':>8s} {1:7.3f} {'':>7s} {'':>7s} {float32_mb:12.2f} {float32_mb:8.2f}")
+
+    results, built = {}, {}
+    for label, kind, build_params, search_params in CONFIGS:
+        path = os.path.join(tmp, f"{name}_{kind}_{build_params.get('m', '')}")
+        build_s = 0.0
+        if path not in built:
+            start = time.perf_counter()
+            build_index(x, kind, **build_params).save(path)
+            built[path] = time.perf_counter() - start
+            build_s = built[path]
+        index = load_index(path, **search_params)
+        hits, times = 0, []
+        for q, want in zip(queries, truth):
+            start = time.perf_counter()
+            _, ids = index.search(q, K)
+            times.append((time.perf_counter() - start) * 1000)
+            hits += len(set(ids.tolist()) & set(want.tolist()))
+        recall = hits / truth.size
+        out = subprocess.run([sys.executable, __file__, "--child", path, queries_path, json.dumps(search_params)],
+                             capture_output=True, text=True, check=True)
+        rss = json.loads(out.stdout.strip().splitlines()[-1])
+        results[label] = {"recall": recall, "p50": float(np.percentile(times, 50)),
+                          "resident": index.resident_bytes() / 1e6, "disk": disk_bytes(path) / 1e6,
+                          "per_vector": getattr(index, "codes", index.vectors).nbytes / len(x)}
+        r = results[label]
+        print(f"  {label:22s} {build_s:8.1f} {recall:7.3f} {r['p50']:7.2f} {np.percentile(times, 95):7.2f} "
+              f"{r['resident']:12.2f} {r['disk']:8.2f} {rss['anon_kb'] / 1024:8.1f} + {rss['file_kb'] / 1024:6.1f}")
+    return results, float32_mb
+
+
+def check_store(tmp):
+    """The local store returns the right texts / metadata and honours filters."""
+    x = synthetic(3000, seed=3)
+    types = ["map", "regulation", "hostel", "hospital", "navigation", "general"]
+    texts = [f"Chunk {i} ✓ about {types[i % 6]}" for i in range(len(x))]
+    metas = [{"source": f"doc_{i // 50}.pdf", "doc_type": types[i % 6], "page": i % 7} for i in range(len(x))]
+    path = os.path.join(tmp, "store")
+    save_store(path, texts, metas, x, "ivfpq")
+    store = LocalVectorStore(path)
+    hits = store.search_by_vector(x[42], k=3)
+    ok = hits[0][0].page_content == texts[42] and hits[0][0].metadata == metas[42] and hits[0][1] > 0.99
+    filtered = store.search_by_vector(x[42], k=3, filter={"doc_type": "hostel"})
+    ok &= len(filtered) == 3 and all(d.metadata["doc_type"] == "hostel" for d, _ in filtered)
+    ok &= all(store.chunks.text(i) == texts[i] for i in range(0, len(x), 97))
+    return ok
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tmp = tempfile.mkdtemp(prefix="vector_index_")
+    ok = True
+    try:
+        faiss_path = os.path.join(ROOT, "db", "faiss_index", "index.faiss")
+        if os.path.exists(faiss_path):
+            real, _ = bench("corpus", read_faiss_flat(faiss_path), tmp)
+            print()
+            ok &= check("Corpus: int8 + rescore keeps recall", real["int8 + rescore"]["recall"] >= 0.98,
+                        f"{real['int8 + rescore']['recall']:.3f}")
+        else:
+            print(f"⚠️ {faiss_path} not found, skipping the corpus vectors")
+
+        syn, float32_mb = bench("synthetic", synthetic(n), tmp)
+        print()
+        ok &= check("Flat float16 matches float32", syn["flat"]["recall"] >= 0.99, f"{syn['flat']['recall']:.3f}")
+        ok &= check("Re-scoring recovers int8 recall", syn["int8 + rescore"]["recall"] >= max(0.97, syn["int8"]["recall"]),
+                    f"{syn['int8']['recall']:.3f} -> {syn['int8 + rescore']['recall']:.3f}")
+        ok &= check("Re-scoring recovers IVF-PQ recall",
+                    syn["ivfpq np16 + rescore"]["recall"] >= 0.9
+                    and syn["ivfpq np8 + rescore"]["recall"] > syn["ivfpq np8"]["recall"],
+                    f"{syn['ivfpq np8']['recall']:.3f} -> {syn['ivfpq np8 + rescore']['recall']:.3f} "
+                    f"(np16 {syn['ivfpq np16 + rescore']['recall']:.3f})")
+        ok &= check("int8 codes 4x smaller than float32", syn["int8"]["resident"] <= float32_mb / 3.9,
+                    f"{syn['int8']['resident']:.1f} MB vs {float32_mb:.1f} MB")
+        # codebooks are a fixed ~0.4 MB; per vector, PQ stores m bytes instead of 4 * dim
+        ok &= check("IVF-PQ codes >= 8x smaller than float32", syn["ivfpq np8"]["per_vector"] <= DIM * 4 / 8,
+                    f"{syn['ivfpq np8']['per_vector']:.0f} B/vector, {syn['ivfpq np8']['resident']:.1f} MB total")
+        ok &= check("IVF-PQ faster than a flat scan", syn["ivfpq np8 + rescore"]["p50"] < syn["flat"]["p50"],
+                    f"{syn['ivfpq np8 + rescore']['p50']:.2f} ms vs {syn['flat']['p50']:.2f} ms")
+        ok &= check("Local store: texts, metadata and filters", check_store(tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if ok:
+        print("\n✅ Compact vector indexes verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load test: stdio MCP server per request vs one shared streamable-HTTP server.
+N worker processes (like uvicorn --workers N) each run CONCURRENCY request
+loops; every request does a profile lookup + an eligibility check.
+Reports latency percentiles, throughput and MCP server memory (Linux /proc).
+Usage: python tests/load_mcp_transport.py [workers] [requests_per_worker]
+       WARMUP_MODE=background python tests/load_mcp_transport.py   # include model load in RSS
+"""
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import statistics
+import subprocess
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("WARMUP_MODE", "lazy")
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+CONCURRENCY = 4
+STUDENT_ID = "12313773"
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def one_request(client) -> int:
+    await client.call_tools([
+        ("query_database", {"query_type": "profile", "params": json.dumps({"student_id": STUDENT_ID})}),
+        ("check_eligibility", {"student_id": STUDENT_ID, "context": "exam"}),
+    ])
+    meta = await client.call_tool("get_metadata", {})
+    return json.loads(meta.content[0].text)["pid"]
+
+
+async def worker_main(transport: str, url: str):
+    from src.mcp_client import UniMcpClient, SharedMcpClient
+    latencies, server_rss = [], {}
+    shared = SharedMcpClient(transport, url) if transport != "stdio" else None
+    remaining = list(range(REQUESTS))
+
+    async def loop():
+        while remaining:
+            remaining.pop()
+            start = time.perf_counter()
+            if shared:
+                pid = await one_request(await shared.get())
+            else:
+                # Old behaviour: every request launches its own server
+                async with UniMcpClient("stdio") as client:
+                    pid = await one_request(client)
+                    server_rss[pid] = rss_mb(pid)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(loop() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    if shared:
+        await shared.close()
+    return {"latencies": latencies, "elapsed": elapsed, "server_rss": list(server_rss.values())}
+
+
+def run_worker(args):
+    import logging
+    logging.disable(logging.INFO)
+    return asyncio.run(worker_main(*args))
+
+
+def report(label, results, server_rss_total):
+    latencies = sorted(l for r in results for l in r["latencies"])
+    elapsed = max(r["elapsed"] for r in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:22s} p50 {statistics.median(latencies):7.1f} ms | p95 {p95:7.1f} ms | "
+          f"{len(latencies) / elapsed:6.1f} req/s | MCP server RSS {server_rss_total:7.1f} MB")
+
+
+def main():
+    print(f"🏋️ {WORKERS} workers x {CONCURRENCY} concurrent loops x {REQUESTS} requests (WARMUP_MODE={os.environ['WARMUP_MODE']})")
+    ctx = multiprocessing.get_context("spawn")
+
+    # 1. stdio: one server process per request
+    with ctx.Pool(WORKERS) as pool:
+        results = pool.map(run_worker, [("stdio", None)] * WORKERS)
+    per_server = statistics.mean(r for res in results for r in res["server_rss"])
+    # Every in-flight request holds its own server
+    report("stdio per request", results, per_server * WORKERS * CONCURRENCY)
+
+    # 2. One shared streamable-HTTP server for all workers
+    port = free_port()
+    env = dict(os.environ, MCP_TRANSPORT="streamable-http", MCP_PORT=str(port))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "mcp_server.py")],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        url = f"http://127.0.0.1:{port}/mcp"
+        with ctx.Pool(WORKERS) as pool:
+            results = pool.map(run_worker, [("http", url)] * WORKERS)
+        report("shared streamable-http", results, rss_mb(server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print("\n✅ Load test finished (server memory with a shared server does not grow with workers)")
+
+
+if __name__ == "__main__":
+    main()
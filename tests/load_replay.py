@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Load generator / traffic replayer for web_app (/ask, /ask_stream) and api.py
+(/chat). Replays a recorded query log (QUERY_LOG_PATH, JSON lines) or a
+built-in question mix as open-loop traffic: requests are sent at their arrival
+times (log timestamps scaled by --speed, or Poisson at --rate) with at most
+--concurrency in flight. Latency is measured from the scheduled arrival, so a
+server that falls behind shows up as queueing, not as fewer requests.
+
+Both apps run in this process under uvicorn (real HTTP, real streaming) with
+in-process fakes for Pinecone (vector store), the LLMs (Ollama: token stream
+with a per-token delay; Gemini for timetable questions) and MCP (the real
+server, connected in memory), and a temp user store (./data is not touched). Reports throughput, latency and
+time-to-first-byte percentiles and error rates per endpoint; --out saves the
+report, --compare diffs two saved reports.
+
+Usage: python tests/load_replay.py [--log queries.jsonl [--speed 10]] [--requests 200] [--rate 20]
+                                   [--concurrency 16] [--mode router|agent|rag] [--out run.json]
+       python tests/load_replay.py --compare before.json after.json
+"""
+import sys
+import os
+import json
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))  # api.py imports its siblings top-level
+
+TMP = tempfile.mkdtemp(prefix="load_replay_")
+# Configure before importing src so config picks it up
+os.environ["USER_DB_PATH"] = os.path.join(TMP, "users.db")
+os.environ["WARMUP_MODE"] = "lazy"
+os.environ.pop("QUERY_LOG_PATH", None)  # don't record the replay itself
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+ENDPOINTS = ("/ask", "/ask_stream", "/chat")
+DEFAULT_RATE = 20.0
+MIX = {"/ask_stream": 0.6, "/ask": 0.2, "/chat": 0.2}
+STUDENTS = [str(12400000 + i) for i in range(50)]
+QUESTIONS = [
+    "What are the hostel timings?", "What is the hostel fee for 2025?", "Is ragging punishable by expulsion?",
+    "What is the fine for returning library books late?", "Where is block 34?", "What is the dress code for exams?",
+    "Who do I call in a medical emergency?", "How do I apply for a hostel room change?",
+    "What is my next class?", "Show my full timetable", "What is my attendance?", "Which semester is on my profile?",
+    "Am I eligible for the end term exam?", "Do I have any pending fee dues on my account?",
+    "If I fail a course, can I register for the summer term?", "Compare the hostel fees for boys and girls hostels",
+]
+
+
+# --- FAKES ---
+class Doc:
+    def __init__(self, text, source):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+class FakeVectorStore:
+    """Pinecone stand-in: fixed round-trip, passages derived from the query."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def similarity_search_with_score(self, query, k=3, filter=None):
+        time.sleep(self.seconds)
+        return [(Doc(f"University regulation {i} about: {query}", f"data/regulations/Rules_{i}.pdf"), 0.2)
+                for i in range(k)][:k]
+
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """
+    LLM stand-in: first token after `prefill` seconds, then one token every
+    `per_token` seconds (blocking, like ChatOllama). Agent prompts (message
+    lists) get a ReAct search action first, then an answer after the
+    observation. Fails a fraction `error_rate` of calls.
+    """
+
+    def __init__(self, prefill, per_token, tokens, error_rate, seed=0):
+        self.prefill, self.per_token, self.tokens, self.error_rate = prefill, per_token, tokens, error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _maybe_fail(self):
+        with self.lock:
+            failed = self.rng.random() < self.error_rate
+        if failed:
+            raise RuntimeError("fake LLM: upstream error")
+
+    def _answer(self, prompt):
+        last = prompt[-1].content if isinstance(prompt, list) else prompt
+        if isinstance(prompt, list) and not last.startswith("Observation:"):
+            question = last.split("] ", 1)[-1]
+            return f'Action: search_documents\nAction Input: {json.dumps({"query": question})}'
+        return " ".join(f"word{i}" for i in range(self.tokens))
+
+    def invoke(self, prompt):
+        self._maybe_fail()
+        text = self._answer(prompt)
+        time.sleep(self.prefill + self.per_token * len(text.split()))
+        return Reply(text)
+
+    def stream(self, prompt):
+        self._maybe_fail()
+        time.sleep(self.prefill)
+        for word in self._answer(prompt).split():
+            time.sleep(self.per_token)
+            yield Reply(word + " ")
+
+
+class FakeGemini:
+    """google.generativeai stand-in for timetable questions search_timetable can't answer from the index."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def GenerativeModel(self, name):
+        return self
+
+    def generate_content(self, prompt):
+        reply = self.llm.invoke(prompt)
+        reply.text = reply.content
+        return reply
+
+
+class FakeAgent:
+    """Used when UniAgent can't be imported here: same cost shape (plan, tool, answer)."""
+
+    def __init__(self, session_key=None):
+        from src.llm_router import get_llm
+        self.llm = get_llm(session_key)
+
+    async def process_query_stream(self, query, student_id=None):
+        from src import rag_pipeline
+        await asyncio.to_thread(self.llm.invoke, [Reply(query)])
+        context = await asyncio.to_thread(rag_pipeline.retrieve_context, query)
+        yield (await asyncio.to_thread(self.llm.invoke, f"Observation: {context}")).content
+
+
+def install_fakes(args):
+    """Points the apps at the fakes. Returns the web_app and api FastAPI apps."""
+    from src import user_storage
+    user_storage.USER_DATA_DIR = os.path.join(TMP, "users")
+    seed_students()
+
+    from src import llm_router, rag_pipeline, query_router
+    llm = FakeLLM(args.llm_prefill_ms / 1000, args.llm_token_ms / 1000, args.llm_tokens, args.llm_error_rate)
+    llm_router._LLM_INSTANCE = llm
+    import rag_pipeline as api_rag_pipeline  # api.py's copy of the module (imported top-level)
+    import timetable_extractor as api_timetable_extractor
+    from src import timetable_extractor
+    for module in (timetable_extractor, api_timetable_extractor):
+        module.genai = FakeGemini(llm)
+    for module in (rag_pipeline, api_rag_pipeline):
+        module.VECTORSTORE = FakeVectorStore(args.search_ms / 1000)
+        module.RERANKER = None
+        module._RESOURCES_LOADED = True
+        module.get_llm = llm_router.get_llm
+
+    try:
+        from mcp.shared.memory import create_connected_server_and_client_session
+        from src import llm_agent, mcp_server
+        from src.mcp_client import UniMcpClient
+    except ImportError as e:
+        print(f"⚠️ UniAgent not importable here ({e}); agent questions use a stand-in agent", file=sys.stderr)
+        real_agent_stream = query_router.agent_stream
+        query_router.agent_stream = lambda q, s=None, f=None: real_agent_stream(q, s, f or FakeAgent)
+    else:
+        @contextlib.asynccontextmanager
+        async def in_memory_session():
+            # the real MCP server, connected in memory instead of a stdio child per request
+            async with create_connected_server_and_client_session(mcp_server.mcp) as session:
+                client = UniMcpClient()
+                client.session = session
+                yield client
+        llm_agent.mcp_session = in_memory_session
+
+    from src import web_app
+    import api
+    if args.mode == "rag":
+        web_app.USE_MCP = False
+    elif args.mode == "agent":
+        web_app.QUERY_ROUTER = False
+    return web_app.app, api.app
+
+
+def seed_students():
+    from src import user_storage
+    with open(os.path.join(ROOT, "data", "users", "12313773", "timetable.json")) as f:
+        timetable = json.load(f)
+    rng = random.Random(7)
+    for i, sid in enumerate(STUDENTS):
+        user_storage.save_user_profile(sid, f"Student {i}", "B.TECH cse", 5)
+        user_storage.save_user_timetable(sid, timetable, "timetable.pdf")
+        user_storage.save_academic_record(sid, {
+            "attendance": {"average_percentage": rng.choice([62.5, 74.9, 75.0, 88.1])},
+            "fees": {"status": rng.choice(["Paid", "Paid", "Pending"]), "amount_due": 0},
+        })
+
+
+# --- SERVERS ---
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(*apps):
+    """
+    Runs the apps under uvicorn on one event loop in a background thread (they
+    share module state such as stream_share, which is bound to a loop); returns
+    ([(server, base_url)], thread).
+    """
+    import uvicorn
+    servers = []
+    for app in apps:
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        servers.append((server, f"http://127.0.0.1:{port}"))
+
+    async def run_all():
+        await asyncio.gather(*(server.serve() for server, _ in servers))
+    thread = threading.Thread(target=asyncio.run, args=(run_all(),), daemon=True)
+    thread.start()
+    while not all(server.started for server, _ in servers):
+        time.sleep(0.02)
+    return servers, thread
+
+
+# --- TRAFFIC ---
+def load_log(path):
+    """Recorded requests: JSON lines from QUERY_LOG_PATH, or plain text (one question per line)."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                e = json.loads(line)
+                entries.append({"ts": e.get("ts"), "endpoint": e.get("endpoint"),
+                                "question": e["question"], "student_id": e.get("student_id")})
+            else:
+                entries.append({"ts": None, "endpoint": None, "question": line, "student_id": None})
+    return entries
+
+
+def schedule(args):
+    """[(send_at_seconds, endpoint, question, student_id)] for the run."""
+    rng = random.Random(args.seed)
+    if args.log:
+        entries = load_log(args.log)
+    else:
+        entries = [{"ts": None, "endpoint": None, "question": rng.choice(QUESTIONS),
+                    "student_id": rng.choice(STUDENTS)} for _ in range(args.requests or 200)]
+    entries = (entries * (args.requests // len(entries) + 1))[:args.requests] if args.requests else entries
+
+    timestamps = [e["ts"] for e in entries]
+    use_log_times = args.rate is None and all(t is not None for t in timestamps)
+    rate = DEFAULT_RATE if args.rate is None else args.rate
+    plan, t = [], 0.0
+    for i, e in enumerate(entries):
+        if use_log_times:
+            t = (timestamps[i] - timestamps[0]) / args.speed
+        elif i:
+            t += rng.expovariate(rate) if rate else 0.0
+        endpoint = args.endpoint or e["endpoint"]
+        if endpoint not in ENDPOINTS:
+            endpoint = rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        plan.append((t, endpoint, e["question"], e["student_id"]))
+    return plan
+
+
+async def send(client, urls, endpoint, question, student_id):
+    """(ttfb_at, done_at, error) for one request; errors include SSE error events."""
+    if endpoint == "/chat":
+        url, body = f"{urls['api']}/chat", {"query": question, "student_id": student_id}
+    else:
+        url, body = f"{urls['web']}{endpoint}", {"question": question, "student_id": student_id}
+    first, data = None, b""
+    try:
+        async with client.stream("POST", url, json=body) as response:
+            async for chunk in response.aiter_bytes():
+                if first is None:
+                    first = time.perf_counter()
+                data += chunk
+            if response.status_code != 200:
+                return first, time.perf_counter(), f"HTTP {response.status_code}"
+    except Exception as e:
+        return first, time.perf_counter(), type(e).__name__
+    done = time.perf_counter()
+    text = data.decode("utf-8", "replace")
+    if endpoint == "/ask_stream" and '"error"' in text:
+        return first, done, "SSE error event"
+    if not text.strip():
+        return first, done, "empty response"
+    return first, done, None
+
+
+async def run(args, urls):
+    import httpx
+    plan = schedule(args)
+    gate = asyncio.Semaphore(args.concurrency)
+    results = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+
+        async def one(at, endpoint, question, student_id):
+            await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+            scheduled = start + at
+            async with gate:
+                first, done, error = await send(client, urls, endpoint, question, student_id)
+            results.append({"endpoint": endpoint, "error": error, "latency_ms": (done - scheduled) * 1000,
+                            "ttfb_ms": (first - scheduled) * 1000 if first else None, "done_at": done - start})
+
+        await asyncio.gather(*(one(*p) for p in plan))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+# --- REPORT ---
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(p / 100 * len(values)), len(values) - 1)], 1)
+
+
+def summarize(results, elapsed, args):
+    groups = {"all": results}
+    for endpoint in ENDPOINTS:
+        rows = [r for r in results if r["endpoint"] == endpoint]
+        if rows:
+            groups[endpoint] = rows
+    report = {"config": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+              "elapsed_s": round(elapsed, 2), "endpoints": {}}
+    for name, rows in groups.items():
+        ok = [r for r in rows if not r["error"]]
+        errors = {}
+        for r in rows:
+            if r["error"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        latency = [r["latency_ms"] for r in ok]
+        ttfb = [r["ttfb_ms"] for r in ok if r["ttfb_ms"] is not None]
+        report["endpoints"][name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round((len(rows) - len(ok)) / len(rows), 4),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+            **{f"latency_p{p}_ms": percentile(latency, p) for p in (50, 90, 99)},
+            "latency_max_ms": round(max(latency), 1) if latency else None,
+            **{f"ttfb_p{p}_ms": percentile(ttfb, p) for p in (50, 90, 99)},
+        }
+    return report
+
+
+COLUMNS = [("requests", "reqs"), ("throughput_rps", "rps"), ("error_rate", "err%"), ("latency_p50_ms", "p50 ms"),
+           ("latency_p90_ms", "p90 ms"), ("latency_p99_ms", "p99 ms"), ("ttfb_p50_ms", "ttfb p50"),
+           ("ttfb_p99_ms", "ttfb p99")]
+
+
+def _fmt(key, value):
+    if value is None:
+        return "-"
+    if key == "error_rate":
+        return f"{value * 100:.1f}"
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def print_report(report):
+    c = report["config"]
+    print(f"\n📈 {c['mode']} mode, {report['endpoints']['all']['requests']} requests in {report['elapsed_s']}s "
+          f"(rate {'log x' + str(c['speed']) if c['rate'] is None and c['log'] else c['rate'] if c['rate'] is not None else DEFAULT_RATE}, concurrency {c['concurrency']})")
+    print("  " + f"{'endpoint':12s}" + "".join(f"{label:>10s}" for _, label in COLUMNS))
+    for name, row in report["endpoints"].items():
+        print("  " + f"{name:12s}" + "".join(f"{_fmt(key, row[key]):>10s}" for key, _ in COLUMNS))
+        if row["errors"]:
+            print(f"  {'':12s}errors: {row['errors']}")
+
+
+def compare(before, after):
+    """Side-by-side of two reports, with the change in each metric."""
+    print(f"\n🔬 {before['config']['mode']} ({before['elapsed_s']}s) -> {after['config']['mode']} ({after['elapsed_s']}s)")
+    print("  " + f"{'endpoint':12s}{'metric':>16s}{'before':>10s}{'after':>10s}{'change':>10s}")
+    for name in before["endpoints"]:
+        if name not in after["endpoints"]:
+            continue
+        for key, label in COLUMNS:
+            a, b = before["endpoints"][name][key], after["endpoints"][name][key]
+            change = f"{(b - a) / a * 100:+.0f}%" if a and b is not None else "-"
+            print("  " + f"{name:12s}{label:>16s}{_fmt(key, a):>10s}{_fmt(key, b):>10s}{change:>10s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay query traffic against web_app and api.py with fakes.")
+    parser.add_argument("--log", help="query log (QUERY_LOG_PATH JSON lines, or one question per line)")
+    parser.add_argument("--requests", type=int, help="requests to send (default: the whole log, or 200; log repeated/truncated)")
+    parser.add_argument("--rate", type=float, help=f"Poisson arrivals per second, 0 = all at once "
+                                                   f"(default: log timestamps, or {DEFAULT_RATE:g})")
+    parser.add_argument("--speed", type=float, default=1.0, help="log replay speed-up (with log timestamps)")
+    parser.add_argument("--concurrency", type=int, default=16, help="max requests in flight")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, help="send everything here (default: log / built-in mix)")
+    parser.add_argument("--mode", choices=("router", "agent", "rag"), default="router",
+                        help="/ask_stream path: query router, agent for everything (USE_MCP), or plain RAG")
+    parser.add_argument("--search-ms", type=float, default=120, help="fake Pinecone round-trip")
+    parser.add_argument("--llm-prefill-ms", type=float, default=150, help="fake LLM time to first token")
+    parser.add_argument("--llm-token-ms", type=float, default=15, help="fake LLM time per token")
+    parser.add_argument("--llm-tokens", type=int, default=40, help="fake LLM answer length")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="save the report (JSON) here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two saved reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            compare(json.load(f), json.load(g))
+        return 0
+
+    web, api = install_fakes(args)
+    servers, thread = serve(web, api)
+    urls = {"web": servers[0][1], "api": servers[1][1]}
+    print(f"🚀 web_app at {urls['web']}, api at {urls['api']} (fakes: search {args.search_ms:.0f} ms, "
+          f"LLM {args.llm_prefill_ms:.0f} ms + {args.llm_token_ms:.0f} ms/token x {args.llm_tokens})")
+    try:
+        results, elapsed = asyncio.run(run(args, urls))
+    finally:
+        for server, _ in servers:
+            server.should_exit = True
+        thread.join(timeout=10)
+    report = summarize(results, elapsed, args)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        import shutil
+        shutil.rmtree(TMP, ignore_errors=True)
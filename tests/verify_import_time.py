@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the server entry points (python -X importtime).
+Fails if importing a module exceeds its budget or pulls in a deferred SDK.
+Usage: python tests/verify_import_time.py
+       IMPORT_BUDGET_MS=1500 python tests/verify_import_time.py
+"""
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "2000"))
+
+ENTRY_POINTS = ["src.web_app", "src.mcp_server"]
+
+# Must NOT be imported at module level (they are loaded lazily on first use)
+DEFERRED_MODULES = [
+    "google.generativeai",
+    "elevenlabs",
+    "langchain_ollama",
+    "langchain_community",
+    "langchain_pinecone",
+    "pinecone",
+    "flashrank",
+    "sentence_transformers",
+    "torch",
+]
+
+
+def measure(module: str):
+    """Imports `module` in a fresh interpreter; returns (self-reported rows, leaked heavy modules)."""
+    probe = (
+        f"import sys, importlib; importlib.import_module({module!r}); "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BASE_DIR, capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import of {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    leaked = [m for m in proc.stdout.strip().splitlines()[-1].split(",") if m] if proc.stdout.strip() else []
+    return rows, leaked
+
+
+def verify():
+    failed = False
+    for module in ENTRY_POINTS:
+        print(f"\n🔍 {module}")
+        rows, leaked = measure(module)
+
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+        cumulative = {}
+        for name, _, cumulative_us in rows:
+            cumulative[name] = max(cumulative.get(name, 0), cumulative_us)
+        slowest = sorted(cumulative.items(), key=lambda r: r[1], reverse=True)[:8]
+        for name, cumulative_us in slowest:
+            print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+        status = "✅" if total_ms <= BUDGET_MS else "❌"
+        print(f"  {status} Total import time: {total_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)")
+        if total_ms > BUDGET_MS:
+            failed = True
+
+        if leaked:
+            print(f"  ❌ Deferred SDKs imported eagerly: {', '.join(leaked)}")
+            failed = True
+        else:
+            print("  ✅ No deferred SDKs imported")
+
+    if failed:
+        sys.exit(1)
+    print("\n✅ Import-time budget respected.")
+
+
+if __name__ == "__main__":
+    verify()
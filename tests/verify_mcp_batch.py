@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+MCP round-trips: sequential call_tool vs pipelined call_tools vs one batch_tools
+call, against the real stdio server. Uses the student tools (local data), so no
+Pinecone or LLM is needed.
+Usage: python tests/verify_mcp_batch.py [student_id]
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("WARMUP_MODE", "lazy")  # don't load retrieval models for this test
+
+from src.mcp_client import UniMcpClient
+
+STUDENT_ID = sys.argv[1] if len(sys.argv) > 1 else "12313773"
+ROUNDS = 20
+
+CALLS = [
+    ("query_database", {"query_type": "profile", "params": json.dumps({"student_id": STUDENT_ID})}),
+    ("query_database", {"query_type": "timetable", "params": json.dumps({"student_id": STUDENT_ID})}),
+    ("check_eligibility", {"student_id": STUDENT_ID, "context": "exam"}),
+]
+
+
+def text(result):
+    return "".join(c.text for c in result.content if c.type == "text")
+
+
+def check_agent_parsing(parse_actions):
+    reply = (
+        'Action: query_database\nAction Input: {"query_type": "profile", "params": "{\\"student_id\\": \\"1\\"}"}\n'
+        'Action: check_eligibility\nAction Input: {"student_id": "1", "context": "exam"}'
+    )
+    names = [name for name, _ in parse_actions(reply)]
+    parsed = names == ["query_database", "check_eligibility"]
+    print(f"  {'✅' if parsed else '❌'} Agent parses multiple actions: {names}")
+    return parsed
+
+
+async def timed(label, fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        out = await fn()
+    ms = (time.perf_counter() - start) * 1000 / ROUNDS
+    print(f"  {label:34s} {ms:7.2f} ms per 3-lookup question")
+    return out
+
+
+async def main():
+    ok = True
+    async with UniMcpClient() as client:
+        tools = {t.name for t in await client.get_tools()}
+        print(f"🛠️ Tools: {sorted(tools)}")
+        ok &= "batch_tools" in tools
+
+        print(f"\n⏱️ {ROUNDS} rounds of {len(CALLS)} lookups")
+
+        async def sequential():
+            return [text(await client.call_tool(name, args)) for name, args in CALLS]
+
+        async def pipelined():
+            return [text(r) for r in await client.call_tools(CALLS)]
+
+        async def batched():
+            payload = [{"tool": name, "args": args} for name, args in CALLS]
+            result = await client.call_tool("batch_tools", {"calls": payload})
+            return [item.get("result", item.get("error")) for item in json.loads(text(result))]
+
+        seq = await timed("Sequential call_tool", sequential)
+        pipe = await timed("Pipelined call_tools (1 session)", pipelined)
+        batch = await timed("batch_tools (1 round-trip)", batched)
+
+        same = seq == pipe == batch
+        print(f"\n  {'✅' if same else '❌'} All three paths return identical results")
+        ok &= same
+
+        bad = await client.call_tool("batch_tools", {"calls": [{"tool": "rm_rf", "args": {}}]})
+        err = json.loads(text(bad))[0]
+        print(f"  {'✅' if 'error' in err else '❌'} Unknown tool reported per call: {err.get('error')}")
+        ok &= "error" in err
+
+    # Agent parsing: two actions in one reply become one pipelined step
+    try:
+        from src.llm_agent import parse_actions
+    except ImportError as e:
+        print(f"  ⚠️ Agent parse check skipped ({e})")
+        parse_actions = None
+    if parse_actions:
+        ok &= check_agent_parsing(parse_actions)
+
+    if ok:
+        print("\n✅ MCP batching and pipelining verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
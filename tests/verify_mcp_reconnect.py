@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared MCP connection recovery (src/mcp_client.py SharedMcpClient): kills the
+streamable-HTTP MCP server under a live shared session, checks that the call
+in flight fails fast instead of hanging, and that the next request reconnects
+once the server is back, even when the caller swallows the error (as UniAgent
+does with tool errors).
+Usage: python tests/verify_mcp_reconnect.py
+"""
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("WARMUP_MODE", "lazy")
+
+from src import mcp_client
+
+CALL_TIMEOUT = 10  # a hung call fails the check instead of the script
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, MCP_TRANSPORT="streamable-http", MCP_PORT=str(port))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "mcp_server.py")],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("MCP server did not start")
+
+
+async def server_pid() -> int:
+    """get_metadata through mcp_session(), the way the agent reaches the server."""
+    async with mcp_client.mcp_session() as mcp:
+        result = await asyncio.wait_for(mcp.call_tool("get_metadata", {}), CALL_TIMEOUT)
+        return json.loads(result.content[0].text)["pid"]
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+async def main():
+    port = free_port()
+    mcp_client.MCP_CLIENT_TRANSPORT = "http"
+    mcp_client.SHARED_CLIENT = mcp_client.SharedMcpClient("http", f"http://127.0.0.1:{port}/mcp")
+    ok = True
+    server = start_server(port)
+    try:
+        print("🔌 Shared session, then the server is killed")
+        first = await server_pid()
+        ok &= check("Connected", first == server.pid, f"server pid {first}")
+
+        server.kill()
+        server.wait()
+        start = time.perf_counter()
+        async with mcp_client.mcp_session() as mcp:
+            try:
+                await asyncio.wait_for(mcp.call_tool("get_metadata", {}), CALL_TIMEOUT)
+                error = None
+            except Exception as e:
+                error = e  # swallowed, like UniAgent's tool error handling
+        elapsed = time.perf_counter() - start
+        ok &= check("Call on the dead session fails fast", isinstance(error, ConnectionError),
+                    f"{type(error).__name__} after {elapsed * 1000:.0f} ms")
+
+        print("\n🔁 Server restarted")
+        server = start_server(port)
+        try:
+            second = await server_pid()
+            ok &= check("Next request reconnects", second == server.pid and second != first,
+                        f"server pid {first} -> {second}")
+        except Exception as e:
+            ok &= check("Next request reconnects", False, f"{type(e).__name__}: {e}")
+        await mcp_client.SHARED_CLIENT.close()
+    finally:
+        server.kill()
+        server.wait()
+
+    if ok:
+        print("\n✅ Shared MCP connection recovers from a server restart")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
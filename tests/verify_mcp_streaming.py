@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Streaming search_documents: the client gets a partial result (top dense hit +
+sources) as soon as dense search returns, before reranking finishes.
+Runs the real MCP server in-memory with a simulated slow vector store and
+reranker (standing in for Pinecone / FlashRank latency), so no keys are needed.
+Usage: python tests/verify_mcp_streaming.py
+"""
+import sys
+import os
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("WARMUP_MODE", "lazy")
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from src import rag_pipeline, mcp_server
+from src.mcp_client import UniMcpClient
+
+logging.disable(logging.INFO)
+
+DENSE_SECONDS = 0.4   # Pinecone round-trip
+RERANK_SECONDS = 0.6  # FlashRank over RETRIEVAL_K passages
+
+
+class Doc:
+    def __init__(self, text, source):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+class SlowVectorStore:
+    def similarity_search_with_score(self, query, k=3, filter=None):
+        time.sleep(DENSE_SECONDS)
+        return [
+            (Doc("Hostel fee for the academic year includes mess charges.", "data/hostel/Hostel_Fee_2025.pdf"), 0.62),
+            (Doc("Fee once paid is non-refundable after allotment.", "data/hostel/Hostel_Rules.pdf"), 0.55),
+            (Doc("Library timings are 9 AM to 9 PM.", "data/academics/Library Policy.pdf"), 0.31),
+        ][:k]
+
+
+class SlowReranker:
+    def rerank(self, request):
+        time.sleep(RERANK_SECONDS)
+        return sorted(request.passages, key=lambda p: p["id"])
+
+
+async def main():
+    rag_pipeline.VECTORSTORE = SlowVectorStore()
+    rag_pipeline.RERANKER = SlowReranker()
+    rag_pipeline._RESOURCES_LOADED = True
+
+    ok = True
+    async with create_connected_server_and_client_session(mcp_server.mcp) as session:
+        client = UniMcpClient()
+        client.session = session
+
+        start = time.perf_counter()
+        first_partial_ms, partials, result = None, [], None
+        async for kind, payload in client.call_tool_stream("search_documents", {"query": "hostel fees"}):
+            if kind == "partial":
+                partials.append(payload)
+                if first_partial_ms is None:
+                    first_partial_ms = (time.perf_counter() - start) * 1000
+            else:
+                result = payload
+        total_ms = (time.perf_counter() - start) * 1000
+
+        print("🔍 search_documents (slow dense search + rerank)")
+        if partials:
+            print(f"  📄 Partial after {first_partial_ms:.0f} ms: found in {partials[0]['sources']}")
+        print(f"  ✅ Final result after {total_ms:.0f} ms ({len(result.content[0].text)} chars)")
+
+        streamed = bool(partials) and first_partial_ms < total_ms - RERANK_SECONDS * 1000 * 0.8
+        print(f"  {'✅' if streamed else '❌'} First passage arrived ~{total_ms - (first_partial_ms or total_ms):.0f} ms before the final result")
+        ok &= streamed
+
+        # Plain call_tool (no progress callback) is unchanged, and the repeat is served from cache
+        start = time.perf_counter()
+        plain = await client.call_tool("search_documents", {"query": "hostel fees"})
+        cached_ms = (time.perf_counter() - start) * 1000
+        same = plain.content[0].text == result.content[0].text
+        print(f"  {'✅' if same else '❌'} call_tool returns the same text (cached: {cached_ms:.0f} ms)")
+        ok &= same
+
+    if ok:
+        print("\n✅ Streaming tool results verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
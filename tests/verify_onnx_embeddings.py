@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Parity + benchmark: int8 ONNX bge-small vs the PyTorch HuggingFaceEmbeddings.
+Build the ONNX model first: python scripts/utils/export_onnx_embeddings.py
+Usage: python tests/verify_onnx_embeddings.py           # parity + benchmark
+       python tests/verify_onnx_embeddings.py --bench   # benchmark only
+"""
+import sys
+import os
+import json
+import resource
+import subprocess
+import statistics
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+QUERIES = [
+    "What are the hostel fees?",
+    "How do I apply for scholarships?",
+    "What is the attendance policy?",
+    "Where is the library located?",
+    "What are the exam eligibility criteria?",
+    "emergency contact number for the university hospital",
+    "Can I change my program after first year?",
+    "reappear examination guidelines",
+]
+
+PASSAGES = [
+    "Hostel fee for the academic year includes mess charges and must be paid before allotment.",
+    "Students must maintain a minimum of 75% attendance to be eligible for end term examinations.",
+    "The central library is located in Block 13 and remains open from 9 AM to 9 PM.",
+    "Scholarship applications are submitted through the UMS portal under the Scholarship tab.",
+    "For medical emergencies contact the University Hospital helpline available 24x7.",
+    "Change of program is permitted only once, subject to eligibility and seat availability.",
+    "Students with a reappear must register for the examination within the notified window.",
+    "Credit transfer is allowed for courses completed under the Semester Abroad Program.",
+]
+
+MIN_COSINE = 0.99  # int8 weights vs fp32 on the same normalized CLS vector
+
+
+def load(provider: str):
+    if provider == "onnx":
+        from src.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings()
+    from src.embeddings_router import get_embeddings
+    return get_embeddings("huggingface")
+
+
+def parity():
+    print("🔍 Parity: ONNX int8 vs PyTorch fp32")
+    torch_model, onnx_model = load("huggingface"), load("onnx")
+
+    texts = QUERIES + PASSAGES
+    a = np.array(torch_model.embed_documents(texts))
+    b = np.array(onnx_model.embed_documents(texts))
+    cosines = (a * b).sum(axis=1)
+    print(f"  Cosine(torch, onnx): min {cosines.min():.4f} | mean {cosines.mean():.4f}")
+
+    # Retrieval agreement: same top-1 passage for every query
+    pa = np.array(torch_model.embed_documents(PASSAGES))
+    pb = np.array(onnx_model.embed_documents(PASSAGES))
+    agree = 0
+    for query in QUERIES:
+        top_torch = int(np.argmax(pa @ np.array(torch_model.embed_query(query))))
+        top_onnx = int(np.argmax(pb @ np.array(onnx_model.embed_query(query))))
+        agree += top_torch == top_onnx
+    print(f"  Top-1 agreement: {agree}/{len(QUERIES)}")
+
+    assert cosines.min() >= MIN_COSINE, f"Cosine below {MIN_COSINE}"
+    assert agree == len(QUERIES), "Retrieval ranking changed"
+    print("  ✅ Vectors are interchangeable with the existing index")
+
+
+def bench_worker(provider: str):
+    """Runs in a fresh process so RSS reflects only this backend."""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    model = load(provider)
+    load_s = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    model.embed_query("warmup")
+    latencies = []
+    for _ in range(5):
+        for query in QUERIES:
+            t = time.perf_counter()
+            model.embed_query(query)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    docs = PASSAGES * 8
+    t = time.perf_counter()
+    model.embed_documents(docs)
+    batch_s = time.perf_counter() - t
+
+    latencies.sort()
+    print(json.dumps({
+        "provider": provider,
+        "load_s": round(load_s, 2),
+        "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "model_rss_mb": round(rss_after - rss_before, 1),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "batch_docs_per_s": round(len(docs) / batch_s, 1),
+    }))
+
+
+def bench():
+    print("\n⏱️ Benchmark (separate process per backend)")
+    for provider in ["huggingface", "onnx"]:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--bench-worker", provider],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"  ❌ {provider}: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"  {provider:12s} load {result['load_s']}s | peak RSS {result['rss_mb']} MB "
+              f"(+{result['model_rss_mb']} MB) | query p50 {result['query_p50_ms']} ms "
+              f"p95 {result['query_p95_ms']} ms | batch {result['batch_docs_per_s']} docs/s")
+
+
+if __name__ == "__main__":
+    if "--bench-worker" in sys.argv:
+        bench_worker(sys.argv[sys.argv.index("--bench-worker") + 1])
+    elif "--bench" in sys.argv:
+        bench()
+    else:
+        parity()
+        bench()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+FAISS -> Pinecone sync (scripts/utils/migrate_to_pinecone.py) against a local
+fake index with network latency and transient errors: parallel batched
+upserts, retries, resume after an interrupted run, and diffing so only
+changed chunks are re-sent. No Pinecone key or FAISS install needed.
+Usage: python tests/verify_pinecone_sync.py
+"""
+import sys
+import os
+import time
+import random
+import shutil
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts", "utils"))
+
+import migrate_to_pinecone as m
+
+NUM_CHUNKS = 1200
+DIM = 384
+LATENCY = 0.02  # seconds per request
+
+
+class FakeIndex:
+    """In-memory stand-in for pinecone.Index (upsert / delete / list)."""
+
+    def __init__(self, fail_every=0, die_after=None):
+        self.vectors = {}
+        self.calls = 0
+        self.sent = 0
+        self.fail_every = fail_every  # every Nth upsert raises once (throttling / 5xx)
+        self.die_after = die_after    # upserts after this many calls always fail (network gone)
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=""):
+        time.sleep(LATENCY)
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if self.die_after is not None and call > self.die_after:
+            raise ConnectionError("connection reset")
+        if self.fail_every and call % self.fail_every == 0:
+            raise RuntimeError("429 Too Many Requests")
+        with self._lock:
+            for v in vectors:
+                assert len(v["values"]) == DIM and "text" in v["metadata"]
+                self.vectors[(namespace, v["id"])] = v
+            self.sent += len(vectors)
+
+    def delete(self, ids, namespace=""):
+        time.sleep(LATENCY)
+        with self._lock:
+            for vid in ids:
+                self.vectors.pop((namespace, vid), None)
+
+    def list(self, namespace=""):
+        ids = [vid for ns, vid in self.vectors if ns == namespace]
+        for i in range(0, len(ids), 100):
+            yield ids[i:i + 100]
+
+
+def make_records(n, seed=0, edit=()):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        text = f"Chunk {i} of the hostel handbook." + (" (revised)" if i in edit else "")
+        meta = {"source": f"doc_{i // 40}.pdf", "page": (i // 8) % 5, "chunk_index": i % 8 + (i // 40) * 8,
+                "doc_type": "hostel", "tokens": 12, "sources": [f"doc_{i // 40}.pdf"]}
+        records.append(m.make_record(text, meta, [rng.random() for _ in range(DIM)]))
+    return records
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="pinecone_sync_")
+    ok = True
+    try:
+        records = make_records(NUM_CHUNKS)
+        ids = {r["id"] for r in records}
+        ok &= check("Chunk IDs are unique and stable", len(ids) == NUM_CHUNKS
+                    and ids == {r["id"] for r in make_records(NUM_CHUNKS, seed=1)})
+
+        print(f"\n⏱️ Fresh sync of {NUM_CHUNKS} vectors ({LATENCY * 1000:.0f} ms per request)")
+        timings = {}
+        for workers in (1, 4):
+            index = FakeIndex()
+            manifest = m.Manifest(os.path.join(tmp, f"fresh_{workers}.json"), "idx", "")
+            start = time.perf_counter()
+            stats = m.sync(index, records, manifest, batch_size=50, workers=workers, backoff=0.01)
+            timings[workers] = time.perf_counter() - start
+            print(f"  {workers} worker(s): {timings[workers]:.2f}s, {index.calls} requests")
+            ok &= check(f"All vectors stored ({workers} workers)", len(index.vectors) == NUM_CHUNKS
+                        and stats["upserted"] == NUM_CHUNKS)
+        ok &= check("Parallel upsert is faster", timings[4] < timings[1] / 2,
+                    f"{timings[1] / timings[4]:.1f}x")
+
+        print("\n🔁 Transient errors (every 4th request fails once)")
+        index = FakeIndex(fail_every=4)
+        manifest = m.Manifest(os.path.join(tmp, "flaky.json"), "idx", "")
+        stats = m.sync(index, records, manifest, batch_size=50, workers=4, backoff=0.01)
+        ok &= check("Retried to completion", stats["failed_batches"] == 0 and len(index.vectors) == NUM_CHUNKS,
+                    f"{index.calls} requests for {NUM_CHUNKS // 50} batches")
+
+        print("\n💥 Interrupted sync, then resume")
+        path = os.path.join(tmp, "resume.json")
+        index = FakeIndex(die_after=10)
+        stats = m.sync(index, records, m.Manifest(path, "idx", ""), batch_size=50, workers=4, retries=1, backoff=0.01)
+        done = len(m.Manifest(path, "idx", "").vectors)
+        ok &= check("Failure reported, acknowledged batches checkpointed", stats["failed_batches"] > 0
+                    and done == len(index.vectors) == stats["upserted"], f"{done} saved")
+        index.die_after = None
+        index.sent = 0
+        stats = m.sync(index, records, m.Manifest(path, "idx", ""), batch_size=50, workers=4, backoff=0.01)
+        ok &= check("Resume sends only the remainder", index.sent == NUM_CHUNKS - done
+                    and len(index.vectors) == NUM_CHUNKS, f"{index.sent} sent")
+
+        print("\n🔍 Incremental sync (5 edited, 3 removed, 2 added)")
+        changed = make_records(NUM_CHUNKS + 2, edit={1, 2, 3, 4, 5})
+        removed = {changed[i]["id"] for i in (10, 11, 12)}
+        changed = [r for r in changed if r["id"] not in removed]
+        index.sent = 0
+        stats = m.sync(index, changed, m.Manifest(path, "idx", ""), batch_size=50, workers=4, backoff=0.01)
+        ok &= check("Only changed vectors sent", index.sent == 7 and stats["deleted"] == 3
+                    and len(index.vectors) == NUM_CHUNKS - 1, f"{index.sent} upserted, {stats['deleted']} deleted")
+        edited = index.vectors[("", changed[1]["id"])]["metadata"]["text"]
+        ok &= check("Edited chunk replaced in place", edited.endswith("(revised)"))
+
+        index.sent = 0
+        stats = m.sync(index, changed, m.Manifest(path, "idx", ""), batch_size=50, workers=4)
+        ok &= check("No-op re-run sends nothing", index.sent == 0 and stats["unchanged"] == len(changed))
+
+        print("\n🧭 --full: manifest lost, reconcile with the remote ID list")
+        index.vectors[("", "orphan")] = {"id": "orphan"}
+        known = {vid: None for vid in m.list_remote_ids(index, "")}
+        stats = m.sync(index, changed, m.Manifest(os.path.join(tmp, "new.json"), "idx", ""),
+                       batch_size=50, workers=4, known=known)
+        ok &= check("Orphans deleted, everything re-sent", ("", "orphan") not in index.vectors
+                    and stats["upserted"] == len(changed) and stats["deleted"] == 1)
+
+        print("\n🧹 First sync against an index filled by from_documents (random UUIDs, no manifest)")
+        index = FakeIndex(die_after=8)
+        for i, r in enumerate(records):
+            index.vectors[("", f"uuid-{i}")] = {"id": f"uuid-{i}", "metadata": r["metadata"]}
+        path = os.path.join(tmp, "legacy.json")
+        m.sync(index, records, m.Manifest(path, "idx", ""), batch_size=50, workers=4, retries=1, backoff=0.01)
+        ok &= check("Interrupted first run leaves an unreconciled manifest",
+                    not m.Manifest(path, "idx", "").reconciled)
+        index.die_after = None
+        index.sent = 0
+        done = len(m.Manifest(path, "idx", "").vectors)
+        stats = m.sync(index, records, m.Manifest(path, "idx", ""), batch_size=50, workers=4, backoff=0.01)
+        ok &= check("Resume deletes the UUID copies and sends only the remainder",
+                    len(index.vectors) == NUM_CHUNKS and stats["deleted"] == NUM_CHUNKS
+                    and index.sent == NUM_CHUNKS - done, f"{stats['deleted']} deleted, {index.sent} sent")
+        ok &= check("Completed sync marks the manifest reconciled", m.Manifest(path, "idx", "").reconciled)
+
+        other = m.Manifest(path, "other-index", "")
+        ok &= check("Manifest of another index is ignored", other.vectors == {})
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if ok:
+        print("\n✅ Pinecone sync verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
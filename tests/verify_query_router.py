@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Fast-path router (src/query_router.py): checks how a mix of student questions
+is classified (doc lookup / personal data / eligibility / agent), then replays
+the mix through the router and through the agent alone, with a simulated LLM
+(every call costs LLM_SECONDS) and vector store, and reports per-route latency
+and share of traffic. Personal and eligibility answers come from a temp user
+store (./data is not touched).
+Usage: python tests/verify_query_router.py
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp(prefix="router_")
+# Configure before importing src so config picks it up
+os.environ["USER_DB_PATH"] = os.path.join(TMP, "users.db")
+os.environ["WARMUP_MODE"] = "lazy"
+
+from src import user_storage
+user_storage.USER_DATA_DIR = os.path.join(TMP, "users")
+from src import rag_pipeline, cache_manager, query_router
+
+LLM_SECONDS = 0.3     # one LLM call (plan, or answer)
+SEARCH_SECONDS = 0.2  # dense search
+STUDENT = "12313773"
+
+# (question, expected route)
+TRAFFIC = [
+    ("What are the hostel timings?", "doc"),
+    ("What is the fine for returning library books late?", "doc"),
+    ("Is ragging punishable by expulsion?", "doc"),
+    ("How do I apply for a hostel room change?", "doc"),
+    ("What are the eligibility criteria for the merit scholarship?", "doc"),
+    ("Where is block 34?", "doc"),
+    ("What is the dress code for exams?", "doc"),
+    ("Who do I call in a medical emergency?", "doc"),
+    ("How do I reset my UMS portal password", "agent"),
+    ("What is my next class?", "personal"),
+    ("Show my full timetable", "personal"),
+    ("What is my attendance?", "personal"),
+    ("Do I have any pending fee dues on my account?", "personal"),
+    ("Which semester is on my profile?", "personal"),
+    ("Am I eligible for the end term exam?", "eligibility"),
+    ("Am I eligible to register with my fee status?", "eligibility"),
+    ("If I fail a course, can I register for the summer term?", "agent"),
+    ("Compare the hostel fees for boys and girls hostels", "agent"),
+    ("Am I eligible for the exam and what is the re-appear fee?", "agent"),
+    ("What should I do about my backlog?", "agent"),
+    # Look like single lookups but aren't answered by one record: no confident no-LLM answer
+    ("How can I check eligibility for placements?", "agent"),
+    ("Am I eligible for the hostel?", "agent"),
+    ("When is my fee due date?", "agent"),
+    ("What is my hostel room number?", "agent"),
+    ("When am I free today?", "personal"),
+]
+
+
+class Doc:
+    def __init__(self, text, source):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+class SlowVectorStore:
+    def similarity_search_with_score(self, query, k=3, filter=None):
+        time.sleep(SEARCH_SECONDS)
+        return [(Doc(f"University regulation about: {query}", "data/regulations/Rules.pdf"), 0.2)]
+
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    calls = 0
+
+    def invoke(self, prompt):
+        FakeLLM.calls += 1
+        time.sleep(LLM_SECONDS)
+        return Reply("Answer from the records.")
+
+    def stream(self, prompt):
+        yield self.invoke(prompt)
+
+
+class FakeAgent:
+    """UniAgent's cost: one LLM call to plan, the tool, one LLM call to answer."""
+
+    def __init__(self, session_key=None):
+        self.session_key = session_key
+
+    async def process_query_stream(self, query, student_id=None):
+        llm = FakeLLM()
+        await asyncio.to_thread(llm.invoke, query)
+        route, topic = query_router.classify(query, student_id)
+        if route == "doc" or topic is None:
+            await asyncio.to_thread(rag_pipeline.retrieve_context, query)
+        else:
+            await asyncio.to_thread(query_router.answer_direct, route, topic, query, student_id)
+        yield (await asyncio.to_thread(llm.invoke, query)).content
+
+
+def seed():
+    with open(os.path.join(ROOT, "data", "users", STUDENT, "timetable.json")) as f:
+        timetable = json.load(f)
+    user_storage.save_user_profile(STUDENT, "Test Student", "B.TECH cse", 5)
+    user_storage.save_user_timetable(STUDENT, timetable, "timetable.pdf")
+    user_storage.save_academic_record(STUDENT, {
+        "attendance": {"average_percentage": 81.5},
+        "fees": {"status": "Pending", "amount_due": 12000},
+    })
+
+
+async def replay(answer_stream):
+    timings, answers = [], []
+    for question, _ in TRAFFIC:
+        cache_manager.clear_cache()
+        start = time.perf_counter()
+        answers.append("".join([c async for c in answer_stream(question, STUDENT)]))
+        timings.append(time.perf_counter() - start)
+    return timings, answers
+
+
+class FakeMcp:
+    """search_documents on a shared MCP server (mcp_client.mcp_session)."""
+    calls = 0
+
+    async def call_tool(self, name, arguments):
+        FakeMcp.calls += 1
+        text = f"[Rules.pdf] Regulation about: {arguments['query']}"
+        return SimpleNamespace(isError=False, content=[SimpleNamespace(type="text", text=text)])
+
+
+@asynccontextmanager
+async def fake_mcp_session():
+    yield FakeMcp()
+
+
+async def check_doc_via_mcp() -> bool:
+    class NoVectorStore:
+        def similarity_search_with_score(self, *args, **kwargs):
+            raise AssertionError("retrieved in the worker")
+
+    from src import mcp_client
+    saved = (rag_pipeline.VECTORSTORE, mcp_client.mcp_session, query_router.DOC_SEARCH_VIA_MCP)
+    rag_pipeline.VECTORSTORE = NoVectorStore()
+    mcp_client.mcp_session = fake_mcp_session
+    query_router.DOC_SEARCH_VIA_MCP = True
+    FakeLLM.calls = 0
+    try:
+        answer = "".join([c async for c in query_router.answer_stream("What is the grace marks policy?")])
+        error = None
+    except Exception as e:
+        answer, error = "", e
+    finally:
+        rag_pipeline.VECTORSTORE, mcp_client.mcp_session, query_router.DOC_SEARCH_VIA_MCP = saved
+    return check("Context from search_documents, one LLM call in the worker",
+                 error is None and answer and FakeMcp.calls == 1 and FakeLLM.calls == 1,
+                 f"{FakeMcp.calls} search, {FakeLLM.calls} LLM call" + (f", {error!r}" if error else ""))
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+async def main():
+    rag_pipeline.VECTORSTORE = SlowVectorStore()
+    rag_pipeline.RERANKER = None
+    rag_pipeline._RESOURCES_LOADED = True
+    rag_pipeline.get_llm = lambda session_key=None: FakeLLM()
+    seed()
+
+    ok = True
+    print("🧭 Classification")
+    wrong = []
+    for question, expected in TRAFFIC:
+        route, topic = query_router.classify(question, STUDENT)
+        if route != expected:
+            wrong.append(f"{question!r} -> {route} (expected {expected})")
+    for line in wrong:
+        print(f"  ❌ {line}")
+    ok &= check("Every question routed as expected", not wrong, f"{len(TRAFFIC) - len(wrong)}/{len(TRAFFIC)}")
+
+    FakeLLM.calls = 0
+    agent_times, _ = await replay(lambda q, s: FakeAgent().process_query_stream(q, s))
+    agent_calls = FakeLLM.calls
+    FakeLLM.calls = 0
+    router_times, answers = await replay(
+        lambda q, s: query_router.answer_stream(q, s, agent_factory=FakeAgent))
+    router_calls = FakeLLM.calls
+    stats = query_router.stats()
+
+    print(f"\n  {'route':12s} {'share':>6s} {'requests':>9s} {'p50 ms':>7s} {'p95 ms':>7s} {'agent only p50 ms':>18s}")
+    for route, s in stats.items():
+        before = sorted(t * 1000 for (q, r), t in zip(TRAFFIC, agent_times) if r == route)
+        before_p50 = f"{before[len(before) // 2]:.0f}" if before else "-"
+        print(f"  {route:12s} {s['share']:6.0%} {s['requests']:9d} {s['p50_ms'] or 0:7.0f} {s['p95_ms'] or 0:7.0f} {before_p50:>18s}")
+    print(f"\n  ⏱️ {len(TRAFFIC)} questions: {sum(agent_times):.2f}s through the agent -> {sum(router_times):.2f}s routed; "
+          f"LLM calls {agent_calls} -> {router_calls}\n")
+
+    ok &= check("Traffic share adds up", abs(sum(s["share"] for s in stats.values()) - 1) < 0.01
+                and sum(s["requests"] for s in stats.values()) == len(TRAFFIC))
+    direct = [i for i, (_, r) in enumerate(TRAFFIC) if r in ("personal", "eligibility")]
+    ok &= check("Personal and eligibility answers need no LLM call",
+                all(router_times[i] < LLM_SECONDS for i in direct),
+                f"slowest {max(router_times[i] for i in direct) * 1000:.1f} ms")
+    docs = [i for i, (_, r) in enumerate(TRAFFIC) if r == "doc"]
+    ok &= check("Document lookups take one LLM call instead of two",
+                all(router_times[i] < agent_times[i] - LLM_SECONDS * 0.8 for i in docs))
+    agent = [i for i, (_, r) in enumerate(TRAFFIC) if r == "agent"]
+    ok &= check("Agent route costs no more than before",
+                all(router_times[i] < agent_times[i] + 0.05 for i in agent))
+    ok &= check("Answers read from the student's records", "Pending" in answers[12] and "81.5" in answers[11]
+                and "NOT ELIGIBLE" in answers[14] and "B.TECH" in answers[13] and "couldn't" not in answers[9])
+    no_id = await query_router.answer_stream("What is my attendance?").__anext__()
+    ok &= check("Personal question without a Student ID", no_id == query_router.NEED_STUDENT_ID)
+
+    print("\n🔌 Document lookup through a shared MCP server")
+    ok &= await check_doc_via_mcp()
+
+    if ok:
+        print("\n✅ Query router verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
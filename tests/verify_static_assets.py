@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+In-memory UI assets (src/static_assets.py) through web_app: fingerprinted
+asset URLs, ETag revalidation (304), the Accept-Encoding variant choice
+(q-values, *, br before gzip on ties) and that index.html is only served from /.
+Usage: python tests/verify_static_assets.py
+"""
+import re
+import sys
+import os
+import asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("WARMUP_MODE", "lazy")
+
+import httpx
+from src import web_app
+from src.static_assets import StaticAssets, _Asset, IMMUTABLE_CACHE
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+def check_encoding_choice():
+    print("🗜️ Accept-Encoding variant choice")
+    asset = _Asset(b"body { color: red; }\n" * 100, "text/css", IMMUTABLE_CACHE)
+    asset.variants["br"] = b"br"  # brotli may not be installed; only the choice matters here
+    cases = [
+        ("", "identity"),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", "identity"),
+        ("*", "br"),
+        ("*;q=0.3, br;q=0", "gzip"),
+        ("GZIP;q=0.8, br;q=bad", "gzip"),
+        ("identity", "identity"),
+    ]
+    ok = True
+    for header, expected in cases:
+        got = StaticAssets._pick_encoding(asset, header)
+        ok &= check(f"{header!r:26s} -> {got}", got == expected, "" if got == expected else f"expected {expected}")
+    return ok
+
+
+async def check_routes():
+    print("\n🌐 Routes")
+    ok = True
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=web_app.app), base_url="http://test") as client:
+        home = await client.get("/", headers={"Accept-Encoding": "gzip"})
+        ok &= check("/ serves the shell page, revalidated", home.status_code == 200
+                    and home.headers["cache-control"] == "no-cache" and home.headers.get("content-encoding") == "gzip",
+                    f"{home.status_code}, {home.headers['cache-control']}")
+
+        again = await client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": home.headers["etag"]})
+        ok &= check("Matching ETag -> 304 without a body", again.status_code == 304 and not again.content
+                    and again.headers["etag"] == home.headers["etag"])
+        other = await client.get("/", headers={"Accept-Encoding": "identity",
+                                               "If-None-Match": home.headers["etag"]})
+        ok &= check("gzip ETag doesn't match the identity variant", other.status_code == 200
+                    and other.headers["etag"] != home.headers["etag"])
+
+        css = re.search(r'href="(/assets/app\.[0-9a-f]+\.css)"', home.text)
+        asset = await client.get(css.group(1)) if css else None
+        ok &= check("Fingerprinted asset cached for a year", asset is not None and asset.status_code == 200
+                    and "immutable" in asset.headers["cache-control"], css.group(1) if css else "no CSS link")
+
+        index = await client.get("/assets/index.html")
+        ok &= check("index.html not served as an asset", index.status_code == 404, str(index.status_code))
+        missing = await client.get("/assets/app.css")
+        ok &= check("Unfingerprinted name is unknown", missing.status_code == 404, str(missing.status_code))
+    return ok
+
+
+def main():
+    ok = check_encoding_choice()
+    ok &= asyncio.run(check_routes())
+    if ok:
+        print("\n✅ Static assets verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+In-flight stream sharing (src/stream_share.py): a request for an answer that
+is still being generated joins that generation (tokens so far, then live)
+instead of starting another, for answer_question_stream and for the agent
+path (query_router.agent_stream). Uses a simulated streaming LLM and vector
+store, and a temp user store (./data is not touched).
+Usage: python tests/verify_stream_share.py
+"""
+import sys
+import os
+import time
+import asyncio
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp(prefix="stream_share_")
+# Configure before importing src so config picks it up
+os.environ["USER_DB_PATH"] = os.path.join(TMP, "users.db")
+os.environ["WARMUP_MODE"] = "lazy"
+
+from src import user_storage
+user_storage.USER_DATA_DIR = os.path.join(TMP, "users")
+from src import rag_pipeline, cache_manager, query_router, stream_share
+
+SEARCH_SECONDS = 0.2
+TOKEN_SECONDS = 0.05
+TOKENS = [f"tok{i} " for i in range(20)]
+
+
+class Doc:
+    def __init__(self, text, source):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+class SlowVectorStore:
+    def similarity_search_with_score(self, query, k=3, filter=None):
+        time.sleep(SEARCH_SECONDS)
+        return [(Doc(f"University regulation about: {query}", "data/regulations/Rules.pdf"), 0.2)]
+
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """Blocking token stream, like ChatOllama.stream."""
+    generations = 0
+    fail_after = None
+
+    def stream(self, prompt):
+        FakeLLM.generations += 1
+        for i, tok in enumerate(TOKENS):
+            if FakeLLM.fail_after is not None and i == FakeLLM.fail_after:
+                raise RuntimeError("LLM connection reset")
+            time.sleep(TOKEN_SECONDS)
+            yield Chunk(tok)
+
+
+class FakeAgent:
+    runs = 0
+
+    def __init__(self, session_key=None):
+        pass
+
+    async def process_query_stream(self, query, student_id=None):
+        FakeAgent.runs += 1
+        yield "🔍 [Using check_eligibility...]\n"
+        for tok in TOKENS[:8]:
+            await asyncio.sleep(TOKEN_SECONDS)
+            yield tok
+
+
+async def consume(stream, delay=0.0, stop_after=None):
+    """(text, seconds to first chunk, seconds to last chunk) measured from the call."""
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    first, parts = None, []
+    async for chunk in stream:
+        if first is None:
+            first = time.perf_counter() - start
+        parts.append(chunk)
+        if stop_after and len(parts) >= stop_after:
+            await stream.aclose()
+            break
+    return "".join(parts), first, time.perf_counter() - start
+
+
+async def ticker(stop):
+    """Largest gap between event-loop wakeups while generations run (blocked loop = big gap)."""
+    worst, last = 0.0, time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        worst, last = max(worst, now - last), now
+    return worst
+
+
+def reset():
+    cache_manager.clear_cache()
+    FakeLLM.generations = 0
+    FakeLLM.fail_after = None
+    FakeAgent.runs = 0
+
+
+def check(label, passed, detail=""):
+    print(f"  {'✅' if passed else '❌'} {label}{': ' + detail if detail else ''}")
+    return passed
+
+
+async def main():
+    rag_pipeline.VECTORSTORE = SlowVectorStore()
+    rag_pipeline.RERANKER = None
+    rag_pipeline._RESOURCES_LOADED = True
+    rag_pipeline.get_llm = lambda session_key=None: FakeLLM()
+    question = "What are the hostel fees?"
+    expected = "".join(TOKENS)
+    generation = SEARCH_SECONDS + TOKEN_SECONDS * len(TOKENS)
+    ok = True
+
+    print("📡 answer_question_stream: 3 students ask the same question 0 / 0.5 / 0.8 s apart")
+    reset()
+    stop = asyncio.Event()
+    tick = asyncio.ensure_future(ticker(stop))
+    results = await asyncio.gather(*(consume(rag_pipeline.answer_question_stream(question, sid), delay)
+                                     for sid, delay in (("1001", 0.0), ("1002", 0.5), ("1003", 0.8))))
+    stop.set()
+    worst_gap = await tick
+    for (text, first, last), who in zip(results, ("first", "joined at 0.5 s", "joined at 0.8 s")):
+        print(f"  {who:16s} first chunk {first * 1000:5.0f} ms, done {last * 1000:5.0f} ms, {len(text)} chars")
+    ok &= check("One generation for all three", FakeLLM.generations == 1 and stream_share.STATS["joined"] >= 2,
+                f"{FakeLLM.generations} LLM stream(s)")
+    ok &= check("Everyone gets the full answer", all(text == expected for text, _, _ in results))
+    ok &= check("Joiners get the tokens so far at once, then follow live",
+                results[1][1] < 0.05 and results[2][1] < 0.05
+                and abs((0.5 + results[1][2]) - results[0][2]) < 0.1,
+                f"finished {(0.5 + results[1][2]) * 1000:.0f} ms vs {results[0][2] * 1000:.0f} ms after the first request")
+    ok &= check("Event loop not blocked while generating", worst_gap < 0.1, f"max gap {worst_gap * 1000:.0f} ms")
+    ok &= check("Committed to the cache, nothing left in flight",
+                cache_manager.get_from_cache(question) == expected and not stream_share.INFLIGHT)
+    text, first, _ = await consume(rag_pipeline.answer_question_stream(question))
+    ok &= check("Next request served from the cache", text == expected and FakeLLM.generations == 1,
+                f"{first * 1000:.1f} ms")
+
+    print("\n🔀 Different questions, disconnects and failures")
+    reset()
+    results = await asyncio.gather(consume(rag_pipeline.answer_question_stream("What is the mess fee?")),
+                                   consume(rag_pipeline.answer_question_stream("Where is block 34?")))
+    ok &= check("Different questions generate separately", FakeLLM.generations == 2)
+
+    reset()
+    results = await asyncio.gather(consume(rag_pipeline.answer_question_stream(question), stop_after=2),
+                                   consume(rag_pipeline.answer_question_stream(question), delay=0.3))
+    ok &= check("First client disconnecting doesn't stop the others", results[1][0] == expected
+                and FakeLLM.generations == 1)
+    await asyncio.sleep(0.05)
+    ok &= check("...and the answer still reaches the cache", cache_manager.get_from_cache(question) == expected)
+
+    reset()
+    FakeLLM.fail_after = 5
+    errors = await asyncio.gather(consume(rag_pipeline.answer_question_stream(question)),
+                                  consume(rag_pipeline.answer_question_stream(question), delay=0.3),
+                                  return_exceptions=True)
+    ok &= check("A failed generation fails every follower, nothing cached",
+                all(isinstance(e, RuntimeError) for e in errors)
+                and cache_manager.get_from_cache(question) is None and not stream_share.INFLIGHT)
+    FakeLLM.fail_after = None
+    text, _, _ = await consume(rag_pipeline.answer_question_stream(question))
+    ok &= check("Next request generates again", text == expected and FakeLLM.generations == 2)
+
+    print("\n🤖 Agent path (query_router.agent_stream)")
+    reset()
+    user_storage.save_academic_record("1001", {"attendance": {"average_percentage": 80}, "fees": {"status": "Paid"}})
+    agent_q = "Am I eligible for the exam and what is the re-appear fee?"
+    results = await asyncio.gather(
+        consume(query_router.agent_stream(agent_q, "1001", FakeAgent)),
+        consume(query_router.agent_stream(agent_q, "1001", FakeAgent), delay=0.15),
+        consume(query_router.agent_stream(agent_q, "1002", FakeAgent), delay=0.15))
+    ok &= check("Same student, same question: one agent run", FakeAgent.runs == 2
+                and results[0][0] == results[1][0] and results[1][1] < 0.05, f"{FakeAgent.runs} runs for 3 requests")
+    await consume(query_router.agent_stream(agent_q, "1001", FakeAgent))
+    ok &= check("Repeat served from the cache", FakeAgent.runs == 2)
+    time.sleep(0.01)
+    user_storage.save_academic_record("1001", {"attendance": {"average_percentage": 60}, "fees": {"status": "Paid"}})
+    await consume(query_router.agent_stream(agent_q, "1001", FakeAgent))
+    ok &= check("A record change invalidates the cached agent answer", FakeAgent.runs == 3)
+    entries = [k for k in cache_manager._CACHE_STORE if k.startswith("agent\x00") and "\x001001\x00" in k]
+    ok &= check("...and replaces it instead of adding an entry", len(entries) == 1, f"{len(entries)} entries for 1001")
+    print(f"  📊 {stream_share.stats()}")
+
+    if ok:
+        print("\n✅ In-flight stream sharing verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
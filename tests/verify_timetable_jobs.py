@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Timetable upload pipeline: non-blocking submit, bounded workers, retries with
+backoff and content-hash dedup. Uses a simulated extractor (no Gemini calls)
+and a temp cache dir (./data is not touched).
+Usage: python tests/verify_timetable_jobs.py
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP = tempfile.mkdtemp(prefix="tt_jobs_")
+# Configure before importing src so config picks it up
+os.environ["USER_DB_PATH"] = os.path.join(TMP, "users.db")
+os.environ["WARMUP_MODE"] = "lazy"
+os.environ["TIMETABLE_UPLOAD_MAX_BYTES"] = "4096"
+
+from src.timetable_jobs import TimetableJobQueue, QueueFullError
+
+EXTRACT_SECONDS = 0.5  # simulated Gemini upload + generate_content
+WORKERS = 2
+
+with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "data", "users", "12313773", "timetable.json")) as f:
+    TIMETABLE = json.load(f)
+
+
+class FakeExtractor:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, pdf_path):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            fail = self.calls <= self.failures
+        time.sleep(EXTRACT_SECONDS)
+        with self.lock:
+            self.running -= 1
+        if fail:
+            return {"schedule": [], "error": "429 Resource exhausted"}
+        return TIMETABLE
+
+
+def make_queue(extractor, cache_dir, saved, **kwargs):
+    kwargs.setdefault("workers", WORKERS)
+    kwargs.setdefault("backoff", 0.05)
+    return TimetableJobQueue(
+        extract_fn=extractor,
+        save_fn=lambda sid, data, path: saved.append(sid),
+        cache_dir=cache_dir,
+        **kwargs
+    )
+
+
+async def check_nonblocking_and_dedup(cache_dir):
+    print("🔍 Submit is non-blocking; classmates share one extraction")
+    extractor, saved = FakeExtractor(), []
+    queue = make_queue(extractor, cache_dir, saved)
+
+    start = time.perf_counter()
+    jobs = [await queue.submit(f"2000000{i}", "", b"%PDF section K23BR") for i in range(5)]
+    submit_ms = (time.perf_counter() - start) * 1000
+    jobs.append(await queue.submit("30000000", "", b"%PDF section K23XY"))
+    print(f"  Submitted 6 uploads in {submit_ms:.1f} ms")
+
+    results = await asyncio.gather(*(queue.wait(j["job_id"], timeout=10) for j in jobs))
+    ok = all(r["status"] == "done" for r in results)
+    print(f"  {'✅' if ok else '❌'} All jobs done, {len(saved)} timetables saved")
+    ok &= extractor.calls == 2
+    print(f"  {'✅' if extractor.calls == 2 else '❌'} Extractor calls: {extractor.calls} (2 distinct PDFs)")
+    ok &= extractor.max_running <= WORKERS
+    print(f"  {'✅' if extractor.max_running <= WORKERS else '❌'} Peak concurrent extractions: {extractor.max_running}")
+    ok &= submit_ms < EXTRACT_SECONDS * 1000 / 2
+    await queue.stop()
+
+    print("🔍 Cached result survives a restart")
+    extractor2, saved2 = FakeExtractor(), []
+    queue2 = make_queue(extractor2, cache_dir, saved2)
+    job = await queue2.submit("40000000", "", b"%PDF section K23BR")
+    reused = job["status"] == "done" and job["deduplicated"] and extractor2.calls == 0
+    print(f"  {'✅' if reused else '❌'} Re-upload served from cache without extraction")
+    await queue2.stop()
+    return ok and reused
+
+
+async def check_retries(cache_dir):
+    print("🔍 Transient failures are retried with backoff")
+    extractor, saved = FakeExtractor(failures=2), []
+    queue = make_queue(extractor, cache_dir, saved, retries=2)
+    job = await queue.submit("50000000", "", b"%PDF flaky")
+    result = await queue.wait(job["job_id"], timeout=10)
+    ok = result["status"] == "done" and result["attempts"] == 3
+    print(f"  {'✅' if ok else '❌'} Succeeded after {result['attempts']} attempts")
+
+    extractor, saved = FakeExtractor(failures=10), []
+    queue_fail = make_queue(extractor, None, saved, retries=1)
+    job = await queue_fail.submit("60000000", "", b"%PDF broken")
+    result = await queue_fail.wait(job["job_id"], timeout=10)
+    failed = result["status"] == "failed" and result["attempts"] == 2 and not saved
+    print(f"  {'✅' if failed else '❌'} Gave up after {result['attempts']} attempts: {result['error']}")
+    await queue.stop()
+    await queue_fail.stop()
+    return ok and failed
+
+
+async def check_backpressure():
+    print("🔍 Full backlog is rejected instead of queueing forever")
+    extractor, saved = FakeExtractor(), []
+    queue = make_queue(extractor, None, saved, workers=1, queue_size=2)
+    rejected = 0
+    for i in range(6):
+        try:
+            await queue.submit(f"7000000{i}", "", f"%PDF {i}".encode())
+        except QueueFullError:
+            rejected += 1
+        await asyncio.sleep(0)  # let the worker pick up the first job
+    ok = rejected > 0
+    print(f"  {'✅' if ok else '❌'} {rejected} of 6 uploads rejected with QueueFullError")
+    await queue.stop()
+    return ok
+
+
+async def check_upload_endpoint():
+    print("🔍 /upload_timetable rejects bad IDs, unknown students and oversized files before writing")
+    import httpx
+    from src import user_storage
+    user_storage.USER_DATA_DIR = os.path.join(TMP, "data", "users")
+    from src import web_app
+    user_storage.save_user_profile("12345678", "Test Student", "B.TECH cse", 5)
+    saved = []
+    web_app.TIMETABLE_JOBS = make_queue(FakeExtractor(), None, saved)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=web_app.app), base_url="http://test") as client:
+        async def upload(student_id, content):
+            files = {"file": ("timetable.pdf", content, "application/pdf")}
+            return (await client.post("/upload_timetable", data={"student_id": student_id}, files=files)).status_code
+
+        cases = [
+            ("Path traversal ID", "../../escape", b"%PDF small", 400),
+            ("Unknown student", "99999999", b"%PDF small", 404),
+            ("Oversized PDF", "12345678", b"%PDF" + b"0" * 5000, 413),
+            ("Not a PDF", "12345678", b"hello", 400),
+            ("Valid upload", "12345678", b"%PDF small", 202),
+        ]
+        ok = True
+        for label, student_id, content, expected in cases:
+            status = await upload(student_id, content)
+            ok &= status == expected
+            print(f"  {'✅' if status == expected else '❌'} {label}: {status} (expected {expected})")
+
+        # Backlog full: 429, and the stored PDF still matches the stored timetable
+        await web_app.TIMETABLE_JOBS.stop()
+        web_app.TIMETABLE_JOBS = make_queue(FakeExtractor(), None, saved, workers=1, queue_size=1)
+        for i in range(2):
+            await web_app.TIMETABLE_JOBS.submit(f"8000000{i}", "", f"%PDF backlog {i}".encode())
+            await asyncio.sleep(0)  # the worker takes the first, the second fills the queue
+        status = await upload("12345678", b"%PDF replacement")
+        with open(os.path.join(user_storage.USER_DATA_DIR, "12345678", "timetable.pdf"), "rb") as f:
+            kept = f.read() == b"%PDF small"
+        ok &= status == 429 and kept
+        print(f"  {'✅' if status == 429 and kept else '❌'} Full queue: {status}, stored PDF "
+              f"{'unchanged' if kept else 'overwritten'}")
+
+    written = sorted(os.listdir(user_storage.USER_DATA_DIR))
+    escaped = os.path.exists(os.path.join(TMP, "escape"))
+    clean = written == ["12345678"] and not escaped
+    print(f"  {'✅' if clean else '❌'} Only the valid upload reached the disk: {written}")
+    await web_app.TIMETABLE_JOBS.stop()
+    return ok and clean
+
+
+async def main():
+    cache_dir = tempfile.mkdtemp(prefix="tt_cache_")
+    try:
+        results = [
+            await check_nonblocking_and_dedup(cache_dir),
+            await check_retries(cache_dir),
+            await check_backpressure(),
+            await check_upload_endpoint(),
+        ]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        shutil.rmtree(TMP, ignore_errors=True)
+    if all(results):
+        print("\n✅ Timetable job pipeline verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline timetable parser: accuracy and speed on the committed example PDF,
+plus the low-confidence path that hands non-timetable PDFs to Gemini.
+No API key needed (Gemini is never called here).
+Usage: python tests/verify_timetable_parser.py
+"""
+import sys
+import os
+import json
+import time
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.timetable_parser import parse_timetable_pdf
+from src.config import TIMETABLE_PARSE_MIN_CONFIDENCE
+
+PDF_PATH = os.path.join(ROOT, "data", "users", "12313773", "timetable.pdf")
+GEMINI_JSON = os.path.join(ROOT, "data", "users", "12313773", "timetable.json")
+NON_TIMETABLE_PDF = os.path.join(ROOT, "data", "academics", "Library Policy.pdf")
+
+# Hand-checked against the grid in timetable.pdf: (day, time, course, room)
+EXPECTED = {
+    ("Monday", "01-02 PM", "PEV301", "37-606"),
+    ("Monday", "02-03 PM", "PEV301", "37-606"),
+    ("Monday", "04-05 PM", "INT374", "37-606"),
+    ("Monday", "05-06 PM", "INT374", "37-606"),
+    ("Tuesday", "01-02 PM", "FIN214", "37-711"),
+    ("Tuesday", "02-03 PM", "INT234", "37-606"),
+    ("Tuesday", "03-04 PM", "INT234", "37-606"),
+    ("Tuesday", "04-05 PM", "PEV301", "37-606"),
+    ("Tuesday", "05-06 PM", "INT234", "26-103"),
+    ("Wednesday", "01-02 PM", "FIN214", "37-711"),
+    ("Wednesday", "03-04 PM", "PEV301", "37-603"),
+    ("Wednesday", "04-05 PM", "INT374", "37-601"),
+    ("Wednesday", "05-06 PM", "INT374", "37-601"),
+    ("Thursday", "10-11 AM", "PEAS05", "34-103"),
+    ("Thursday", "11-12 AM", "PEAS05", "34-103"),
+    ("Thursday", "01-02 PM", "FIN214", "37-711"),
+    ("Thursday", "05-06 PM", "INT234", "26-103"),
+    ("Friday", "03-04 PM", "INT234", "37-606"),
+    ("Friday", "04-05 PM", "INT234", "37-606"),
+}
+
+
+def key(entry):
+    return (entry["day"], entry["time"], entry["course_code"], entry["room"])
+
+
+def score(name, schedule):
+    got = {key(e) for e in schedule}
+    hits = len(got & EXPECTED)
+    precision = hits / len(got) if got else 0.0
+    recall = hits / len(EXPECTED)
+    print(f"  {name:14s} {len(got):3d} classes | precision {precision:.0%} | recall {recall:.0%}")
+    for miss in sorted(EXPECTED - got):
+        print(f"     missing: {miss}")
+    for extra in sorted(got - EXPECTED):
+        print(f"     wrong:   {extra}")
+    return precision, recall
+
+
+def check_accuracy():
+    print("🎯 Accuracy vs hand-checked grid")
+    result = parse_timetable_pdf(PDF_PATH)
+    precision, recall = score("local parser", result["schedule"])
+    with open(GEMINI_JSON) as f:
+        score("gemini (saved)", json.load(f)["schedule"])
+
+    ok = precision == 1.0 and recall == 1.0 and result["confidence"] >= TIMETABLE_PARSE_MIN_CONFIDENCE
+    sections = {e["section"] for e in result["schedule"]}
+    print(f"  Confidence {result['confidence']:.2f} | sections {sorted(sections)}")
+    print(f"  {'✅' if ok else '❌'} Local parser matches the grid and is trusted without Gemini")
+    return ok
+
+
+def check_speed():
+    print("\n⏱️ Local parse latency")
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        parse_timetable_pdf(PDF_PATH)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"  p50 {statistics.median(timings):.0f} ms | max {max(timings):.0f} ms "
+          f"(Gemini upload + 1-2 generate_content calls typically take several seconds)")
+    return True
+
+
+def check_low_confidence():
+    print("\n🔍 Non-timetable PDF is routed to Gemini")
+    if not os.path.exists(NON_TIMETABLE_PDF):
+        print("  ⚠️ Sample PDF missing, skipped")
+        return True
+    result = parse_timetable_pdf(NON_TIMETABLE_PDF)
+    ok = result["confidence"] < TIMETABLE_PARSE_MIN_CONFIDENCE
+    print(f"  {'✅' if ok else '❌'} Confidence {result['confidence']:.2f} < {TIMETABLE_PARSE_MIN_CONFIDENCE}")
+    return ok
+
+
+if __name__ == "__main__":
+    results = [check_accuracy(), check_speed(), check_low_confidence()]
+    if all(results):
+        print("\n✅ Offline timetable parser verified")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)
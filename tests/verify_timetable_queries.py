@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Checks that common timetable questions are answered from the local index
+(no Gemini call) and reports per-query latency.
+Usage: python tests/verify_timetable_queries.py
+"""
+import sys
+import os
+import json
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import timetable_index, timetable_extractor
+
+TIMETABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "data", "users", "12313773", "timetable.json")
+
+NOW = datetime(2025, 1, 6, 12, 30)  # a Monday, before the 1 PM tutorial
+
+# (query, text expected in the answer)
+QUERIES = [
+    ("What is my next class?", "PEV301"),
+    ("Show me today's classes", "Monday"),
+    ("What classes do I have tomorrow?", "Tuesday"),
+    ("What's my schedule on Wednesday?", "Wednesday"),
+    ("Where is INT374 held?", "INT374"),
+    ("When is PEV301?", "PEV301"),
+    ("What is in room 37-606?", "37-606"),
+    ("When am I free today?", "free"),
+    ("Show my full timetable", "Weekly"),
+    ("Do I have any lecture on sunday", "No classes on Sunday"),
+]
+
+# Not about the student's schedule: the index must not answer these
+NEGATIVE_QUERIES = [
+    "Is there a break in the exam schedule?",
+    "When is the library free for students?",
+    "Are all classes cancelled on Diwali?",
+    "What is the attendance rule for a full class?",
+    "How do I apply for a hostel room change?",
+    "What is the next step for hostel allotment?",
+    "What is the mess menu today?",
+]
+
+TIME_CASES = [
+    ("01-02 PM", (13 * 60, 14 * 60)),
+    ("11-12 AM", (11 * 60, 12 * 60)),
+    ("12-01 PM", (12 * 60, 13 * 60)),
+    ("09:30 AM - 10:30 AM", (9 * 60 + 30, 10 * 60 + 30)),
+]
+
+
+def check_time_parsing():
+    print("🕐 Time range parsing")
+    ok = True
+    for text, expected in TIME_CASES:
+        got = timetable_index.parse_time_range(text)
+        status = "✅" if got == expected else "❌"
+        ok &= got == expected
+        print(f"  {status} {text!r} -> {got}")
+    return ok
+
+
+def check_queries():
+    with open(TIMETABLE_PATH) as f:
+        timetable = json.load(f)
+
+    start = time.perf_counter()
+    index = timetable_index.build_index(timetable)
+    print(f"\n🏗️ Built index: {len(index['slots'])} slots in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    print("\n💬 Queries (fixed clock: Monday 12:30)")
+    ok = True
+    for query, expected in QUERIES:
+        t = time.perf_counter()
+        answer = timetable_index.answer_query(index, query, now=NOW)
+        elapsed = (time.perf_counter() - t) * 1000
+        passed = bool(answer) and expected.lower() in answer.lower()
+        ok &= passed
+        first_line = (answer or "None").splitlines()[0]
+        print(f"  {'✅' if passed else '❌'} {query:38s} {elapsed:6.3f} ms  {first_line}")
+
+    print("\n🚫 Not schedule questions (left to RAG)")
+    for query in NEGATIVE_QUERIES:
+        answer = timetable_index.answer_query(index, query, now=NOW)
+        schedule = timetable_index.is_schedule_question(index, query)
+        passed = answer is None and not schedule
+        ok &= passed
+        print(f"  {'✅' if passed else '❌'} {query:46s} {(answer or 'None').splitlines()[0]}")
+
+    # Through the public entry point: must not reach the LLM
+    before = dict(timetable_extractor.QUERY_STATS)
+    for query, _ in QUERIES:
+        timetable_extractor.search_timetable(timetable, query, index=index)
+    llm_calls = timetable_extractor.QUERY_STATS["llm"] - before["llm"]
+    local = timetable_extractor.QUERY_STATS["local"] - before["local"]
+    print(f"\n📊 search_timetable: {local} local, {llm_calls} LLM call(s)")
+    ok &= llm_calls == 0
+    return ok
+
+
+if __name__ == "__main__":
+    results = [check_time_parsing(), check_queries()]
+    if all(results):
+        print("\n✅ All timetable queries answered locally")
+    else:
+        print("\n❌ Some checks failed")
+        sys.exit(1)